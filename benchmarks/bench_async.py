@@ -0,0 +1,82 @@
+"""
+Vergleicht Requests pro Sekunde des Backends mit sync (db_mongo, Threadpool) und
+async (db_mongo_async) Mongo-Adapter unter gleichzeitiger Last.
+
+Läuft in-process über httpx.ASGITransport gegen myapp.backend.api:app und braucht
+eine erreichbare MongoDB (MONGO_URI, MONGO_DB – am besten eine eigene Test-DB):
+
+    PYTHONPATH=src MONGO_URI=mongodb://localhost:27017 MONGO_DB=klassenkassa_bench \\
+        python benchmarks/bench_async.py --requests 2000 --concurrency 100
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Any, Dict, List
+
+import httpx
+
+from myapp.adapters import db_mongo, db_mongo_async
+from myapp.backend import api
+
+DEFAULT_PATHS = ["/balance", "/transactions?limit=50&order=desc", "/savings-goals", "/students"]
+
+
+async def _run(adapter: Any, paths: List[str], requests: int, concurrency: int) -> Dict[str, Any]:
+    api.db = adapter
+    await api._call(adapter.connect)
+    try:
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for path in paths:  # Aufwärmen
+                (await client.get(path)).raise_for_status()
+
+            latencies: List[float] = []
+            errors = 0
+            counter = iter(range(requests))
+
+            async def worker() -> None:
+                nonlocal errors
+                for i in counter:
+                    t0 = time.perf_counter()
+                    r = await client.get(paths[i % len(paths)])
+                    latencies.append(time.perf_counter() - t0)
+                    if r.status_code >= 400:
+                        errors += 1
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - started
+    finally:
+        await api._call(adapter.disconnect)
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "rps": round(requests / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="sync vs. async Mongo-Adapter")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--path", action="append", dest="paths", help="GET-Pfad (mehrfach möglich)")
+    args = parser.parse_args()
+    paths = args.paths or DEFAULT_PATHS
+
+    for name, adapter in (("sync", db_mongo), ("async", db_mongo_async)):
+        result = asyncio.run(_run(adapter, paths, args.requests, args.concurrency))
+        print(json.dumps({"adapter": name, **result}), flush=True)
+
+
+if __name__ == "__main__":
+    main()
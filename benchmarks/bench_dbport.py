@@ -0,0 +1,300 @@
+"""
+Latenz (p50/p95/p99) und Durchsatz der DBPort-Operationen je Adapter und Datenbestand.
+
+Für jeden Adapter und jede Größe wird ein frischer Bestand angelegt (create_transactions_bulk),
+danach läuft jede Operation --iterations Mal. Ergebnis als JSON (--out); mit --baseline wird
+gegen einen gespeicherten Lauf verglichen und der Exit-Code ist 1, wenn eine Operation im
+Median (--metric) um mehr als --tolerance langsamer geworden ist.
+
+Adapter: memory, columnar (MEMORY_ENGINE=columnar), mongo, mongo-async. Die Mongo-Adapter
+brauchen einen mongod: --mongo-uri (die Datenbank --mongo-db wird geleert!) oder --spawn-mongod,
+das einen temporären mongod aus dem PATH auf einem freien Port startet.
+
+    PYTHONPATH=src python benchmarks/bench_dbport.py --adapters memory,columnar --sizes 1000,100000 \\
+        --out bench.json
+    PYTHONPATH=src python benchmarks/bench_dbport.py --adapters memory,mongo --spawn-mongod \\
+        --sizes 1000,100000,1000000 --baseline bench-main.json
+
+Eine Baseline ist nur auf derselben Maschine aussagekräftig und liegt daher nicht im Repo: erst auf
+dem Vergleichsstand mit --out bench-main.json messen, dann auf dem eigenen Stand mit --baseline.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import inspect
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from pymongo import MongoClient
+
+from myapp.adapters import db_memory
+from seed_data import START_DAY, STUDENTS, seed_row
+
+ADAPTERS = ("memory", "columnar", "mongo", "mongo-async")
+SEED_CHUNK = 5000
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _call(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Sync-Adapter direkt, Async-Adapter auf einer gemeinsamen Event-Loop."""
+    global _loop
+    result = fn(*args, **kwargs)
+    if inspect.isawaitable(result):
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+        result = _loop.run_until_complete(result)
+    return result
+
+
+def _seed_rows(start: int, n: int) -> List[Dict[str, Any]]:
+    """Bestandszeilen start..start+n als Keywords für create_transactions_bulk."""
+    rows = []
+    for i in range(start, start + n):
+        row = seed_row(i)
+        row["type_"], row["date_"] = row.pop("type"), row.pop("date")
+        rows.append(row)
+    return rows
+
+
+def _seed(adapter: Any, size: int) -> float:
+    t0 = time.perf_counter()
+    for start in range(0, size, SEED_CHUNK):
+        _, errors = _call(adapter.create_transactions_bulk, _seed_rows(start, min(SEED_CHUNK, size - start)))
+        if errors:
+            raise SystemExit(f"Befüllen fehlgeschlagen: {errors[:3]}")
+    for i in range(STUDENTS):
+        _call(adapter.create_student, name=f"Schüler {i}", created_at=datetime.now())
+    _call(adapter.create_savings_goal, name="Wandertag", amount=500.0, created_at=datetime.now())
+    return time.perf_counter() - t0
+
+
+def _operations(adapter: Any, size: int) -> List[Tuple[str, Callable[[int], Any], bool]]:
+    """(Name, Aufruf je Iteration, nur lesend). Schreibende Operationen räumen selbst auf."""
+    created: List[int] = []
+    today = date.today()
+    mid = max(1, size // 2)
+    week_from = START_DAY + timedelta(days=100)
+
+    def create_tx(i: int) -> None:
+        t = _call(
+            adapter.create_transaction,
+            type_="einzahlung",
+            amount=1.0,
+            description="Beitrag Bench",
+            timestamp=datetime.now(),
+            category="Bench",
+            student="Schüler 1",
+            date_=today,
+        )
+        created.append(int(t.id))
+
+    def delete_tx(i: int) -> None:
+        _call(adapter.delete_transaction, created.pop())
+
+    def bulk(i: int) -> None:
+        _call(adapter.create_transactions_bulk, _seed_rows(size + i * 100, 100))
+
+    def goal_cycle(i: int) -> None:
+        goal = _call(adapter.create_savings_goal, name=f"Ziel {i}", amount=10.0, created_at=datetime.now())
+        _call(adapter.delete_savings_goal, int(goal["id"]))
+
+    def student_cycle(i: int) -> None:
+        student = _call(adapter.create_student, name=f"Bench {i}", created_at=datetime.now())
+        _call(adapter.delete_student, int(student["id"]))
+
+    return [
+        ("get_balance", lambda i: _call(adapter.get_balance), True),
+        ("query_rows:first_page", lambda i: _call(adapter.query_transaction_rows, limit=50, descending=True), True),
+        ("query_rows:deep_page", lambda i: _call(adapter.query_transaction_rows, after_id=mid, limit=50), True),
+        ("query_rows:student", lambda i: _call(adapter.query_transaction_rows, student="Schüler 7", limit=50), True),
+        (
+            "query_rows:date_range",
+            lambda i: _call(adapter.query_transaction_rows, date_from=week_from, date_to=week_from + timedelta(days=6), limit=50),
+            True,
+        ),
+        ("search_rows", lambda i: _call(adapter.search_transaction_rows, "ausflug schüler", limit=50, descending=True), True),
+        ("get_daily_stats", lambda i: _call(adapter.get_daily_stats, days=30), True),
+        ("get_student_balances", lambda i: _call(adapter.get_student_balances), True),
+        ("get_savings_goals", lambda i: _call(adapter.get_savings_goals), True),
+        ("get_students", lambda i: _call(adapter.get_students), True),
+        ("create_transaction", create_tx, False),
+        ("delete_transaction", delete_tx, False),
+        ("create_transactions_bulk:100", bulk, False),
+        ("savings_goal:create+delete", goal_cycle, False),
+        ("student:create+delete", student_cycle, False),
+    ]
+
+
+def _percentile(sorted_ms: List[float], p: float) -> float:
+    return sorted_ms[min(len(sorted_ms) - 1, round(p / 100 * (len(sorted_ms) - 1)))]
+
+
+def _measure(fn: Callable[[int], Any], iterations: int, warmup: int) -> Dict[str, float]:
+    for i in range(warmup):
+        fn(i)
+    latencies: List[float] = []
+    started = time.perf_counter()
+    for i in range(iterations):
+        t0 = time.perf_counter()
+        fn(i)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "n": iterations,
+        "p50_ms": round(_percentile(latencies, 50), 4),
+        "p95_ms": round(_percentile(latencies, 95), 4),
+        "p99_ms": round(_percentile(latencies, 99), 4),
+        "mean_ms": round(sum(latencies) / iterations, 4),
+        "ops_per_s": round(iterations / elapsed, 1),
+    }
+
+
+def _adapter(name: str, mongo_uri: Optional[str], mongo_db: str) -> Tuple[Any, Callable[[], None]]:
+    """Adaptermodul + Funktion, die einen leeren Bestand herstellt und verbindet."""
+    if name in ("memory", "columnar"):
+        def fresh_memory() -> None:
+            db_memory.MEMORY_ENGINE = "columnar" if name == "columnar" else "list"
+            db_memory._reset_storage()
+            db_memory.connect(seed=False)
+
+        return db_memory, fresh_memory
+
+    if mongo_uri is None:
+        raise SystemExit(f"{name}: --mongo-uri oder --spawn-mongod angeben")
+    from myapp.adapters import db_mongo, db_mongo_async
+
+    adapter: Any = db_mongo_async if name == "mongo-async" else db_mongo
+
+    def fresh_mongo() -> None:
+        with MongoClient[Dict[str, Any]](mongo_uri) as client:
+            client.drop_database(mongo_db)
+        _call(adapter.connect)
+
+    return adapter, fresh_mongo
+
+
+@contextlib.contextmanager
+def _spawned_mongod() -> Iterator[str]:
+    binary = shutil.which("mongod")
+    if binary is None:
+        raise SystemExit("--spawn-mongod: kein mongod im PATH")
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    dbpath = tempfile.mkdtemp(prefix="bench-mongod-")
+    proc = subprocess.Popen(
+        [binary, "--dbpath", dbpath, "--port", str(port), "--bind_ip", "127.0.0.1", "--quiet"],
+        stdout=subprocess.DEVNULL,
+    )
+    uri = f"mongodb://127.0.0.1:{port}"
+    try:
+        with MongoClient[Dict[str, Any]](uri, serverSelectionTimeoutMS=20000) as client:
+            client.admin.command("ping")
+        yield uri
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+        shutil.rmtree(dbpath, ignore_errors=True)
+
+
+def run(adapters: List[str], sizes: List[int], iterations: int, warmup: int, mongo_uri: Optional[str], mongo_db: str) -> Dict[str, Any]:
+    results: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for name in adapters:
+        adapter, fresh = _adapter(name, mongo_uri, mongo_db)
+        for size in sizes:
+            fresh()
+            try:
+                seed_s = _seed(adapter, size)
+                ops: Dict[str, Any] = {"_seed_s": round(seed_s, 2)}
+                for op, fn, read_only in _operations(adapter, size):
+                    n = max(1, iterations // 10) if op.startswith("create_transactions_bulk") else iterations
+                    ops[op] = _measure(fn, n, warmup if read_only else 0)
+                    print(f"{name:12} {size:>9} {op:30} p50 {ops[op]['p50_ms']:>9} ms  p99 {ops[op]['p99_ms']:>9} ms", flush=True)
+            finally:
+                _call(adapter.disconnect)
+            results.setdefault(name, {})[str(size)] = ops
+    return {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "iterations": iterations,
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], metric: str, tolerance: float, min_ms: float) -> List[str]:
+    """Operationen, die gegenüber baseline um mehr als tolerance (relativ) und min_ms (absolut) langsamer sind."""
+    regressions: List[str] = []
+    for adapter, sizes in current["results"].items():
+        for size, ops in sizes.items():
+            base_ops = baseline.get("results", {}).get(adapter, {}).get(size, {})
+            for op, result in ops.items():
+                base = base_ops.get(op)
+                if op.startswith("_") or base is None:
+                    continue
+                now, before = float(result[metric]), float(base[metric])
+                if now > before * (1 + tolerance) and now - before > min_ms:
+                    regressions.append(f"{adapter} {size} {op}: {metric} {before} -> {now} ms")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--adapters", default="memory", help=f"kommagetrennt aus {', '.join(ADAPTERS)}")
+    parser.add_argument("--sizes", default="1000,100000,1000000", help="Anzahl Transaktionen, kommagetrennt")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--mongo-uri")
+    parser.add_argument("--mongo-db", default="klassenkassa_bench")
+    parser.add_argument("--spawn-mongod", action="store_true")
+    parser.add_argument("--out", help="Ergebnis als JSON")
+    parser.add_argument("--baseline", help="JSON eines früheren Laufs zum Vergleich")
+    parser.add_argument("--metric", choices=["p50_ms", "p95_ms", "p99_ms", "mean_ms"], default="p50_ms")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="erlaubte relative Verschlechterung")
+    parser.add_argument("--min-ms", type=float, default=0.05, help="kleinere absolute Unterschiede zählen nicht")
+    args = parser.parse_args()
+
+    adapters = [a.strip() for a in args.adapters.split(",") if a.strip()]
+    unknown = set(adapters) - set(ADAPTERS)
+    if unknown:
+        parser.error(f"unbekannte Adapter: {', '.join(sorted(unknown))}")
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+
+    os.environ["MONGO_DB"] = args.mongo_db
+    with contextlib.ExitStack() as stack:
+        mongo_uri = stack.enter_context(_spawned_mongod()) if args.spawn_mongod else args.mongo_uri
+        if mongo_uri:
+            os.environ["MONGO_URI"] = mongo_uri
+        current = run(adapters, sizes, args.iterations, args.warmup, mongo_uri, args.mongo_db)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(current, json.load(f), args.metric, args.tolerance, args.min_ms)
+        for line in regressions:
+            print("REGRESSION", line)
+        if regressions:
+            raise SystemExit(1)
+        print(f"keine Verschlechterung gegenüber {args.baseline} ({args.metric}, Toleranz {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Kosten pro Zeile für die Antwort von GET /transactions: alter Weg (Dokument -> Transaction
+-> TxOut -> jsonable_encoder -> json) gegen den Projektionsweg (Dokument -> Antwortzeile ->
+orjson bzw. json). Braucht keine Datenbank, die Dokumente werden erzeugt:
+
+    PYTHONPATH=src python benchmarks/bench_serialize.py --rows 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+
+from myapp.adapters.db_mongo import _tx_doc, _tx_row, _tx_to_model
+from myapp.backend import api
+
+
+def _docs(n: int) -> List[Dict[str, Any]]:
+    start = datetime(2025, 1, 1, 8, 0)
+    return [
+        _tx_doc(
+            i + 1,
+            "einzahlung" if i % 3 else "ausgabe",
+            float(i % 50) + 0.5,
+            f"Beitrag {i}",
+            start + timedelta(minutes=i),
+            "Ausflug" if i % 2 else "Material",
+            f"Schüler {i % 25}",
+            date(2025, 1, 1) + timedelta(days=i % 365),
+        )
+        for i in range(n)
+    ]
+
+
+def _legacy(docs: List[Dict[str, Any]]) -> bytes:
+    out = [api._tx_out(_tx_to_model(d)) for d in docs]
+    return json.dumps(jsonable_encoder(out), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _rows_json(docs: List[Dict[str, Any]]) -> bytes:
+    return json.dumps([_tx_row(d) for d in docs], ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _rows_fast(docs: List[Dict[str, Any]]) -> bytes:
+    body: bytes = api._json_bytes([_tx_row(d) for d in docs])
+    return body
+
+
+def _measure(fn: Callable[[List[Dict[str, Any]]], bytes], docs: List[Dict[str, Any]], repeat: int) -> Dict[str, float]:
+    best = float("inf")
+    size = 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        size = len(fn(docs))
+        best = min(best, time.perf_counter() - t0)
+    return {"total_ms": round(best * 1000, 2), "us_per_row": round(best / len(docs) * 1e6, 3), "bytes": size}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    docs = _docs(args.rows)
+    if _legacy(docs[:50]) != _rows_fast(docs[:50]):
+        raise SystemExit("Ausgabe der beiden Wege unterscheidet sich")
+
+    results = {
+        "rows": args.rows,
+        "orjson": importlib.util.find_spec("orjson") is not None,
+        "legacy_models": _measure(_legacy, docs, args.repeat),
+        "rows_json": _measure(_rows_json, docs, args.repeat),
+        "rows_fast": _measure(_rows_fast, docs, args.repeat),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
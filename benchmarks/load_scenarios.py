@@ -0,0 +1,271 @@
+"""
+Lastszenarien gegen das Backend (myapp.backend.api:app), Ende-zu-Ende über HTTP.
+
+Szenarien (--scenario, mehrfach möglich; Standard: alle):
+- dashboard-storm: viele Clients laden gleichzeitig die Seite (GET /dashboard), ein Schreiber
+  invalidiert dazwischen den Cache – z. B. Stundenbeginn, alle öffnen die Klassenkassa
+- collection-day: Sammeltag, viele Einzahlungen gleichzeitig, dazu Kontostand und Liste
+- export-during-writes: Komplettexport (NDJSON) läuft, während gebucht und gelesen wird
+
+Ziel: in-process über httpx.ASGITransport (Standard, --adapter memory|mongo|mongo-async),
+gegen einen laufenden Server (--url) oder gegen einen dafür gestarteten uvicorn
+(--spawn-uvicorn [--workers N]). Vor den Szenarien werden --seed Transaktionen über
+POST /transactions/bulk angelegt. Ausgabe je Szenario und Endpunkt: Requests, RPS,
+p50/p95/p99 und Fehlerquote; --out schreibt alles als JSON.
+
+    PYTHONPATH=src python benchmarks/load_scenarios.py --duration 10
+    PYTHONPATH=src python benchmarks/load_scenarios.py --spawn-uvicorn --workers 4 --scenario collection-day
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+
+from seed_data import STUDENTS, seed_row
+
+# (Methode, Pfad, Body) je Iteration eines virtuellen Nutzers
+Request = Tuple[str, str, Optional[Dict[str, Any]]]
+# (Endpunkt-Bezeichnung, Anzahl virtueller Nutzer, Request je Iteration)
+UserKind = Tuple[str, int, Callable[[int], Request]]
+
+
+
+def _deposit(i: int) -> Request:
+    body = {"type": "einzahlung", "amount": float(i % 20 + 1), "category": "Sammeltag", "student": f"Schüler {i % STUDENTS}"}
+    return "POST", "/transactions", body
+
+
+SCENARIOS: Dict[str, List[UserKind]] = {
+    "dashboard-storm": [
+        ("GET /dashboard", 50, lambda i: ("GET", "/dashboard", None)),
+        ("POST /transactions", 1, _deposit),
+    ],
+    "collection-day": [
+        ("POST /transactions", 40, _deposit),
+        ("GET /balance", 5, lambda i: ("GET", "/balance", None)),
+        ("GET /transactions", 5, lambda i: ("GET", "/transactions?limit=200&order=desc", None)),
+    ],
+    "export-during-writes": [
+        ("GET /transactions/export", 2, lambda i: ("GET", "/transactions/export?format=ndjson", None)),
+        ("POST /transactions", 10, _deposit),
+        ("GET /dashboard", 5, lambda i: ("GET", "/dashboard", None)),
+    ],
+}
+
+
+def _seed_ndjson(start: int, n: int) -> str:
+    lines = []
+    for i in range(start, start + n):
+        row = seed_row(i)
+        del row["timestamp"]  # TxIn kennt keinen Zeitstempel, das Backend setzt ihn
+        lines.append(json.dumps({**row, "date": row["date"].isoformat()}))
+    return "\n".join(lines)
+
+
+async def _seed(client: httpx.AsyncClient, n: int, chunk: int = 5000) -> None:
+    for start in range(0, n, chunk):
+        size = min(chunk, n - start)
+        r = await client.post(
+            "/transactions/bulk",
+            content=_seed_ndjson(start, size),
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+        r.raise_for_status()
+        result = r.json()
+        if result["failed"] or result["inserted"] != size:
+            # Zeilennummern der Antwort zählen je Block, gemeldet wird die Zeile im ganzen Bestand
+            errors = [{**e, "line": start + int(e["line"])} for e in result["errors"][:3]]
+            raise SystemExit(f"Befüllen fehlgeschlagen ({result['inserted']} von {size} ab Zeile {start + 1}): {errors}")
+
+
+def _percentile(sorted_ms: List[float], p: float) -> float:
+    return sorted_ms[min(len(sorted_ms) - 1, round(p / 100 * (len(sorted_ms) - 1)))]
+
+
+def _summary(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    latencies.sort()
+    total = len(latencies)
+    out: Dict[str, Any] = {
+        "requests": total,
+        "errors": errors,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "rps": round(total / elapsed, 1),
+    }
+    for p in (50, 95, 99):
+        out[f"p{p}_ms"] = round(_percentile(latencies, p), 2) if latencies else None
+    return out
+
+
+async def run_scenario(client: httpx.AsyncClient, users: List[UserKind], duration: float, scale: float) -> Dict[str, Any]:
+    latencies: Dict[str, List[float]] = {label: [] for label, _, _ in users}
+    errors: Dict[str, int] = {label: 0 for label, _, _ in users}
+    samples: Dict[str, List[str]] = {label: [] for label, _, _ in users}
+    deadline = time.perf_counter() + duration
+    counter = iter(range(10**9))
+
+    async def user(label: str, make: Callable[[int], Request]) -> None:
+        while time.perf_counter() < deadline:
+            method, path, body = make(next(counter))
+            t0 = time.perf_counter()
+            failure = None
+            try:
+                r = await client.request(method, path, json=body)
+                if r.status_code >= 400:
+                    failure = f"{r.status_code} {r.text[:200]}"
+            except httpx.HTTPError as e:
+                failure = f"{type(e).__name__}: {e}"
+            latencies[label].append((time.perf_counter() - t0) * 1000)
+            if failure is not None:
+                errors[label] += 1
+                if len(samples[label]) < 3:
+                    samples[label].append(failure)
+            # in-process teilen sich Last und App eine Event-Loop: Antworten aus dem Cache suspendieren
+            # nie, ohne Abgabe würden die lesenden Nutzer alle anderen Tasks aushungern
+            await asyncio.sleep(0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user(label, make) for label, count, make in users for _ in range(max(1, round(count * scale)))))
+    elapsed = time.perf_counter() - started
+
+    endpoints = {label: {**_summary(latencies[label], errors[label], elapsed), "error_samples": samples[label]} for label in latencies}
+    all_latencies = [x for values in latencies.values() for x in values]
+    return {
+        "users": {label: max(1, round(count * scale)) for label, count, _ in users},
+        "duration_s": round(elapsed, 2),
+        "total": _summary(all_latencies, sum(errors.values()), elapsed),
+        "endpoints": endpoints,
+    }
+
+
+@contextlib.asynccontextmanager
+async def _in_process(adapter_name: str) -> AsyncIterator[httpx.AsyncClient]:
+    from myapp.adapters import db_memory
+    from myapp.backend import api
+
+    adapter: Any = db_memory
+    if adapter_name == "mongo":
+        from myapp.adapters import db_mongo
+
+        adapter = db_mongo
+    elif adapter_name == "mongo-async":
+        from myapp.adapters import db_mongo_async
+
+        adapter = db_mongo_async
+    else:
+        db_memory._reset_storage()
+
+    api.db = adapter
+    api.cache.clear()
+    if adapter is db_memory:
+        db_memory.connect(seed=False)
+    else:
+        await api._call(adapter.connect)
+    try:
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://load", timeout=60) as client:
+            yield client
+    finally:
+        await api._call(adapter.disconnect)
+
+
+@contextlib.contextmanager
+def _spawned_uvicorn(workers: int, adapter_name: str) -> Iterator[str]:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    env = {
+        **os.environ,
+        "USE_MONGO": "0" if adapter_name == "memory" else "1",
+        "MONGO_ASYNC": "1" if adapter_name == "mongo-async" else "0",
+    }
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "myapp.backend.api:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(100):
+            try:
+                if httpx.get(f"{url}/health/db", timeout=1).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.2)
+        else:
+            raise SystemExit("uvicorn ist nicht erreichbar geworden")
+        yield url
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+async def _run(args: argparse.Namespace, url: Optional[str]) -> Dict[str, Any]:
+    async with contextlib.AsyncExitStack() as stack:
+        if url is None:
+            client = await stack.enter_async_context(_in_process(args.adapter))
+        else:
+            limits = httpx.Limits(max_connections=None, max_keepalive_connections=200)
+            client = await stack.enter_async_context(httpx.AsyncClient(base_url=url, timeout=60, limits=limits))
+
+        await _seed(client, args.seed)
+        results: Dict[str, Any] = {}
+        for name in args.scenarios:
+            results[name] = await run_scenario(client, SCENARIOS[name], args.duration, args.scale)
+            _print(name, results[name])
+        return results
+
+
+def _print(name: str, result: Dict[str, Any]) -> None:
+    print(f"\n{name} ({result['duration_s']} s)")
+    print(f"  {'Endpunkt':28} {'Nutzer':>6} {'Requests':>9} {'RPS':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'Fehler':>7}")
+    for label, r in [*result["endpoints"].items(), ("gesamt", result["total"])]:
+        users = result["users"].get(label, sum(result["users"].values()))
+        print(
+            f"  {label:28} {users:>6} {r['requests']:>9} {r['rps']:>8} {r['p50_ms']!s:>8} {r['p95_ms']!s:>8} "
+            f"{r['p99_ms']!s:>8} {r['error_rate']:>7.1%}"
+        )
+        for sample in r.get("error_samples", []):
+            print(f"    ! {sample}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", action="append", dest="scenarios", choices=sorted(SCENARIOS))
+    parser.add_argument("--duration", type=float, default=10.0, help="Sekunden je Szenario")
+    parser.add_argument("--scale", type=float, default=1.0, help="Faktor auf die Zahl virtueller Nutzer")
+    parser.add_argument("--seed", type=int, default=10_000, help="Transaktionen im Bestand vor dem ersten Szenario")
+    parser.add_argument("--adapter", choices=["memory", "mongo", "mongo-async"], default="memory")
+    parser.add_argument("--url", help="laufendes Backend statt in-process")
+    parser.add_argument("--spawn-uvicorn", action="store_true", help="uvicorn auf einem freien Port starten")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn-Worker (mit --spawn-uvicorn)")
+    parser.add_argument("--out", help="Ergebnis als JSON")
+    args = parser.parse_args()
+    args.scenarios = args.scenarios or list(SCENARIOS)
+    if args.spawn_uvicorn and args.workers > 1 and args.adapter == "memory":
+        print("Hinweis: mit memory hat jeder Worker einen eigenen Datenbestand", file=sys.stderr)
+
+    with contextlib.ExitStack() as stack:
+        url = stack.enter_context(_spawned_uvicorn(args.workers, args.adapter)) if args.spawn_uvicorn else args.url
+        results = asyncio.run(_run(args, url))
+
+    if args.out:
+        meta = {"target": url or f"in-process ({args.adapter})", "workers": args.workers if args.spawn_uvicorn else None,
+                "seed": args.seed, "duration_s": args.duration, "scale": args.scale}
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "scenarios": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
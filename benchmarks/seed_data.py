@@ -0,0 +1,32 @@
+"""
+Gemeinsamer Testbestand für bench_dbport.py und load_scenarios.py.
+
+Die Adapter lehnen Ausgaben ab, die den Kontostand ins Minus bringen würden. Daher ist in jeder
+Vierergruppe erst die letzte Zeile eine Ausgabe; die drei Einzahlungen davor sind zusammen immer
+größer als sie. Der Kontostand bleibt so nach jeder Zeile gedeckt, auch bei einem leeren Bestand
+und bei Blöcken, die an einem Vielfachen von 4 beginnen.
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from typing import Any, Dict
+
+STUDENTS = 25
+START_DAY = date(2024, 1, 1)
+# begrenzter Wortschatz wie in echten Beschreibungen (jede eindeutige Zahl wäre ein neues Wort im Suchindex)
+TOPICS = ("Klassenfahrt", "Kopien", "Elternspende", "Schulfest", "Wandertag", "Bastelmaterial", "Theater", "Buffet")
+CATEGORIES = ("Ausflug", "Material", "Spende", "Buffet")
+
+
+def seed_row(i: int) -> Dict[str, Any]:
+    """Zeile i des Bestands mit den Feldnamen von TxIn (type, date)."""
+    return {
+        "type": "ausgabe" if i % 4 == 3 else "einzahlung",
+        "amount": float(i % 20) + 1.0,
+        "description": f"{TOPICS[i % len(TOPICS)]} Rate {i % 12 + 1}",
+        "timestamp": datetime(2024, 1, 1, 8, 0) + timedelta(minutes=i),
+        "category": CATEGORIES[i % len(CATEGORIES)],
+        "student": f"Schüler {i % STUDENTS}",
+        "date": START_DAY + timedelta(days=i % 730),
+    }
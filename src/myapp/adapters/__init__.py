@@ -1,15 +1,30 @@
 from __future__ import annotations
 
 import os
+from types import ModuleType
 from typing import Any, cast
 
 USE_MONGO = os.getenv("USE_MONGO", "1").lower() in {"1", "true", "yes"}
+# async Mongo-Adapter für die (async) FastAPI-Routen
+MONGO_ASYNC = os.getenv("MONGO_ASYNC", "0").lower() in {"1", "true", "yes"}
+
+_db: ModuleType
+_sync_db: ModuleType
 
 if USE_MONGO:
-    from . import db_mongo as _db  # falls deine Datei anders heißt, hier anpassen
+    from . import db_mongo as _sync_db  # falls deine Datei anders heißt, hier anpassen
+
+    if MONGO_ASYNC:
+        from . import db_mongo_async as _db
+    else:
+        _db = _sync_db
 else:
-    from . import db_memory as _db
+    from . import db_memory as _sync_db
+
+    _db = _sync_db
 
 db = cast(Any, _db)
+# blockierende Variante desselben Backends, z. B. für Wartungsbefehle
+sync_db = cast(Any, _sync_db)
 
-__all__ = ["db"]
+__all__ = ["db", "sync_db"]
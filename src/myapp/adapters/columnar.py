@@ -0,0 +1,281 @@
+"""
+Spaltenorientierter Speicher für das In-Memory-Ledger (MEMORY_ENGINE=columnar).
+
+Statt einer Liste von Transaction-Objekten liegen die Felder in typisierten Arrays
+(array-Modul); Kategorie und Schüler werden als Wörterbuch-Codes gespeichert.
+Ist NumPy installiert, laufen Summen, Filter und Gruppierungen vektorisiert über
+Views auf diese Arrays, sonst als einfache Schleifen.
+"""
+
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date as dt_date, datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+
+from myapp.adapters.db_memory import Transaction
+
+try:
+    import numpy as np
+except ImportError:  # NumPy ist optional
+    np = None  # type: ignore[assignment]
+
+TYPES = ("einzahlung", "ausgabe")
+
+# ab diesem Anteil gelöschter Zeilen werden die Spalten kompaktiert
+COMPACT_RATIO = 0.25
+
+# query filtert blockweise (erster Block so groß, danach verdoppelt) und hört auf, sobald `limit`
+# Treffer da sind – eine Seite kostet so O(Seite) statt O(Ledger)
+QUERY_CHUNK = 4096
+MAX_QUERY_CHUNK = 1 << 20
+
+# Zeitstempel als ganze Mikrosekunden seit EPOCH (naiv, wie Transaction.timestamp); float-Sekunden
+# verlieren bei heutigen Daten Mikrosekunden
+_EPOCH = datetime(1970, 1, 1)
+_MICRO = timedelta(microseconds=1)
+
+
+def _ts_to_us(ts: datetime) -> int:
+    if ts.tzinfo is not None:
+        ts = ts.astimezone().replace(tzinfo=None)  # wie bisher: lokale Zeit
+    return (ts - _EPOCH) // _MICRO
+
+
+def _us_to_ts(us: int) -> datetime:
+    return _EPOCH + us * _MICRO
+
+
+class StringDictionary:
+    """Wörterbuch-Kodierung: jeder unterschiedliche String wird einmal gespeichert, Zeilen halten nur den Code."""
+
+    def __init__(self) -> None:
+        self.values: List[str] = [""]
+        self._codes: Dict[str, int] = {"": 0}
+
+    def encode(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self._codes[value] = code
+        return code
+
+    def lookup(self, value: str) -> Optional[int]:
+        return self._codes.get(value)
+
+
+class ColumnarLedger:
+    def __init__(self) -> None:
+        self._ids = array("q")
+        self._types = array("b")  # Index in TYPES
+        self._amounts = array("d")
+        self._days = array("l")  # date.toordinal(), 0 = kein Datum
+        self._timestamps = array("q")  # Mikrosekunden, siehe _ts_to_us
+        self._categories = array("l")
+        self._students = array("l")
+        self._student_ids = array("q")
+        self._alive = array("b")
+        self._descriptions: List[str] = []
+
+        self._category_dict = StringDictionary()
+        self._student_dict = StringDictionary()
+        self._dead = 0
+
+    # ---------- Zeilen ----------
+    def __len__(self) -> int:
+        return len(self._ids) - self._dead
+
+    def __iter__(self) -> Iterator[Transaction]:
+        for i in range(len(self._ids)):
+            if self._alive[i]:
+                yield self._row(i)
+
+    def _row(self, i: int) -> Transaction:
+        day = self._days[i]
+        return Transaction(
+            id=self._ids[i],
+            type=TYPES[self._types[i]],
+            amount=self._amounts[i],
+            description=self._descriptions[i],
+            timestamp=_us_to_ts(self._timestamps[i]),
+            category=self._category_dict.values[self._categories[i]],
+            student=self._student_dict.values[self._students[i]],
+            date=dt_date.fromordinal(day) if day else None,
+            student_id=self._student_ids[i],
+        )
+
+    def append(self, tx: Transaction) -> None:
+        # IDs kommen aufsteigend -> _ids bleibt sortiert und ist per Bisektion durchsuchbar
+        self._ids.append(tx.id)
+        self._types.append(TYPES.index(tx.type))
+        self._amounts.append(tx.amount)
+        self._days.append(tx.date.toordinal() if tx.date else 0)
+        self._timestamps.append(_ts_to_us(tx.timestamp))
+        self._categories.append(self._category_dict.encode(tx.category))
+        self._students.append(self._student_dict.encode(tx.student))
+        self._student_ids.append(tx.student_id)
+        self._alive.append(1)
+        self._descriptions.append(tx.description)
+
+    def _index_of(self, tx_id: int) -> Optional[int]:
+        i = bisect_left(self._ids, tx_id)
+        if i < len(self._ids) and self._ids[i] == tx_id and self._alive[i]:
+            return i
+        return None
+
+    def get(self, tx_id: int) -> Optional[Transaction]:
+        i = self._index_of(int(tx_id))
+        return self._row(i) if i is not None else None
+
+    def remove(self, tx_id: int) -> Optional[Transaction]:
+        i = self._index_of(int(tx_id))
+        if i is None:
+            return None
+        tx = self._row(i)
+        self._alive[i] = 0
+        self._dead += 1
+        if self._dead > COMPACT_RATIO * len(self._ids):
+            self._compact()
+        return tx
+
+    def _compact(self) -> None:
+        keep = [i for i in range(len(self._ids)) if self._alive[i]]
+        for name in ("_ids", "_types", "_amounts", "_days", "_timestamps", "_categories", "_students", "_student_ids"):
+            col = getattr(self, name)
+            setattr(self, name, array(col.typecode, (col[i] for i in keep)))
+        self._alive = array("b", [1]) * len(keep)
+        self._descriptions = [self._descriptions[i] for i in keep]
+        self._dead = 0
+
+    # ---------- Auswertungen ----------
+    def total(self) -> float:
+        if np is not None:
+            amounts = np.frombuffer(self._amounts, dtype=np.float64)
+            signs = 1 - 2 * np.frombuffer(self._types, dtype=np.int8).astype(np.float64)
+            alive = np.frombuffer(self._alive, dtype=np.int8)
+            return float(np.dot(amounts * signs, alive))
+        return sum(
+            (-a if t else a) for a, t, alive in zip(self._amounts, self._types, self._alive) if alive
+        )
+
+    def daily_totals(self) -> Dict[dt_date, List[float]]:
+        """Group-by Datum: {Tag: [Einnahmen, Ausgaben]} (Zeilen ohne Datum zählen zum Tag des Zeitstempels)."""
+        out: Dict[dt_date, List[float]] = {}
+        if np is not None and len(self._ids):
+            days = np.frombuffer(self._days, dtype=_np_dtype(self._days)).copy()
+            missing = np.flatnonzero(days == 0)
+            for j in missing.tolist():
+                days[j] = _us_to_ts(self._timestamps[j]).date().toordinal()
+            alive = np.frombuffer(self._alive, dtype=np.int8).astype(bool)
+            types = np.frombuffer(self._types, dtype=np.int8)[alive]
+            amounts = np.frombuffer(self._amounts, dtype=np.float64)[alive]
+            uniq, inverse = np.unique(days[alive], return_inverse=True)
+            income = np.bincount(inverse, weights=np.where(types == 0, amounts, 0.0), minlength=len(uniq))
+            expense = np.bincount(inverse, weights=np.where(types == 1, amounts, 0.0), minlength=len(uniq))
+            for day, inc, exp in zip(uniq.tolist(), income.tolist(), expense.tolist()):
+                out[dt_date.fromordinal(day)] = [inc, exp]
+            return out
+
+        for i in range(len(self._ids)):
+            if not self._alive[i]:
+                continue
+            ordinal = self._days[i] or _us_to_ts(self._timestamps[i]).date().toordinal()
+            bucket = out.setdefault(dt_date.fromordinal(ordinal), [0.0, 0.0])
+            bucket[self._types[i]] += self._amounts[i]
+        return out
+
+    def assign_student(self, name: str, student_id: int) -> List[Transaction]:
+        code = self._student_dict.lookup(name)
+        if code is None:
+            return []
+        out: List[Transaction] = []
+        for i in range(len(self._ids)):
+            if self._alive[i] and self._students[i] == code and not self._student_ids[i]:
+                self._student_ids[i] = student_id
+                out.append(self._row(i))
+        return out
+
+    def query(
+        self,
+        after_id: Optional[int] = None,
+        limit: int = 100,
+        type_: Optional[str] = None,
+        category: Optional[str] = None,
+        student: Optional[str] = None,
+        date_from: Optional[dt_date] = None,
+        date_to: Optional[dt_date] = None,
+        descending: bool = False,
+    ) -> List[Transaction]:
+        # Filterwerte in Codes übersetzen; ein unbekannter Wert kann keine Treffer haben
+        conds: Dict[str, Any] = {}
+        if type_:
+            if type_ not in TYPES:
+                return []
+            conds["_types"] = TYPES.index(type_)
+        for name, value, dictionary in (
+            ("_categories", category, self._category_dict),
+            ("_students", student, self._student_dict),
+        ):
+            if value:
+                code = dictionary.lookup(value)
+                if code is None:
+                    return []
+                conds[name] = code
+        lo = date_from.toordinal() if date_from else None
+        hi = date_to.toordinal() if date_to else None
+
+        if descending:
+            start, stop = 0, len(self._ids) if after_id is None else bisect_left(self._ids, after_id)
+        else:
+            start, stop = (0 if after_id is None else bisect_right(self._ids, after_id)), len(self._ids)
+
+        if np is not None:
+            return [self._row(i) for i in self._match_numpy(start, stop, conds, lo, hi, limit, descending)]
+
+        rng = range(stop - 1, start - 1, -1) if descending else range(start, stop)
+        out: List[Transaction] = []
+        for i in rng:
+            if not self._alive[i] or any(getattr(self, name)[i] != code for name, code in conds.items()):
+                continue
+            day = self._days[i]
+            if (lo is not None and (not day or day < lo)) or (hi is not None and (not day or day > hi)):
+                continue
+            out.append(self._row(i))
+            if len(out) >= limit:
+                break
+        return out
+
+    def _match_numpy(
+        self, start: int, stop: int, conds: Dict[str, Any], lo: Optional[int], hi: Optional[int], limit: int, descending: bool
+    ) -> List[int]:
+        """Zeilenindizes der ersten `limit` Treffer in [start, stop), blockweise in Sortierrichtung."""
+        out: List[int] = []
+        chunk = QUERY_CHUNK
+        pos = stop if descending else start
+        while len(out) < limit and (pos > start if descending else pos < stop):
+            a, b = (max(start, pos - chunk), pos) if descending else (pos, min(stop, pos + chunk))
+            hits = self._mask(a, b, conds, lo, hi)
+            out.extend((hits[::-1] if descending else hits)[: limit - len(out)].tolist())
+            pos = a if descending else b
+            chunk = min(chunk * 2, MAX_QUERY_CHUNK)
+        return out
+
+    def _mask(self, start: int, stop: int, conds: Dict[str, Any], lo: Optional[int], hi: Optional[int]) -> Any:
+        mask = np.frombuffer(self._alive, dtype=np.int8)[start:stop].astype(bool)
+        for name, code in conds.items():
+            col = getattr(self, name)
+            mask &= np.frombuffer(col, dtype=_np_dtype(col))[start:stop] == code
+        if lo is not None or hi is not None:
+            days = np.frombuffer(self._days, dtype=_np_dtype(self._days))[start:stop]
+            mask &= days != 0
+            if lo is not None:
+                mask &= days >= lo
+            if hi is not None:
+                mask &= days <= hi
+        return np.flatnonzero(mask) + start
+
+
+def _np_dtype(col: "array[Any]") -> Any:
+    return np.dtype(f"i{col.itemsize}")
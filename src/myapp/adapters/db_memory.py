@@ -1,6 +1,30 @@
+import functools
+import os
+import threading
+from bisect import bisect_left, bisect_right
 from dataclasses import dataclass
-from datetime import datetime, date as dt_date
-from typing import List, Optional
+from datetime import datetime, date as dt_date, timedelta
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Protocol, Sequence, Set, Tuple, TypeVar, cast
+
+from myapp.adapters.journal import Journal
+from myapp.adapters.search import SearchIndex, doc_tokens, parse_query
+from myapp.tenancy import DEFAULT_CLASS, current_class
+
+# "list": Liste von Transaction-Objekten, "columnar": typisierte Spalten (siehe columnar.py)
+MEMORY_ENGINE = os.getenv("MEMORY_ENGINE", "list").lower()
+
+# gesetzt: Datenbestand überlebt Neustarts (Journal + Snapshots in diesem Verzeichnis)
+MEMORY_DATA_DIR = os.getenv("MEMORY_DATA_DIR", "")
+MEMORY_FSYNC_EVERY = int(os.getenv("MEMORY_FSYNC_EVERY", "32"))
+MEMORY_FSYNC_INTERVAL = float(os.getenv("MEMORY_FSYNC_INTERVAL", "0.05"))
+MEMORY_SNAPSHOT_EVERY = int(os.getenv("MEMORY_SNAPSHOT_EVERY", "10000"))
+
+MAX_SAVING_GOALS = 3
+
+OVERDRAFT_MSG = "Diese Transaktion würde den Kontostand ins Minus bringen."
+
+# der Kontostand wird inkrementell geführt; float-Rundung unter einem Cent ist keine Abweichung
+BALANCE_DRIFT_TOLERANCE = 0.005
 
 # ---------- Models ----------
 @dataclass
@@ -15,6 +39,8 @@ class Transaction:
     category: str = ""
     student: str = ""
     date: Optional[dt_date] = None
+    # students-id des Schülers, der beim Buchen so hieß; 0 = keinem Schüler zugeordnet
+    student_id: int = 0
 
 
 @dataclass
@@ -22,10 +48,183 @@ class Balance:
     current_total: float = 0.0
 
 
+# ---------- Ledger-Speicher ----------
+class Ledger(Protocol):
+    """Was db_memory vom Transaktionsspeicher braucht; Zeilen sind immer nach id sortiert."""
+
+    def __len__(self) -> int: ...
+    def __iter__(self) -> Iterator[Transaction]: ...
+    def append(self, tx: Transaction) -> None: ...
+    def get(self, tx_id: int) -> Optional[Transaction]: ...
+    def remove(self, tx_id: int) -> Optional[Transaction]: ...
+    def total(self) -> float: ...
+    def daily_totals(self) -> Dict[dt_date, List[float]]: ...
+    def assign_student(self, name: str, student_id: int) -> List[Transaction]: ...
+
+    def query(
+        self,
+        after_id: Optional[int] = None,
+        limit: int = 100,
+        type_: Optional[str] = None,
+        category: Optional[str] = None,
+        student: Optional[str] = None,
+        date_from: Optional[dt_date] = None,
+        date_to: Optional[dt_date] = None,
+        descending: bool = False,
+    ) -> List[Transaction]: ...
+
+
+class ListLedger:
+    def __init__(self) -> None:
+        self._rows: List[Transaction] = []
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __iter__(self) -> Iterator[Transaction]:
+        return iter(list(self._rows))
+
+    def append(self, tx: Transaction) -> None:
+        self._rows.append(tx)
+
+    def _index_of(self, tx_id: int) -> Optional[int]:
+        i = bisect_left(self._rows, tx_id, key=lambda t: t.id)
+        if i < len(self._rows) and self._rows[i].id == tx_id:
+            return i
+        return None
+
+    def get(self, tx_id: int) -> Optional[Transaction]:
+        i = self._index_of(int(tx_id))
+        return self._rows[i] if i is not None else None
+
+    def remove(self, tx_id: int) -> Optional[Transaction]:
+        i = self._index_of(int(tx_id))
+        return self._rows.pop(i) if i is not None else None
+
+    def total(self) -> float:
+        return _calculate_balance(self._rows)
+
+    def assign_student(self, name: str, student_id: int) -> List[Transaction]:
+        """Ordnet die noch keinem Schüler zugeordneten Transaktionen mit diesem Namen zu; gibt sie zurück."""
+        out = [t for t in self._rows if t.student == name and not t.student_id]
+        for t in out:
+            t.student_id = student_id
+        return out
+
+    def daily_totals(self) -> Dict[dt_date, List[float]]:
+        out: Dict[dt_date, List[float]] = {}
+        for t in self._rows:
+            out.setdefault(_tx_day(t), [0.0, 0.0])[0 if t.type == "einzahlung" else 1] += t.amount
+        return out
+
+    def query(
+        self,
+        after_id: Optional[int] = None,
+        limit: int = 100,
+        type_: Optional[str] = None,
+        category: Optional[str] = None,
+        student: Optional[str] = None,
+        date_from: Optional[dt_date] = None,
+        date_to: Optional[dt_date] = None,
+        descending: bool = False,
+    ) -> List[Transaction]:
+        rows = self._rows
+        # IDs werden aufsteigend vergeben -> Startposition per Bisektion
+        if descending:
+            end = len(rows) if after_id is None else bisect_left(rows, after_id, key=lambda t: t.id)
+            candidates: Iterable[Transaction] = (rows[i] for i in range(end - 1, -1, -1))
+        else:
+            start = 0 if after_id is None else bisect_right(rows, after_id, key=lambda t: t.id)
+            candidates = (rows[i] for i in range(start, len(rows)))
+
+        out: List[Transaction] = []
+        for t in candidates:
+            if type_ and t.type != type_:
+                continue
+            if category and t.category != category:
+                continue
+            if student and t.student != student:
+                continue
+            if date_from and (t.date is None or t.date < date_from):
+                continue
+            if date_to and (t.date is None or t.date > date_to):
+                continue
+            out.append(t)
+            if len(out) >= limit:
+                break
+        return out
+
+
+def _new_ledger() -> Ledger:
+    if MEMORY_ENGINE == "columnar":
+        from myapp.adapters.columnar import ColumnarLedger  # importiert Transaction von hier
+
+        return ColumnarLedger()
+    return ListLedger()
+
+
 # ---------- interne Storage ----------
-_transactions: List[Transaction] = []
-_balance = Balance()
+class _ClassData:
+    """Bestand einer Klasse; Klassen teilen sich nur die ID-Sequenzen und das Journal."""
+
+    def __init__(self) -> None:
+        self.ledger: Ledger = _new_ledger()
+        self.balance = Balance()
+        # Tages-Rollups: Datum -> [Einnahmen, Ausgaben]
+        self.daily: Dict[dt_date, List[float]] = {}
+        # invertierter Index für search_transaction_rows
+        self.search_index = SearchIndex()
+        # Schüler: id -> {"id", "name", "created_at"}
+        self.students: Dict[int, Dict[str, Any]] = {}
+        # Sparziele: id -> {"id", "name", "amount", "created_at"}
+        self.goals: Dict[int, Dict[str, Any]] = {}
+        # Summen pro Schüler (über Transaction.student_id verknüpft): id -> [Einnahmen, Ausgaben, Anzahl]
+        self.student_totals: Dict[int, List[float]] = {}
+
+
+# Klassen-ID -> Bestand; eine Klasse entsteht mit ihrem ersten Schreibzugriff
+_classes: Dict[str, _ClassData] = {}
 _next_id: int = 1
+_next_student_id: int = 1
+_next_goal_id: int = 1
+_journal: Optional[Journal] = None
+
+# FastAPI ruft die sync Adapter-Funktionen parallel im Threadpool auf. Ohne Sperre vergeben zwei
+# Schreiber dieselbe id, und beim columnar-Ledger scheitert array.append (BufferError), solange ein
+# Leser NumPy-Views auf die Spalten hält – die Spalten wären danach verschieden lang.
+# RLock, weil Schreiber über _maybe_snapshot selbst snapshot() aufrufen.
+_lock = threading.RLock()
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+
+def _locked(func: _F) -> _F:
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        with _lock:
+            return func(*args, **kwargs)
+
+    return cast(_F, wrapper)
+
+
+def _data(class_id: Optional[str] = None, create: bool = False) -> _ClassData:
+    """
+    Bestand der Klasse des Aufrufs (myapp.tenancy.current_class).
+    Eine unbekannte Klasse gilt beim Lesen als leer; angelegt wird sie nur beim Schreiben (create=True),
+    sonst füllte jeder Lesezugriff auf eine beliebige /classes/{id}/ den Speicher und list_classes.
+    """
+    class_id = class_id or current_class.get()
+    data = _classes.get(class_id)
+    if data is None:
+        data = _ClassData()
+        if create:
+            _classes[class_id] = data
+    return data
+
+
+@_locked
+def list_classes() -> List[str]:
+    return sorted(_classes)
 
 
 # ---------- intern ----------
@@ -36,7 +235,7 @@ def _normalize_type(t: str) -> str:
     return t
 
 
-def _calculate_balance(transactions: List[Transaction]) -> float:
+def _calculate_balance(transactions: Iterable[Transaction]) -> float:
     total = 0.0
     for t in transactions:
         if t.type == "einzahlung":
@@ -46,48 +245,226 @@ def _calculate_balance(transactions: List[Transaction]) -> float:
     return total
 
 
-def _recalc_and_store_balance() -> None:
-    _balance.current_total = _calculate_balance(_transactions)
+def _signed_amount(t: Transaction) -> float:
+    return t.amount if t.type == "einzahlung" else -t.amount
+
+
+def _tx_day(t: Transaction) -> dt_date:
+    return t.date or t.timestamp.date()
+
+
+def _apply_rollup(d: _ClassData, t: Transaction, sign: int = 1) -> None:
+    col = 0 if t.type == "einzahlung" else 1
+    day = d.daily.setdefault(_tx_day(t), [0.0, 0.0])
+    day[col] += sign * t.amount
+    _add_student_total(d, t, sign)
+
 
+def _add_student_total(d: _ClassData, t: Transaction, sign: int = 1) -> None:
+    if t.student_id:
+        totals = d.student_totals.setdefault(t.student_id, [0.0, 0.0, 0])
+        totals[0 if t.type == "einzahlung" else 1] += sign * t.amount
+        totals[2] += sign
 
+
+def _index_args(t: Transaction) -> Tuple[int, Set[str], float, dt_date]:
+    return t.id, doc_tokens((t.description, t.category, t.student, t.type)), t.amount, _tx_day(t)
+
+
+def _student_ids(d: _ClassData) -> Dict[str, int]:
+    return {str(s["name"]): int(sid) for sid, s in d.students.items()}
+
+
+def _insert(d: _ClassData, txs: Sequence[Transaction]) -> None:
+    global _next_id
+    ids = _student_ids(d)
+    for tx in txs:
+        if tx.student and not tx.student_id:
+            # Journal-Einträge von vor student_id: Zuordnung wie beim ursprünglichen Buchen über den Namen
+            tx.student_id = ids.get(tx.student, 0)
+        d.ledger.append(tx)
+        _apply_rollup(d, tx)
+        d.search_index.add(*_index_args(tx))
+        _next_id = max(_next_id, tx.id + 1)
+    # inkrementell statt Neuberechnung über alle Transaktionen
+    d.balance.current_total += sum(_signed_amount(tx) for tx in txs)
+
+
+def _remove(d: _ClassData, tx_id: int) -> Optional[Transaction]:
+    tx = d.ledger.remove(tx_id)
+    if tx is not None:
+        d.balance.current_total -= _signed_amount(tx)
+        _apply_rollup(d, tx, sign=-1)
+        d.search_index.remove(*_index_args(tx))
+    return tx
+
+
+def _rebuild(d: _ClassData) -> None:
+    """Kontostand, Rollups, Schülersummen und Suchindex einer Klasse aus ihren Transaktionen."""
+    d.balance.current_total = d.ledger.total()
+    d.daily = d.ledger.daily_totals()
+    _rebuild_student_totals(d)
+    _rebuild_search_index(d)
+
+
+# ---------- Persistenz (nur mit MEMORY_DATA_DIR) ----------
+def _tx_record(t: Transaction, class_id: str) -> List[Any]:
+    return [t.id, t.type, t.amount, t.description, t.timestamp.isoformat(), t.category, t.student,
+            t.date.isoformat() if t.date else None, class_id, t.student_id]
+
+
+def _tx_from_record(r: List[Any]) -> Transaction:
+    return Transaction(
+        id=int(r[0]),
+        type=str(r[1]),
+        amount=float(r[2]),
+        description=str(r[3]),
+        timestamp=datetime.fromisoformat(r[4]),
+        category=str(r[5]),
+        student=str(r[6]),
+        date=dt_date.fromisoformat(r[7]) if r[7] else None,
+        student_id=int(r[9]) if len(r) > 9 else 0,
+    )
+
+
+def _record_class(r: List[Any]) -> str:
+    # Snapshots von vor den Klassen haben 8 Felder
+    return str(r[8]) if len(r) > 8 else DEFAULT_CLASS
+
+
+def _load_from_disk(journal: Journal) -> None:
+    """Snapshot laden, danach nur die Journal-Einträge seit dem Snapshot nachspielen."""
+    global _next_id, _next_student_id, _next_goal_id
+    header, rows = journal.read_snapshot()
+    for row in rows:
+        _data(_record_class(row), create=True).ledger.append(_tx_from_record(row))
+    _next_id = max(_next_id, int(header.get("next_id", 1)))
+    # Kopf ohne "classes": Snapshot von vor den Klassen, alles gehört zu DEFAULT_CLASS
+    classes = header.get("classes") or {DEFAULT_CLASS: {"students": header.get("students", []), "goals": header.get("goals", [])}}
+    for class_id, content in classes.items():
+        if not content.get("students") and not content.get("goals"):
+            continue
+        d = _data(class_id, create=True)
+        for student in content.get("students", []):
+            d.students[int(student["id"])] = student
+            # Snapshot von vor student_id: Transaktionen über den Namen zuordnen
+            d.ledger.assign_student(str(student["name"]), int(student["id"]))
+        for goal in content.get("goals", []):
+            d.goals[int(goal["id"])] = goal
+    _next_student_id = max(_next_student_id, int(header.get("next_student_id", 1)))
+    _next_goal_id = max(_next_goal_id, int(header.get("next_goal_id", 1)))
+
+    for record in journal.read_tail():
+        op = record.get("op")
+        d = _data(str(record.get("class_id", DEFAULT_CLASS)), create=True)
+        if op == "tx_create":
+            _insert(d, [_tx_from_record(record["tx"])])
+        elif op == "tx_bulk":
+            _insert(d, [_tx_from_record(r) for r in record["txs"]])
+        elif op == "tx_delete":
+            _remove(d, int(record["id"]))
+        elif op == "student_create":
+            _add_student(d, record["student"])
+        elif op == "student_delete":
+            _remove_student(d, int(record["id"]))
+        elif op == "goal_create":
+            _add_goal(d, record["goal"])
+        elif op == "goal_delete":
+            d.goals.pop(int(record["id"]), None)
+
+    for d in _classes.values():
+        _rebuild(d)
+
+
+def _journal_write(op: str, **data: Any) -> None:
+    if _journal is not None:
+        _journal.append(op, class_id=current_class.get(), **data)
+
+
+def _maybe_snapshot() -> None:
+    # erst nachdem die Operation angewendet ist, sonst fehlt sie im Snapshot
+    if _journal is not None and _journal.ops_since_snapshot >= MEMORY_SNAPSHOT_EVERY:
+        snapshot()
+
+
+@_locked
+def snapshot() -> None:
+    """Schreibt einen kompakten Snapshot und leert das Journal (ohne MEMORY_DATA_DIR: nichts zu tun)."""
+    if _journal is None:
+        return
+    header = {
+        "version": 2,
+        "next_id": _next_id,
+        "next_student_id": _next_student_id,
+        "next_goal_id": _next_goal_id,
+        "classes": {
+            class_id: {"students": list(d.students.values()), "goals": list(d.goals.values())}
+            for class_id, d in _classes.items()
+        },
+    }
+    rows = (_tx_record(t, class_id) for class_id, d in list(_classes.items()) for t in d.ledger)
+    _journal.write_snapshot(header, rows)
+
+
+@_locked
 def _reset_storage() -> None:
     """Reset für Test-Isolation / frische DB."""
-    global _transactions, _balance, _next_id
-    _transactions = []
-    _balance = Balance()
+    global _next_id, _journal, _next_student_id, _next_goal_id
+    if _journal is not None:
+        _journal.close()
+    _classes.clear()
     _next_id = 1
+    _journal = None
+    _next_student_id = 1
+    _next_goal_id = 1
 
 
 # ---------- API ----------
+@_locked
 def connect(seed: bool = True) -> None:
     """
     Initialisiert die In-Memory DB.
-    - seed=True: legt Beispiel-Transaktionen an (für manuelles Demo-Run)
+    - seed=True: legt Beispiel-Transaktionen an (für manuelles Demo-Run, in DEFAULT_CLASS)
     - seed=False: startet leer (für Unit-Tests)
+    Mit MEMORY_DATA_DIR wird der gespeicherte Bestand geladen und nie mit Beispieldaten befüllt.
     """
-    global _transactions, _next_id
+    global _next_id, _journal
 
-    if _transactions:
+    if any(len(d.ledger) for d in _classes.values()) or _journal is not None:
         return  # schon initialisiert
 
+    if MEMORY_DATA_DIR:
+        journal = Journal(MEMORY_DATA_DIR, fsync_every=MEMORY_FSYNC_EVERY, fsync_interval=MEMORY_FSYNC_INTERVAL)
+        # ein zweiter Prozess auf demselben Verzeichnis (manage neben dem Backend) bricht hier ab
+        journal.lock()
+        _load_from_disk(journal)
+        journal.open()
+        _journal = journal
+        return
+
     if not seed:
-        _recalc_and_store_balance()
         return
 
+    d = _data(DEFAULT_CLASS, create=True)
     now = datetime.now()
-    _transactions.extend([
+    for tx in (
         Transaction(1, "einzahlung", 50.0, "Startgeld", now),
         Transaction(2, "ausgabe", 12.5, "Kreide", now),
         Transaction(3, "einzahlung", 20.0, "Spende Max", now),
-    ])
+    ):
+        d.ledger.append(tx)
     _next_id = 4
-    _recalc_and_store_balance()
+    _rebuild(d)
 
 
+@_locked
 def disconnect() -> None:
+    # sauberes Herunterfahren: Snapshot schreiben, damit der nächste Start nichts nachspielen muss
+    snapshot()
     _reset_storage()
 
 
+@_locked
 def create_transaction(
     type_: str,
     amount: float,
@@ -98,8 +475,6 @@ def create_transaction(
     student: str = "",
     date_: Optional[dt_date] = None,
 ) -> Transaction:
-    global _next_id
-
     norm_type = _normalize_type(type_)
     ts = timestamp or datetime.now()
 
@@ -112,20 +487,323 @@ def create_transaction(
         category=category,
         student=student,
         date=date_,
+        student_id=_student_ids(_data()).get(student, 0) if student else 0,
     )
-
-    _transactions.append(tx)
-    _next_id += 1
-    _recalc_and_store_balance()
+    # wie im Mongo-Adapter: keine Buchung, die den Kontostand der Klasse ins Minus bringt
+    if _data().balance.current_total + _signed_amount(tx) < 0:
+        raise ValueError(OVERDRAFT_MSG)
+
+    # Write-ahead: erst ins Journal, dann in den Speicher
+    _journal_write("tx_create", tx=_tx_record(tx, current_class.get()))
+    _insert(_data(create=True), [tx])
+    _maybe_snapshot()
     return tx
 
 
+@_locked
+def create_transactions_bulk(rows: Sequence[Dict[str, Any]]) -> Tuple[List[Transaction], List[Tuple[int, str]]]:
+    """
+    Legt viele Transaktionen auf einmal an.
+    Rückgabe: (angelegte Transaktionen, [(Index in rows, Fehlermeldung), ...])
+    Wie im Mongo-Adapter wird jede Zeile gegen den laufenden Kontostand geprüft und date auf heute gesetzt, wenn es fehlt.
+    """
+    created: List[Transaction] = []
+    errors: List[Tuple[int, str]] = []
+    class_id = current_class.get()
+    d = _data(class_id)
+    running_total = d.balance.current_total
+    student_ids = _student_ids(d)
+
+    for i, row in enumerate(rows):
+        try:
+            norm_type = _normalize_type(str(row.get("type_", "")))
+        except ValueError as e:
+            errors.append((i, str(e)))
+            continue
+        tx = Transaction(
+            id=_next_id + len(created),
+            type=norm_type,
+            amount=float(row.get("amount", 0.0)),
+            description=str(row.get("description", "")),
+            timestamp=row.get("timestamp") or datetime.now(),
+            category=str(row.get("category", "")),
+            student=str(row.get("student", "")),
+            date=row.get("date_") or dt_date.today(),
+        )
+        tx.student_id = student_ids.get(tx.student, 0)
+        if running_total + _signed_amount(tx) < 0:
+            errors.append((i, OVERDRAFT_MSG))
+            continue
+        running_total += _signed_amount(tx)
+        created.append(tx)
+
+    if created:
+        _journal_write("tx_bulk", txs=[_tx_record(tx, class_id) for tx in created])
+        _insert(_data(class_id, create=True), created)
+        _maybe_snapshot()
+    return created, errors
+
+
+@_locked
+def delete_transaction(tx_id: int) -> bool:
+    d = _data()
+    if d.ledger.get(int(tx_id)) is None:
+        return False
+    _journal_write("tx_delete", id=int(tx_id))
+    _remove(d, int(tx_id))
+    _maybe_snapshot()
+    return True
+
+
+@_locked
 def get_all_transactions() -> List[Transaction]:
-    return list(_transactions)
+    return list(_data().ledger)
+
+
+@_locked
+def query_transaction_rows(
+    after_id: Optional[int] = None,
+    limit: int = 100,
+    type_: Optional[str] = None,
+    category: Optional[str] = None,
+    student: Optional[str] = None,
+    date_from: Optional[dt_date] = None,
+    date_to: Optional[dt_date] = None,
+    descending: bool = False,
+) -> List[Dict[str, Any]]:
+    """Keyset-Pagination über id als fertige Antwortzeilen (Form von TxOut); bricht nach `limit` Treffern ab."""
+    rows = _data().ledger.query(after_id, limit, type_, category, student, date_from, date_to, descending)
+    return [_tx_row(t) for t in rows]
+
+
+def _tx_row(t: Transaction) -> Dict[str, Any]:
+    return {
+        "id": t.id,
+        "type": t.type,
+        "amount": t.amount,
+        "description": t.description,
+        "timestamp": t.timestamp.isoformat(),
+        "category": t.category,
+        "student": t.student,
+        "date": t.date.isoformat() if t.date else "",
+    }
+
+
+@_locked
+def search_transaction_rows(q: str, after_id: Optional[int] = None, limit: int = 100, descending: bool = False) -> List[Dict[str, Any]]:
+    """Suche über den invertierten Index; Aufwand hängt von der Trefferzahl ab, nicht von der Ledger-Größe."""
+    d = _data()
+    ids = d.search_index.search(parse_query(q), after_id, limit, descending)
+    return [_tx_row(t) for t in (d.ledger.get(i) for i in ids) if t is not None]
+
+
+def _rebuild_search_index(d: _ClassData) -> None:
+    d.search_index = SearchIndex()
+    for t in d.ledger:
+        d.search_index.add(*_index_args(t))
+
+
+@_locked
+def rebuild_search_index() -> int:
+    d = _data()
+    _rebuild_search_index(d)
+    return len(d.ledger)
+
+
+@_locked
+def get_balance() -> Balance:
+    return _data().balance
+
+
+@_locked
+def reconcile_balance(fix: bool = False) -> Dict[str, Any]:
+    """Vergleicht den gespeicherten Kontostand mit einer Neuberechnung über alle Transaktionen."""
+    d = _data()
+    stored = d.balance.current_total
+    computed = d.ledger.total()
+    drift = stored - computed
+
+    fixed = False
+    if fix and abs(drift) > BALANCE_DRIFT_TOLERANCE:
+        d.balance.current_total = computed
+        fixed = True
+
+    return {"stored": stored, "computed": computed, "drift": drift, "ok": abs(drift) <= BALANCE_DRIFT_TOLERANCE, "fixed": fixed}
+
+
+@_locked
+def health() -> Dict[str, Any]:
+    """Kein Netzwerk, kein Pool – nur Größe und Persistenzmodus für /health/db."""
+    return {
+        "adapter": "memory",
+        "ok": True,
+        "latency_ms": 0.0,
+        "engine": MEMORY_ENGINE,
+        "classes": len(_classes),
+        "transactions": sum(len(d.ledger) for d in list(_classes.values())),
+        "journal": _journal is not None,
+    }
+
+
+@_locked
+def get_daily_stats(days: int = 30, end: Optional[dt_date] = None) -> List[Dict[str, Any]]:
+    """Einnahmen, Ausgaben und Kontostand am Tagesende je Tag, aus den Tages-Rollups (O(Tage))."""
+    d = _data()
+    end = end or dt_date.today()
+    start = end - timedelta(days=max(1, int(days)) - 1)
+
+    closing = d.balance.current_total
+    for day, (income, expense) in d.daily.items():
+        if day > end:
+            closing -= income - expense
+
+    out: List[Dict[str, Any]] = []
+    day = end
+    while day >= start:
+        income, expense = d.daily.get(day, (0.0, 0.0))
+        out.append({"date": day.isoformat(), "income": income, "expense": expense, "balance": closing})
+        closing -= income - expense
+        day -= timedelta(days=1)
+    out.reverse()
+    return out
+
+
+@_locked
+def rebuild_daily_rollups() -> int:
+    d = _data()
+    d.daily = d.ledger.daily_totals()
+    return len(d.daily)
+
+
+# ---------- Sparziele ----------
+def _add_goal(d: _ClassData, goal: Dict[str, Any]) -> None:
+    global _next_goal_id
+    d.goals[int(goal["id"])] = goal
+    _next_goal_id = max(_next_goal_id, int(goal["id"]) + 1)
+
+
+@_locked
+def count_savings_goals() -> int:
+    return len(_data().goals)
+
+
+@_locked
+def get_savings_goals(limit: int = MAX_SAVING_GOALS) -> List[Dict[str, Any]]:
+    # neueste zuerst, wie im Mongo-Adapter
+    return [dict(g) for _, g in sorted(_data().goals.items(), reverse=True)[: int(limit)]]
+
+
+@_locked
+def create_savings_goal(name: str, amount: float, created_at: Optional[datetime] = None) -> Dict[str, Any]:
+    d = _data()
+    name = (name or "").strip()
+    if not name:
+        raise ValueError("Name darf nicht leer sein.")
+    if len(d.goals) >= MAX_SAVING_GOALS:
+        raise ValueError(f"Maximal {MAX_SAVING_GOALS} Sparziele erlaubt.")
+
+    goal = {"id": _next_goal_id, "name": name, "amount": float(amount or 0.0), "created_at": (created_at or datetime.now()).isoformat()}
+    _journal_write("goal_create", goal=goal)
+    _add_goal(_data(create=True), goal)
+    _maybe_snapshot()
+    return dict(goal)
+
+
+@_locked
+def delete_savings_goal(goal_id: int) -> bool:
+    d = _data()
+    if int(goal_id) not in d.goals:
+        return False
+    _journal_write("goal_delete", id=int(goal_id))
+    del d.goals[int(goal_id)]
+    _maybe_snapshot()
+    return True
+
+
+# ---------- Schüler ----------
+def _add_student(d: _ClassData, student: Dict[str, Any]) -> None:
+    global _next_student_id
+    d.students[int(student["id"])] = student
+    _next_student_id = max(_next_student_id, int(student["id"]) + 1)
+    # vorher unter dem Namen gebuchte, noch keinem Schüler zugeordnete Transaktionen übernehmen
+    for tx in d.ledger.assign_student(str(student["name"]), int(student["id"])):
+        _add_student_total(d, tx)
+
+
+def _remove_student(d: _ClassData, student_id: int) -> None:
+    d.students.pop(student_id, None)
+    d.student_totals.pop(student_id, None)
+
+
+@_locked
+def get_students() -> List[Dict[str, Any]]:
+    return [dict(s) for _, s in sorted(_data().students.items())]
+
+
+@_locked
+def create_student(name: str, created_at: Optional[datetime] = None) -> Dict[str, Any]:
+    d = _data()
+    name = (name or "").strip()
+    if not name:
+        raise ValueError("Name darf nicht leer sein.")
+    if any(s["name"] == name for s in d.students.values()):
+        raise ValueError("Schüler existiert bereits.")
+
+    student = {"id": _next_student_id, "name": name, "created_at": (created_at or datetime.now()).isoformat()}
+    _journal_write("student_create", student=student)
+    _add_student(_data(create=True), student)
+    _maybe_snapshot()
+    return dict(student)
+
+
+@_locked
+def delete_student(student_id: int) -> bool:
+    d = _data()
+    if int(student_id) not in d.students:
+        return False
+    _journal_write("student_delete", id=int(student_id))
+    _remove_student(d, int(student_id))
+    _maybe_snapshot()
+    return True
 
 
-def get_balance() -> Balance:
-    return _balance
+def _student_balance_out(d: _ClassData, student: Dict[str, Any]) -> Dict[str, Any]:
+    income, expense, count = d.student_totals.get(int(student["id"]), [0.0, 0.0, 0])
+    return {
+        "student_id": int(student["id"]),
+        "name": student["name"],
+        "income": income,
+        "expense": expense,
+        "balance": income - expense,
+        "count": int(count),
+    }
+
+
+@_locked
+def get_student_balances() -> List[Dict[str, Any]]:
+    """Summen pro Schüler aus den mitgeführten Totals (O(Schüler))."""
+    d = _data()
+    return [_student_balance_out(d, s) for _, s in sorted(d.students.items())]
+
+
+@_locked
+def get_student_balance(student_id: int) -> Optional[Dict[str, Any]]:
+    d = _data()
+    student = d.students.get(int(student_id))
+    return _student_balance_out(d, student) if student else None
+
+
+def _rebuild_student_totals(d: _ClassData) -> None:
+    d.student_totals.clear()
+    for t in d.ledger:
+        _add_student_total(d, t)
+
+
+@_locked
+def rebuild_student_balances() -> int:
+    d = _data()
+    _rebuild_student_totals(d)
+    return len(d.student_totals)
 
 
 # ---------- Adapter für Tests (DummyDB) ----------
@@ -1,26 +1,80 @@
 from __future__ import annotations
 
+import logging
 import os
-from datetime import datetime, date
-from typing import Any, Dict, List, Optional, Tuple
-
-from pymongo import ASCENDING, MongoClient
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, date, timedelta
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+from pymongo import ASCENDING, MongoClient, ReturnDocument, UpdateOne
+from pymongo.client_session import ClientSession
 from pymongo.collection import Collection
 from pymongo.database import Database
+from pymongo.errors import BulkWriteError, PyMongoError
 
+from myapp.adapters.mongo_settings import CommandTracer, MongoSettings, PoolStats
+from myapp.adapters.search import MAX_PREFIX, MIN_PREFIX, SEARCH_FIELDS, SearchQuery, doc_tokens, parse_query, prefix_terms
 from myapp.models import Balance, Transaction
-
-MONGO_URI = os.getenv("MONGO_URI", "mongodb://mongo:27017")
-DB_NAME = os.getenv("MONGO_DB", "klassenkassa")
+from myapp.tenancy import DEFAULT_CLASS, current_class
 
 COL_TX = "transactions"
 COL_BAL = "balance"
 COL_GOALS = "savings_goals"
 COL_STUDENTS = "students"
+COL_COUNTERS = "counters"
+COL_ROLLUPS = "daily_rollups"
+COL_STUDENT_BAL = "student_balances"
 
 MAX_SAVING_GOALS = 3
 
+# Rundungsdifferenzen durch aufsummierte float-$inc bis unter einen Cent gelten nicht als Abweichung
+BALANCE_DRIFT_TOLERANCE = 0.005
+
+# >1: jeder Prozess reserviert IDs blockweise (ein Roundtrip pro Block statt pro Insert)
+ID_BLOCK_SIZE = max(1, int(os.getenv("MONGO_ID_BLOCK_SIZE", "1")))
+
+# Insert, Kontostand und Rollups in einer Mehrdokument-Transaktion schreiben (braucht ein Replica Set);
+# ohne: bedingtes $inc auf den Kontostand + Kompensation, falls der Insert fehlschlägt
+USE_TRANSACTIONS = os.getenv("MONGO_USE_TRANSACTIONS", "0").lower() in {"1", "true", "yes"}
+
+# so oft prüft ein Bulk-Import neu, wenn sich der Kontostand zwischen Lesen und Buchen geändert hat
+BALANCE_RETRY_ATTEMPTS = 5
+
+OVERDRAFT_MSG = "Diese Transaktion würde den Kontostand ins Minus bringen."
+BALANCE_CONFLICT_MSG = "Kontostand wurde gleichzeitig geändert, bitte erneut versuchen."
+
+# Change Streams für GET /events (erreichen alle Backend-Prozesse); brauchen ein Replica Set,
+# ohne meldet die API Änderungen selbst (nur an Clients desselben Prozesses)
+CHANGE_STREAMS = os.getenv("MONGO_CHANGE_STREAMS", "1").lower() in {"1", "true", "yes"}
+
+# Index-Regressionen früh erkennen: "off" | "warn" (Log beim Start) | "fail" (connect bricht ab)
+PLAN_CHECK = os.getenv("MONGO_PLAN_CHECK", "warn").lower()
+
+# Alle Klassen teilen sich die Collections; jede Abfrage filtert auf class_id, jeder Index beginnt damit,
+# sodass eine Klasse nur ihren eigenen Indexbereich liest. IDs bleiben über alle Klassen eindeutig.
+_CLASS = ("class_id", ASCENDING)
+
+# Sekundärindizes passend zu den Filtern von query_transaction_rows (Gleichheit zuerst, Datumsbereich danach)
+TX_INDEXES: List[List[Tuple[str, int]]] = [
+    # Keyset-Pagination ohne weitere Filter
+    [_CLASS, ("id", ASCENDING)],
+    [_CLASS, ("student", ASCENDING), ("date", ASCENDING)],
+    [_CLASS, ("category", ASCENDING), ("date", ASCENDING)],
+    [_CLASS, ("type", ASCENDING), ("date", ASCENDING)],
+    [_CLASS, ("date", ASCENDING)],
+    # Suche: Wortpräfixe (Multikey), danach id für die Sortierung
+    [_CLASS, ("terms", ASCENDING), ("id", ASCENDING)],
+]
+
+# Stand des Datenmodells in counters {_id: "schema"}; 2 = mit class_id (siehe _migrate_to_classes)
+SCHEMA_VERSION = 3
+
+logger = logging.getLogger(__name__)
+
 Doc = Dict[str, Any]
+T = TypeVar("T")
 
 _client: Optional[MongoClient[Doc]] = None
 _db: Optional[Database[Doc]] = None
@@ -28,41 +82,139 @@ _tx: Optional[Collection[Doc]] = None
 _bal: Optional[Collection[Doc]] = None
 _goals: Optional[Collection[Doc]] = None
 _students: Optional[Collection[Doc]] = None
+_counters: Optional[Collection[Doc]] = None
+_rollups: Optional[Collection[Doc]] = None
+_student_bal: Optional[Collection[Doc]] = None
+
+_settings: Optional[MongoSettings] = None
+_pool_stats = PoolStats()
+_command_tracer = CommandTracer()
+
+# pro Prozess reservierte ID-Blöcke: Sequenzname -> (nächste ID, Blockende exklusiv)
+_id_blocks: Dict[str, Tuple[int, int]] = {}
+_id_lock = threading.Lock()
 
 
 def connect() -> None:
-    global _client, _db, _tx, _bal, _goals, _students
+    global _client, _db, _tx, _bal, _goals, _students, _counters, _rollups, _student_bal, _settings
 
-    _client = MongoClient[Doc](MONGO_URI)
-    _db = _client[DB_NAME]
+    _settings = MongoSettings.from_env()
+    _client = MongoClient[Doc](
+        _settings.uri, event_listeners=[_pool_stats, _command_tracer], **_settings.client_kwargs()
+    )
+    _db = _client[_settings.db_name]
+    _warm_up_pool(_client, _settings.min_pool_size)
 
     _tx = _db[COL_TX]
     _bal = _db[COL_BAL]
     _goals = _db[COL_GOALS]
     _students = _db[COL_STUDENTS]
+    _counters = _db[COL_COUNTERS]
+    _rollups = _db[COL_ROLLUPS]
+    _student_bal = _db[COL_STUDENT_BAL]
+
+    _migrate_to_classes()
 
     _tx.create_index([("id", ASCENDING)], unique=True)
+    for keys in TX_INDEXES:
+        _tx.create_index(keys)
     _goals.create_index([("id", ASCENDING)], unique=True)
+    _goals.create_index([_CLASS, ("id", ASCENDING)])
     _students.create_index([("id", ASCENDING)], unique=True)
-    _students.create_index([("name", ASCENDING)], unique=True)
+    # Namen sind nur innerhalb einer Klasse eindeutig
+    _students.create_index([_CLASS, ("name", ASCENDING)], unique=True)
+    _students.create_index([_CLASS, ("id", ASCENDING)])
 
     _bal.update_one(
-        {"_id": "balance"},
+        {"_id": _balance_id(DEFAULT_CLASS)},
         {"$setOnInsert": {"current_total": 0.0}},
         upsert=True,
     )
 
+    # Zähler einmalig auf die höchste vorhandene ID heben (bestehende Daten vor Einführung der counters)
+    for col in (_tx, _goals, _students):
+        _seed_counter(_counters, col)
+
+    if CHANGE_STREAMS:
+        _enable_pre_images(_db)
+
+    if PLAN_CHECK in ("warn", "fail"):
+        _report_query_plans(check_query_plans(), fail=PLAN_CHECK == "fail")
+
+
+def _migrate_to_classes() -> None:
+    """
+    Version 2: Bestand von vor den Klassen (ohne class_id) einmalig DEFAULT_CLASS zuordnen: class_id
+    nachtragen, den Namensindex auf (class_id, name) umstellen und die Tagesstatistik mit Klassenschlüssel
+    neu aufbauen. Der Kontostand von DEFAULT_CLASS behält sein _id "balance".
+    Version 3: Transaktionen über den Namen mit student_id verknüpfen und student_balances nach
+    Schüler-id neu aufbauen.
+    """
+    counters = _require_counters()
+    schema = counters.find_one({"_id": "schema"})
+    version = int(schema.get("version", 0)) if schema else 0
+    if version >= SCHEMA_VERSION:
+        return
+    if version < 2:
+        for col in (_require_tx_bal()[0], _require_goals(), _require_students()):
+            col.update_many({"class_id": {"$exists": False}}, {"$set": {"class_id": DEFAULT_CLASS}})
+        if "name_1" in _require_students().index_information():
+            _require_students().drop_index("name_1")
+        _require_rollups().delete_many({"_id": {"$not": {"$regex": "/"}}})
+        token = current_class.set(DEFAULT_CLASS)
+        try:
+            rebuild_daily_rollups()
+        finally:
+            current_class.reset(token)
+        logger.info("Datenmodell auf Klassen umgestellt (Bestand gehört zu %r)", DEFAULT_CLASS)
+    _require_student_balances().delete_many({})
+    for class_id in list_classes():
+        token = current_class.set(class_id)
+        try:
+            rebuild_student_balances()
+        finally:
+            current_class.reset(token)
+    counters.update_one({"_id": "schema"}, {"$set": {"version": SCHEMA_VERSION}}, upsert=True)
+
+
+def list_classes() -> List[str]:
+    """Alle Klassen mit Transaktionen, Schülern oder Sparzielen (DISTINCT_SCAN über die class_id-Indizes)."""
+    tx, _ = _require_tx_bal()
+    found = set(tx.distinct("class_id")) | set(_require_students().distinct("class_id")) | set(_require_goals().distinct("class_id"))
+    return sorted(str(c) for c in found if c)
+
+
+def _enable_pre_images(db: Database[Doc]) -> None:
+    # Pre-Images (MongoDB >= 6): Lösch-Ereignisse im Change Stream enthalten dann die id der Transaktion
+    try:
+        db.command("collMod", COL_TX, changeStreamPreAndPostImages={"enabled": True})
+    except PyMongoError as e:
+        logger.info("Change-Stream-Pre-Images nicht verfügbar: %s", e)
+
+
+def _warm_up_pool(client: MongoClient[Doc], size: int) -> None:
+    """Öffnet `size` Verbindungen gleichzeitig, damit die ersten Requests keinen Handshake bezahlen."""
+    if size <= 0:
+        return
+    with ThreadPoolExecutor(max_workers=size) as pool:
+        list(pool.map(lambda _: client.admin.command("ping"), range(size)))
+
 
 def disconnect() -> None:
-    global _client, _db, _tx, _bal, _goals, _students
+    global _client, _db, _tx, _bal, _goals, _students, _counters, _rollups, _student_bal, _settings
     if _client is not None:
         _client.close()
     _client = None
+    _settings = None
     _db = None
     _tx = None
     _bal = None
     _goals = None
     _students = None
+    _counters = None
+    _rollups = None
+    _student_bal = None
+    _id_blocks.clear()
 
 
 def _require_tx_bal() -> Tuple[Collection[Doc], Collection[Doc]]:
@@ -83,9 +235,54 @@ def _require_students() -> Collection[Doc]:
     return _students
 
 
-def _next_id_for(col: Collection[Doc]) -> int:
-    last = col.find_one({}, sort=[("id", -1)])
-    return 1 if not last else int(last.get("id", 0)) + 1
+def _require_counters() -> Collection[Doc]:
+    if _counters is None:
+        raise RuntimeError("MongoDB not connected (counters). Call db.connect() first.")
+    return _counters
+
+
+def _require_rollups() -> Collection[Doc]:
+    if _rollups is None:
+        raise RuntimeError("MongoDB not connected (rollups). Call db.connect() first.")
+    return _rollups
+
+
+def _require_student_balances() -> Collection[Doc]:
+    if _student_bal is None:
+        raise RuntimeError("MongoDB not connected (student_balances). Call db.connect() first.")
+    return _student_bal
+
+
+def _seed_counter(counters: Collection[Doc], col: Collection[Doc]) -> None:
+    last = col.find_one({}, sort=[("id", -1)], projection={"id": 1})
+    max_id = int(last.get("id", 0)) if last else 0
+    counters.update_one({"_id": col.name}, {"$max": {"seq": max_id}}, upsert=True)
+
+
+def _reserve_ids(name: str, count: int) -> range:
+    """Reserviert atomar `count` fortlaufende IDs der Sequenz `name` (ein Roundtrip)."""
+    counters = _require_counters()
+    d = counters.find_one_and_update(
+        {"_id": name},
+        {"$inc": {"seq": int(count)}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    end = int(d["seq"]) if d else int(count)
+    return range(end - int(count) + 1, end + 1)
+
+
+def _next_id(name: str) -> int:
+    if ID_BLOCK_SIZE <= 1:
+        return _reserve_ids(name, 1).start
+
+    with _id_lock:
+        next_id, end = _id_blocks.get(name, (0, 0))
+        if next_id >= end:
+            block = _reserve_ids(name, ID_BLOCK_SIZE)
+            next_id, end = block.start, block.stop
+        _id_blocks[name] = (next_id + 1, end)
+        return next_id
 
 
 def _parse_timestamp(value: Any) -> datetime:
@@ -128,47 +325,524 @@ def _tx_to_model(d: Doc) -> Transaction:
     )
 
 
-def _recalculate_balance(tx: Collection[Doc], bal: Collection[Doc]) -> float:
-    income = tx.aggregate(
-        [{"$match": {"type": "einzahlung"}}, {"$group": {"_id": None, "sum": {"$sum": "$amount"}}}]
-    )
-    expense = tx.aggregate(
-        [{"$match": {"type": "ausgabe"}}, {"$group": {"_id": None, "sum": {"$sum": "$amount"}}}]
-    )
+# nur die Felder der API-Antwort (TxOut), ohne _id
+TX_ROW_PROJECTION: Doc = {
+    "_id": 0, "id": 1, "type": 1, "amount": 1, "description": 1, "timestamp": 1, "category": 1, "student": 1, "date": 1,
+}
+
+
+def _tx_row(d: Doc) -> Doc:
+    """Dokument -> Antwortzeile in der Form von TxOut; Zeitstempel und Datum bleiben ISO-Strings wie gespeichert."""
+    ts = d.get("timestamp")
+    day = d.get("date")
+    return {
+        "id": int(d.get("id", 0)),
+        "type": str(d.get("type", "einzahlung")),
+        "amount": float(d.get("amount", 0.0)),
+        "description": str(d.get("description", "") or ""),
+        "timestamp": ts.isoformat() if isinstance(ts, datetime) else str(ts or ""),
+        "category": str(d.get("category", "") or ""),
+        "student": str(d.get("student", "") or ""),
+        "date": day.isoformat() if isinstance(day, date) else str(day or ""),
+    }
 
-    income_sum = 0.0
-    expense_sum = 0.0
 
-    for x in income:
-        # x ist Doc-ähnlich
-        if isinstance(x, dict):
-            income_sum = float(x.get("sum", 0.0))
-    for x in expense:
+def _tx_doc(
+    new_id: int,
+    type_: str,
+    amount: float,
+    description: str,
+    timestamp: datetime,
+    category: str,
+    student: str,
+    date_: date,
+    student_id: int = 0,
+) -> Doc:
+    return {
+        "class_id": current_class.get(),
+        "id": new_id,
+        "type": type_,
+        "amount": float(amount),
+        "description": str(description),
+        "timestamp": timestamp.isoformat(),
+        "category": str(category),
+        "student": str(student),
+        "student_id": int(student_id),
+        "date": date_.isoformat(),
+        "terms": prefix_terms(doc_tokens((description, category, student, type_))),
+    }
+
+
+def _signed_amount(type_: str, amount: float) -> float:
+    return float(amount) if type_ == "einzahlung" else -float(amount)
+
+
+def _balance_id(class_id: Optional[str] = None) -> str:
+    """_id des Kontostand-Dokuments einer Klasse ("balance" für DEFAULT_CLASS wie vor den Klassen)."""
+    class_id = class_id or current_class.get()
+    return "balance" if class_id == DEFAULT_CLASS else f"balance/{class_id}"
+
+
+def _balance_class(balance_id: Any) -> Optional[str]:
+    if balance_id == "balance":
+        return DEFAULT_CLASS
+    if isinstance(balance_id, str) and balance_id.startswith("balance/"):
+        return balance_id[len("balance/"):]
+    return None
+
+
+def _class_key(key: Any, class_id: Optional[str] = None) -> str:
+    """_id in daily_rollups ("klasse/YYYY-MM-DD") und student_balances ("klasse/Schüler-id")."""
+    return f"{class_id or current_class.get()}/{key}"
+
+
+def _class_range(class_id: Optional[str] = None, start: str = "") -> Doc:
+    # "0" folgt in der Sortierung direkt auf "/": alle Schlüssel "klasse/..." ab `start`, keine andere Klasse
+    class_id = class_id or current_class.get()
+    return {"$gte": f"{class_id}/{start}", "$lt": f"{class_id}0"}
+
+
+def _apply_balance_delta(bal: Collection[Doc], delta: float, session: Optional[ClientSession] = None) -> None:
+    # atomares $inc statt Neuberechnung über die ganze Collection -> O(1) pro Schreibvorgang
+    bal.update_one({"_id": _balance_id()}, {"$inc": {"current_total": float(delta)}}, upsert=True, session=session)
+
+
+def _balance_floor(deltas: Iterable[float]) -> float:
+    """Kleinster Kontostand, ab dem alle Deltas der Reihe nach gebucht werden können, ohne ins Minus zu gehen."""
+    running, floor = 0.0, float("-inf")
+    for delta in deltas:
+        running += delta
+        floor = max(floor, -running)
+    return floor
+
+
+def _book_balance(bal: Collection[Doc], delta: float, floor: float, session: Optional[ClientSession] = None) -> bool:
+    """Bucht `delta` nur, wenn der Kontostand mindestens `floor` beträgt – Prüfung und Schreiben in einem Schritt."""
+    balance_id = _balance_id()
+    for _ in range(2):
+        res = bal.update_one(
+            {"_id": balance_id, "current_total": {"$gte": floor}},
+            {"$inc": {"current_total": float(delta)}},
+            session=session,
+        )
+        if res.matched_count == 1:
+            return True
+        # erste Buchung einer Klasse: Kontostand-Dokument anlegen und noch einmal versuchen
+        created = bal.update_one({"_id": balance_id}, {"$setOnInsert": {"current_total": 0.0}}, upsert=True, session=session)
+        if created.upserted_id is None:
+            return False
+    return False
+
+
+def _run_atomic(fn: Callable[[Optional[ClientSession]], T]) -> T:
+    """
+    Führt `fn` bei MONGO_USE_TRANSACTIONS in einer Transaktion aus (with_transaction wiederholt bei
+    TransientTransactionError / UnknownTransactionCommitResult), sonst direkt mit session=None.
+    """
+    if not USE_TRANSACTIONS:
+        return fn(None)
+    if _client is None:
+        raise RuntimeError("MongoDB not connected. Call db.connect() first.")
+    with _client.start_session() as session:
+        return session.with_transaction(fn)
+
+
+def _rollup_deltas(docs: Sequence[Doc], sign: int = 1, key: str = "date") -> Dict[str, Dict[str, float]]:
+    """
+    $inc-Werte {income, expense, count} je Klasse und Wert von `key`, eines pro betroffenem Dokument:
+    key="date" -> daily_rollups (_id "klasse/YYYY-MM-DD"), key="student_id" -> student_balances
+    (_id "klasse/Schüler-id"). Dokumente ohne Wert (z. B. ohne Schüler) zählen nicht mit.
+    """
+    deltas: Dict[str, Dict[str, float]] = {}
+    for d in docs:
+        if not d.get(key):
+            continue
+        inc = deltas.setdefault(_class_key(d[key], d.get("class_id")), {"income": 0.0, "expense": 0.0, "count": 0})
+        inc["income" if d["type"] == "einzahlung" else "expense"] += sign * float(d["amount"])
+        inc["count"] += sign
+    return deltas
+
+
+def _inc_grouped(col: Collection[Doc], deltas: Dict[str, Dict[str, float]], session: Optional[ClientSession]) -> None:
+    if len(deltas) == 1:
+        key, inc = next(iter(deltas.items()))
+        col.update_one({"_id": key}, {"$inc": inc}, upsert=True, session=session)
+    elif deltas:
+        ops = [UpdateOne({"_id": key}, {"$inc": inc}, upsert=True) for key, inc in deltas.items()]
+        col.bulk_write(ops, ordered=False, session=session)
+
+
+def _apply_rollups(docs: Sequence[Doc], sign: int = 1, session: Optional[ClientSession] = None) -> None:
+    """Führt die Tagesstatistik und die Summen pro Schüler für die geschriebenen/gelöschten Dokumente nach."""
+    _inc_grouped(_require_rollups(), _rollup_deltas(docs, sign), session)
+    _inc_grouped(_require_student_balances(), _rollup_deltas(docs, sign, key="student_id"), session)
+
+
+_IS_INCOME = {"$eq": ["$type", "einzahlung"]}
+
+def total_pipeline(class_id: str) -> List[Doc]:
+    return [
+        {"$match": {"class_id": class_id}},
+        {"$group": {"_id": None, "sum": {"$sum": {"$cond": [_IS_INCOME, "$amount", {"$multiply": [-1, "$amount"]}]}}}},
+    ]
+
+
+def _sums_pipeline(class_id: str, key: str, into: str, match: Optional[Doc] = None) -> List[Doc]:
+    # $merge statt $out: $out ersetzt die ganze Collection, also auch die Summen aller anderen Klassen
+    return [
+        {"$match": {"class_id": class_id, **(match or {})}},
+        {"$group": {
+            "_id": {"$concat": [f"{class_id}/", {"$toString": f"${key}"}]},
+            "income": {"$sum": {"$cond": [_IS_INCOME, "$amount", 0]}},
+            "expense": {"$sum": {"$cond": [_IS_INCOME, 0, "$amount"]}},
+            "count": {"$sum": 1},
+        }},
+        {"$merge": {"into": into, "whenMatched": "replace", "whenNotMatched": "insert"}},
+    ]
+
+
+def rollup_pipeline(class_id: str) -> List[Doc]:
+    return _sums_pipeline(class_id, "date", COL_ROLLUPS)
+
+
+def student_balance_pipeline(class_id: str) -> List[Doc]:
+    return _sums_pipeline(class_id, "student_id", COL_STUDENT_BAL, {"student_id": {"$gt": 0}})
+
+
+def _compute_total(tx: Collection[Doc]) -> float:
+    """Vollständige Neuberechnung des Kontostands (nur für den Abgleich, nicht im Schreibpfad)."""
+    for x in tx.aggregate(total_pipeline(current_class.get())):
         if isinstance(x, dict):
-            expense_sum = float(x.get("sum", 0.0))
+            return float(x.get("sum", 0.0))
+    return 0.0
+
+
+def reconcile_balance(fix: bool = False) -> Dict[str, Any]:
+    """
+    Vergleicht den gespeicherten Kontostand mit einer vollständigen Neuberechnung.
+    - fix=True: korrigiert eine Abweichung über ein $inc (gleichzeitige Schreibvorgänge bleiben erhalten)
+    """
+    tx, bal = _require_tx_bal()
+    stored = get_balance().current_total
+    computed = _compute_total(tx)
+    drift = stored - computed
+
+    fixed = False
+    if fix and abs(drift) > BALANCE_DRIFT_TOLERANCE:
+        _apply_balance_delta(bal, -drift)
+        fixed = True
+
+    return {"stored": stored, "computed": computed, "drift": drift, "ok": abs(drift) <= BALANCE_DRIFT_TOLERANCE, "fixed": fixed}
+
+
+# -------------------- Tagesstatistik --------------------
+
+def get_daily_stats(days: int = 30, end: Optional[date] = None) -> List[Dict[str, Any]]:
+    """
+    Einnahmen, Ausgaben und Kontostand am Tagesende für die letzten `days` Tage bis `end`.
+    Liest nur die daily_rollups (O(Tage)); der Tagesendstand wird vom aktuellen Kontostand
+    rückwärts berechnet.
+    """
+    rollups = _require_rollups()
+    start, end = _stats_range(days, end)
+    docs = rollups.find({"_id": _class_range(start=start.isoformat())})
+    return _daily_series(docs, get_balance().current_total, start, end)
+
+
+def _stats_range(days: int, end: Optional[date]) -> Tuple[date, date]:
+    end = end or date.today()
+    return end - timedelta(days=max(1, int(days)) - 1), end
+
+
+def _daily_series(rollup_docs: Iterable[Doc], closing: float, start: date, end: date) -> List[Dict[str, Any]]:
+    per_day: Dict[str, Tuple[float, float]] = {}
+    for d in rollup_docs:
+        key = str(d["_id"]).rpartition("/")[2]
+        income, expense = float(d.get("income", 0.0)), float(d.get("expense", 0.0))
+        if key > end.isoformat():
+            # Buchungen mit Datum nach `end` sind im aktuellen Stand schon enthalten
+            closing -= income - expense
+        else:
+            per_day[key] = (income, expense)
+
+    out: List[Dict[str, Any]] = []
+    day = end
+    while day >= start:
+        income, expense = per_day.get(day.isoformat(), (0.0, 0.0))
+        out.append({"date": day.isoformat(), "income": income, "expense": expense, "balance": closing})
+        closing -= income - expense
+        day -= timedelta(days=1)
+    out.reverse()
+    return out
+
+
+def rebuild_daily_rollups() -> int:
+    """Baut die daily_rollups der Klasse aus ihren Transaktionen neu auf (andere Klassen bleiben unberührt)."""
+    tx, _ = _require_tx_bal()
+    rollups = _require_rollups()
+    class_id = current_class.get()
+    rollups.delete_many({"_id": _class_range(class_id)})
+    tx.aggregate(rollup_pipeline(class_id))
+    return int(rollups.count_documents({"_id": _class_range(class_id)}))
+
+
+# -------------------- Query-Plan-Prüfung --------------------
+
+def _canonical_queries() -> List[Tuple[str, Doc]]:
+    """Die Filter, die das Backend tatsächlich absetzt (mit Beispielwerten)."""
+    d_from, d_to = date(2000, 1, 1), date(2000, 12, 31)
+    return [
+        ("keyset", {"class_id": current_class.get(), "id": {"$gt": 0}}),
+        ("student+date", _tx_filter(student="_", date_from=d_from, date_to=d_to)),
+        ("category+date", _tx_filter(category="_", date_from=d_from, date_to=d_to)),
+        ("type+date", _tx_filter(type_="einzahlung", date_from=d_from, date_to=d_to)),
+        ("student", _tx_filter(student="_")),
+        ("category", _tx_filter(category="_")),
+        ("date", _tx_filter(date_from=d_from, date_to=d_to)),
+        ("search", _search_filter(parse_query("xy")) or {}),
+    ]
+
 
-    total = income_sum - expense_sum
-    bal.update_one({"_id": "balance"}, {"$set": {"current_total": total}}, upsert=True)
-    return total
+def _plan_stages(plan: Any) -> List[str]:
+    stages: List[str] = []
+    if isinstance(plan, dict):
+        if isinstance(plan.get("stage"), str):
+            stages.append(plan["stage"])
+        for v in plan.values():
+            stages.extend(_plan_stages(v))
+    elif isinstance(plan, list):
+        for v in plan:
+            stages.extend(_plan_stages(v))
+    return stages
+
+
+def _plan_result(name: str, explain: Doc) -> Dict[str, Any]:
+    stages = _plan_stages(explain.get("queryPlanner", {}).get("winningPlan", {}))
+    return {"query": name, "stages": stages, "collscan": "COLLSCAN" in stages}
+
+
+def check_query_plans() -> List[Dict[str, Any]]:
+    """Führt explain() für die kanonischen Abfragen aus und meldet, welche einen COLLSCAN verwenden."""
+    tx, _ = _require_tx_bal()
+    return [_plan_result(name, tx.find(q).sort("id", ASCENDING).limit(1).explain()) for name, q in _canonical_queries()]
+
+
+def _report_query_plans(results: List[Dict[str, Any]], fail: bool) -> None:
+    bad = [r["query"] for r in results if r["collscan"]]
+    if not bad:
+        return
+    msg = f"COLLSCAN in Abfragen: {', '.join(bad)} (fehlender Index?)"
+    if fail:
+        raise RuntimeError(msg)
+    logger.warning(msg)
+
+
+# -------------------- Health --------------------
+
+def _health_result(latency_ms: Optional[float], error: str = "") -> Dict[str, Any]:
+    out: Dict[str, Any] = {
+        "adapter": "mongo",
+        "ok": not error,
+        "latency_ms": latency_ms,
+        "pool": _pool_stats.snapshot(),
+        "settings": _settings.summary() if _settings else None,
+    }
+    if error:
+        out["error"] = error
+    return out
+
+
+def health() -> Dict[str, Any]:
+    """Ping-Latenz und Poolzustand; Fehler werden gemeldet statt geworfen."""
+    if _client is None:
+        return _health_result(None, "MongoDB not connected.")
+    started = time.perf_counter()
+    try:
+        _client.admin.command("ping")
+    except PyMongoError as e:
+        return _health_result(None, str(e))
+    return _health_result(round((time.perf_counter() - started) * 1000, 3))
+
+
+# -------------------- Change Stream --------------------
+
+CHANGE_PIPELINE: List[Doc] = [
+    {"$match": {"ns.coll": {"$in": [COL_TX, COL_BAL]}, "operationType": {"$in": ["insert", "update", "replace", "delete"]}}},
+]
+CHANGE_STREAM_OPTIONS: Doc = {"full_document": "updateLookup", "full_document_before_change": "whenAvailable"}
+
+
+def _change_event(change: Doc) -> Optional[Doc]:
+    """
+    Change-Stream-Dokument -> Ereignis von GET /events (None: für die Oberfläche uninteressant).
+    Ereignisse tragen die class_id; ein "reset" ohne class_id geht an die Clients aller Klassen.
+    """
+    coll = change.get("ns", {}).get("coll")
+    op = change.get("operationType")
+    if coll == COL_TX:
+        if op == "insert":
+            doc = change["fullDocument"]
+            return {"type": "tx_created", "tx": _tx_row(doc), "class_id": str(doc.get("class_id", DEFAULT_CLASS))}
+        if op == "delete":
+            before = change.get("fullDocumentBeforeChange")
+            # ohne Pre-Image sind nur die _id bekannt, nicht id und Klasse -> alle Clients laden neu
+            if not before:
+                return {"type": "reset"}
+            return {"type": "tx_deleted", "id": int(before["id"]), "class_id": str(before.get("class_id", DEFAULT_CLASS))}
+        return None  # z. B. rebuild-search
+    doc = change.get("fullDocument")
+    class_id = _balance_class(doc.get("_id")) if coll == COL_BAL and doc is not None else None
+    if doc is not None and class_id is not None:
+        return {"type": "balance", "current_total": float(doc.get("current_total", 0.0)), "class_id": class_id}
+    return None
+
+
+def watch_changes(on_open: Callable[[], None], stop: threading.Event) -> Iterator[Doc]:
+    """
+    Ereignisse für GET /events aus einem Change Stream über Transaktionen und Kontostand, bis `stop`
+    gesetzt ist. Wirft PyMongoError, wenn der Server keine Change Streams kann (Standalone).
+    """
+    if _db is None:
+        raise RuntimeError("MongoDB not connected. Call db.connect() first.")
+    with _db.watch(CHANGE_PIPELINE, max_await_time_ms=1000, **CHANGE_STREAM_OPTIONS) as stream:
+        on_open()
+        while stream.alive and not stop.is_set():
+            change = stream.try_next()
+            event = _change_event(change) if change is not None else None
+            if event is not None:
+                yield event
 
 
 # -------------------- CRUD: Transactions --------------------
 
 def get_all_transactions() -> List[Transaction]:
     tx, _ = _require_tx_bal()
-    docs = tx.find({}).sort("id", ASCENDING)
+    docs = tx.find({"class_id": current_class.get()}).sort("id", ASCENDING)
     return [_tx_to_model(d) for d in docs]
 
 
+def _tx_filter(
+    type_: Optional[str] = None,
+    category: Optional[str] = None,
+    student: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> Doc:
+    q: Doc = {"class_id": current_class.get()}
+    if type_:
+        q["type"] = type_
+    if category:
+        q["category"] = category
+    if student:
+        q["student"] = student
+    # date ist als ISO-String gespeichert -> lexikografischer Vergleich entspricht dem Datumsvergleich
+    if date_from or date_to:
+        rng: Doc = {}
+        if date_from:
+            rng["$gte"] = date_from.isoformat()
+        if date_to:
+            rng["$lte"] = date_to.isoformat()
+        q["date"] = rng
+    return q
+
+
+def query_transaction_rows(
+    after_id: Optional[int] = None,
+    limit: int = 100,
+    type_: Optional[str] = None,
+    category: Optional[str] = None,
+    student: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    descending: bool = False,
+) -> List[Doc]:
+    """Keyset-Pagination über id: max. `limit` Antwortzeilen nach `after_id` (in Sortierrichtung), ohne Transaction-Modell."""
+    tx, _ = _require_tx_bal()
+    q = _page_filter(after_id, descending, type_, category, student, date_from, date_to)
+    docs = tx.find(q, projection=TX_ROW_PROJECTION).sort("id", -1 if descending else ASCENDING).limit(int(limit))
+    return [_tx_row(d) for d in docs]
+
+
+def _page_filter(
+    after_id: Optional[int],
+    descending: bool,
+    type_: Optional[str],
+    category: Optional[str],
+    student: Optional[str],
+    date_from: Optional[date],
+    date_to: Optional[date],
+) -> Doc:
+    q = _tx_filter(type_, category, student, date_from, date_to)
+    if after_id is not None:
+        q["id"] = {"$lt" if descending else "$gt": int(after_id)}
+    return q
+
+
+def _search_filter(query: SearchQuery) -> Optional[Doc]:
+    """Mongo-Filter zur Suchanfrage (alle Begriffe UND-verknüpft, in der Klasse); None, wenn nichts zu suchen ist."""
+    conds: List[Doc] = []
+    if query.words:
+        conds.append({"terms": {"$all": query.words}})
+    for num in query.numbers:
+        alts: List[Doc] = [{"amount": num.amount}]
+        if num.word and len(num.word) >= MIN_PREFIX:
+            alts.append({"terms": num.word[:MAX_PREFIX]})
+        conds.append(alts[0] if len(alts) == 1 else {"$or": alts})
+    if query.dates:
+        conds.append({"date": {"$in": [d.isoformat() for d in query.dates]}})
+    return {"$and": [{"class_id": current_class.get()}, *conds]} if conds else None
+
+
+def search_transaction_rows(q: str, after_id: Optional[int] = None, limit: int = 100, descending: bool = False) -> List[Doc]:
+    """Suche über den Präfix-Index `terms` plus Betrag/Datum, als Antwortzeilen (keyset-paginiert über id)."""
+    tx, _ = _require_tx_bal()
+    f = _search_filter(parse_query(q))
+    if f is None:
+        return []
+    if after_id is not None:
+        f["$and"].append({"id": {"$lt" if descending else "$gt": int(after_id)}})
+    docs = tx.find(f, projection=TX_ROW_PROJECTION).sort("id", -1 if descending else ASCENDING).limit(int(limit))
+    return [_tx_row(d) for d in docs]
+
+
+def rebuild_search_terms(batch_size: int = 1000) -> int:
+    """Setzt `terms` für alle Transaktionen der Klasse neu (Backfill für Daten von vor der Suche)."""
+    tx, _ = _require_tx_bal()
+    projection = {"_id": 1, **{f: 1 for f in SEARCH_FIELDS}}
+    ops: List[UpdateOne] = []
+    updated = 0
+    for d in tx.find({"class_id": current_class.get()}, projection=projection):
+        ops.append(UpdateOne({"_id": d["_id"]}, {"$set": {"terms": prefix_terms(doc_tokens(d.get(f) for f in SEARCH_FIELDS))}}))
+        if len(ops) >= batch_size:
+            tx.bulk_write(ops, ordered=False)
+            updated += len(ops)
+            ops = []
+    if ops:
+        tx.bulk_write(ops, ordered=False)
+        updated += len(ops)
+    return updated
+
+
+def _check_type(type_: str) -> None:
+    if type_ not in ("einzahlung", "ausgabe"):
+        raise ValueError("type_ must be 'einzahlung' or 'ausgabe'")
+
+
+def _check_new_transaction(type_: str, amount: float, current_total: float) -> None:
+    _check_type(type_)
+    if current_total + _signed_amount(type_, amount) < 0:
+        raise ValueError(OVERDRAFT_MSG)
+
+
 def get_transaction_by_id(tx_id: int) -> Optional[Transaction]:
     tx, _ = _require_tx_bal()
-    d = tx.find_one({"id": int(tx_id)})
+    d = tx.find_one({"id": int(tx_id), "class_id": current_class.get()})
     return _tx_to_model(d) if d else None
 
 
 def get_balance() -> Balance:
     _, bal = _require_tx_bal()
-    d = bal.find_one({"_id": "balance"})
+    d = bal.find_one({"_id": _balance_id()})
     if not d:
         return Balance(current_total=0.0)
     return Balance(current_total=float(d.get("current_total", 0.0)))
@@ -185,85 +859,186 @@ def create_transaction(
 ) -> Transaction:
     tx, bal = _require_tx_bal()
 
-    if type_ not in ("einzahlung", "ausgabe"):
-        raise ValueError("type_ must be 'einzahlung' or 'ausgabe'")
-
     if timestamp is None:
         timestamp = datetime.now()
 
     if date_ is None:
         date_ = date.today()
 
-    current_total = get_balance().current_total
-    new_total = current_total + float(amount) if type_ == "einzahlung" else current_total - float(amount)
-    if new_total < 0:
-        raise ValueError("Diese Transaktion würde den Kontostand ins Minus bringen.")
+    _check_type(type_)
 
-    new_id = _next_id_for(tx)
-    doc: Doc = {
-        "id": new_id,
-        "type": type_,
-        "amount": float(amount),
-        "description": str(description),
-        "timestamp": timestamp.isoformat(),
-        "category": str(category),
-        "student": str(student),
-        "date": date_.isoformat(),
-    }
+    student_id = _student_ids([student]).get(student, 0)
+    doc = _tx_doc(_next_id(COL_TX), type_, amount, description, timestamp, category, student, date_, student_id)
+    delta = _signed_amount(type_, amount)
+
+    def write(session: Optional[ClientSession]) -> None:
+        # Deckungsprüfung und Buchung atomar: zwei gleichzeitige Ausgaben können nicht beide durchgehen
+        if not _book_balance(bal, delta, -delta, session):
+            raise ValueError(OVERDRAFT_MSG)
+        try:
+            tx.insert_one(doc, session=session)
+        except PyMongoError:
+            if session is None:
+                _apply_balance_delta(bal, -delta)  # Buchung zurücknehmen
+            raise
+        _apply_rollups([doc], session=session)
+
+    _run_atomic(write)
+    return _tx_to_model(doc)
+
+
+def create_transactions_bulk(rows: Sequence[Dict[str, Any]]) -> Tuple[List[Transaction], List[Tuple[int, str]]]:
+    """
+    Legt viele Transaktionen mit einem insert_many an.
+    - rows: Dicts mit denselben Keywords wie create_transaction (type_, amount, ...)
+    - Rückgabe: (angelegte Transaktionen, [(Index in rows, Fehlermeldung), ...])
+    IDs werden als ein Block reserviert, der Kontostand einmal pro Aufruf (bedingt) gebucht.
+    """
+    tx, bal = _require_tx_bal()
+
+    for _ in range(BALANCE_RETRY_ATTEMPTS):
+        accepted, errors = _split_bulk_rows(rows, get_balance().current_total)
+        if not accepted:
+            return [], errors
+
+        student_ids = _student_ids([str(row.get("student", "")) for _, row in accepted])
+        docs = _bulk_docs(_reserve_ids(COL_TX, len(accepted)), accepted, student_ids)
+        created = _run_atomic(lambda session: _write_bulk(tx, bal, docs, accepted, errors, session))
+        if created is not None:
+            return [_tx_to_model(d) for d in created], errors
+
+    return [], sorted(errors + [(i, BALANCE_CONFLICT_MSG) for i, _ in accepted])
+
+
+def _write_bulk(
+    tx: Collection[Doc],
+    bal: Collection[Doc],
+    docs: List[Doc],
+    accepted: Sequence[Tuple[int, Dict[str, Any]]],
+    errors: List[Tuple[int, str]],
+    session: Optional[ClientSession],
+) -> Optional[List[Doc]]:
+    """Angelegte Dokumente, oder None, wenn der Kontostand die Zeilen seit dem Lesen nicht mehr deckt."""
+    deltas = [_signed_amount(d["type"], d["amount"]) for d in docs]
+    if not _book_balance(bal, sum(deltas), _balance_floor(deltas), session):
+        return None
+
+    inserted = len(docs)
+    try:
+        tx.insert_many(docs, ordered=True, session=session)
+    except BulkWriteError as e:
+        if session is not None:
+            raise  # in einer Transaktion bricht ein Schreibfehler ohnehin alles ab
+        inserted = _bulk_failure(e, accepted, errors)
+        _apply_balance_delta(bal, -sum(deltas[inserted:]))
+
+    created = docs[:inserted]
+    if created:
+        _apply_rollups(created, session=session)
+    return created
+
+
+def _split_bulk_rows(
+    rows: Sequence[Dict[str, Any]], running_total: float
+) -> Tuple[List[Tuple[int, Dict[str, Any]]], List[Tuple[int, str]]]:
+    """Prüft die Zeilen der Reihe nach gegen den laufenden Kontostand: (angenommene, Fehler)."""
+    errors: List[Tuple[int, str]] = []
+    accepted: List[Tuple[int, Dict[str, Any]]] = []
+    for i, row in enumerate(rows):
+        type_, amount = str(row.get("type_", "")), float(row.get("amount", 0.0))
+        try:
+            _check_new_transaction(type_, amount, running_total)
+        except ValueError as e:
+            errors.append((i, str(e)))
+            continue
+        running_total += _signed_amount(type_, amount)
+        accepted.append((i, row))
+    return accepted, errors
+
+
+def _bulk_docs(
+    ids: Iterable[int], accepted: Sequence[Tuple[int, Dict[str, Any]]], student_ids: Dict[str, int]
+) -> List[Doc]:
+    return [
+        _tx_doc(
+            new_id,
+            str(row["type_"]),
+            float(row.get("amount", 0.0)),
+            str(row.get("description", "")),
+            row.get("timestamp") or datetime.now(),
+            str(row.get("category", "")),
+            str(row.get("student", "")),
+            row.get("date_") or date.today(),
+            student_ids.get(str(row.get("student", "")), 0),
+        )
+        for new_id, (_, row) in zip(ids, accepted)
+    ]
 
-    tx.insert_one(doc)
-    _recalculate_balance(tx, bal)
 
-    created = tx.find_one({"id": new_id})
-    if not created:
-        raise RuntimeError("Insert failed: transaction not found after insert.")
-    return _tx_to_model(created)
+def _bulk_failure(e: BulkWriteError, accepted: Sequence[Tuple[int, Dict[str, Any]]], errors: List[Tuple[int, str]]) -> int:
+    # ordered=True: alles vor dem ersten Fehler ist geschrieben, der Rest nicht
+    inserted = int(e.details.get("nInserted", 0))
+    msg = str(e.details.get("writeErrors", [{}])[0].get("errmsg", "Insert fehlgeschlagen"))
+    errors.extend((i, msg) for i, _ in accepted[inserted:])
+    errors.sort()
+    return inserted
 
 
 def delete_transaction(tx_id: int) -> bool:
     tx, bal = _require_tx_bal()
-    res = tx.delete_one({"id": int(tx_id)})
-    if int(res.deleted_count) > 0:
-        _recalculate_balance(tx, bal)
+
+    def write(session: Optional[ClientSession]) -> bool:
+        deleted = tx.find_one_and_delete({"id": int(tx_id), "class_id": current_class.get()}, session=session)
+        if not deleted:
+            return False
+        _apply_balance_delta(bal, -_signed_amount(str(deleted.get("type", "")), float(deleted.get("amount", 0.0))), session)
+        _apply_rollups([deleted], sign=-1, session=session)
         return True
-    return False
+
+    return _run_atomic(write)
 
 
 # -------------------- Savings Goals --------------------
 
 def count_savings_goals() -> int:
     goals = _require_goals()
-    return int(goals.count_documents({}))
+    return int(goals.count_documents({"class_id": current_class.get()}))
 
 
 def get_savings_goals(limit: int = MAX_SAVING_GOALS) -> List[Dict[str, Any]]:
     goals = _require_goals()
-    docs = goals.find({}).sort("id", -1).limit(int(limit))
-    return [
-        {"id": int(d.get("id", 0)), "name": str(d.get("name", "")), "amount": float(d.get("amount", 0.0)), "created_at": str(d.get("created_at", ""))}
-        for d in docs
-    ]
+    docs = goals.find({"class_id": current_class.get()}).sort("id", -1).limit(int(limit))
+    return [_goal_out(d) for d in docs]
 
 
-def create_savings_goal(name: str, amount: float, created_at: Optional[datetime] = None) -> Dict[str, Any]:
-    goals = _require_goals()
+def _goal_out(d: Doc) -> Dict[str, Any]:
+    return {"id": int(d.get("id", 0)), "name": str(d.get("name", "")), "amount": float(d.get("amount", 0.0)), "created_at": str(d.get("created_at", ""))}
+
+
+def _clean_name(name: str) -> str:
     name = (name or "").strip()
     if not name:
         raise ValueError("Name darf nicht leer sein.")
+    return name
+
+
+def create_savings_goal(name: str, amount: float, created_at: Optional[datetime] = None) -> Dict[str, Any]:
+    goals = _require_goals()
+    name = _clean_name(name)
     if count_savings_goals() >= MAX_SAVING_GOALS:
         raise ValueError(f"Maximal {MAX_SAVING_GOALS} Sparziele erlaubt.")
     if created_at is None:
         created_at = datetime.now()
 
-    new_id = _next_id_for(goals)
+    new_id = _next_id(COL_GOALS)
     doc: Dict[str, Any] = {"id": new_id, "name": name, "amount": float(amount or 0.0), "created_at": created_at.isoformat()}
-    goals.insert_one(doc)  # Doc passt zu Collection[Doc]
+    goals.insert_one({"class_id": current_class.get(), **doc})  # Doc passt zu Collection[Doc]
     return doc
 
 
 def delete_savings_goal(goal_id: int) -> bool:
     goals = _require_goals()
-    res = goals.delete_one({"id": int(goal_id)})
+    res = goals.delete_one({"id": int(goal_id), "class_id": current_class.get()})
     return bool(res.deleted_count)
 
 
@@ -271,25 +1046,99 @@ def delete_savings_goal(goal_id: int) -> bool:
 
 def get_students() -> List[Dict[str, Any]]:
     students = _require_students()
-    docs = students.find({}).sort("id", ASCENDING)
-    return [{"id": int(d.get("id", 0)), "name": str(d.get("name", "")), "created_at": str(d.get("created_at", ""))} for d in docs]
+    docs = students.find({"class_id": current_class.get()}).sort("id", ASCENDING)
+    return [_student_out(d) for d in docs]
+
+
+def _student_ids(names: Iterable[str]) -> Dict[str, int]:
+    """Name -> students.id der aktuellen Klasse, eine Abfrage über den (class_id, name)-Index."""
+    wanted = sorted({n for n in names if n})
+    if not wanted:
+        return {}
+    docs = _require_students().find({"class_id": current_class.get(), "name": {"$in": wanted}}, {"name": 1, "id": 1})
+    return {str(d["name"]): int(d["id"]) for d in docs}
+
+
+def _link_student(tx: Collection[Doc], student: Doc) -> int:
+    """Ordnet die unter dem Namen gebuchten, noch keinem Schüler zugeordneten Transaktionen dem Schüler zu."""
+    res = tx.update_many(
+        {"class_id": student["class_id"], "student": student["name"], "student_id": {"$in": [0, None]}},
+        {"$set": {"student_id": int(student["id"])}},
+    )
+    return int(res.modified_count)
+
+
+def _student_out(d: Doc) -> Dict[str, Any]:
+    return {"id": int(d.get("id", 0)), "name": str(d.get("name", "")), "created_at": str(d.get("created_at", ""))}
 
 
 def create_student(name: str, created_at: Optional[datetime] = None) -> Dict[str, Any]:
     students = _require_students()
-    name = (name or "").strip()
-    if not name:
-        raise ValueError("Name darf nicht leer sein.")
+    name = _clean_name(name)
     if created_at is None:
         created_at = datetime.now()
 
-    new_id = _next_id_for(students)
+    new_id = _next_id(COL_STUDENTS)
     doc: Dict[str, Any] = {"id": new_id, "name": name, "created_at": created_at.isoformat()}
-    students.insert_one(doc)
+    class_id = current_class.get()
+    students.insert_one({"class_id": class_id, **doc})
+    # vorher unter dem Namen gebuchte Transaktionen zählen ab jetzt für diesen Schüler
+    tx, _ = _require_tx_bal()
+    if _link_student(tx, {"class_id": class_id, **doc}):
+        tx.aggregate(_sums_pipeline(class_id, "student_id", COL_STUDENT_BAL, {"student_id": new_id}))
     return doc
 
 
 def delete_student(student_id: int) -> bool:
     students = _require_students()
-    res = students.delete_one({"id": int(student_id)})
+    res = students.delete_one({"id": int(student_id), "class_id": current_class.get()})
+    if res.deleted_count:
+        _require_student_balances().delete_one({"_id": _class_key(int(student_id))})
     return bool(res.deleted_count)
+
+
+# -------------------- Kontostand pro Schüler --------------------
+# student_balances: {_id: "klasse/Schüler-id", income, expense, count}, über transactions.student_id == students.id verknüpft.
+# student_id wird beim Buchen aus dem Namen aufgelöst: ein umbenannter Schüler behält seine Summen,
+# ein neu angelegter Schüler mit dem Namen eines gelöschten beginnt bei null.
+
+def _student_balance_out(student: Doc, totals: Optional[Doc]) -> Dict[str, Any]:
+    totals = totals or {}
+    income, expense = float(totals.get("income", 0.0)), float(totals.get("expense", 0.0))
+    return {
+        "student_id": int(student.get("id", 0)),
+        "name": str(student.get("name", "")),
+        "income": income,
+        "expense": expense,
+        "balance": income - expense,
+        "count": int(totals.get("count", 0)),
+    }
+
+
+def get_student_balances() -> List[Dict[str, Any]]:
+    """Summen aller Schüler: eine Abfrage auf students plus eine $in-Abfrage auf student_balances (O(Schüler))."""
+    student_docs = list(_require_students().find({"class_id": current_class.get()}).sort("id", ASCENDING))
+    keys = [_class_key(int(d.get("id", 0))) for d in student_docs]
+    totals = {d["_id"]: d for d in _require_student_balances().find({"_id": {"$in": keys}})}
+    return [_student_balance_out(d, totals.get(key)) for d, key in zip(student_docs, keys)]
+
+
+def get_student_balance(student_id: int) -> Optional[Dict[str, Any]]:
+    student = _require_students().find_one({"id": int(student_id), "class_id": current_class.get()})
+    if not student:
+        return None
+    return _student_balance_out(student, _require_student_balances().find_one({"_id": _class_key(int(student.get("id", 0)))}))
+
+
+def rebuild_student_balances() -> int:
+    """
+    Baut die student_balances der Klasse aus ihren Transaktionen neu auf (Backfill für Bestandsdaten);
+    Transaktionen ohne student_id werden vorher über den Namen zugeordnet.
+    """
+    tx, _ = _require_tx_bal()
+    class_id = current_class.get()
+    for student in _require_students().find({"class_id": class_id}):
+        _link_student(tx, student)
+    _require_student_balances().delete_many({"_id": _class_range(class_id)})
+    tx.aggregate(student_balance_pipeline(class_id))
+    return int(_require_student_balances().count_documents({"_id": _class_range(class_id)}))
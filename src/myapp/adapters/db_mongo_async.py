@@ -0,0 +1,562 @@
+"""
+Async-Variante von db_mongo (MONGO_ASYNC=1) auf Basis von pymongos AsyncMongoClient.
+
+Gleiche Schnittstelle und gleiches Datenmodell wie db_mongo, nur als `async def`;
+Filter, Dokumentaufbau und Auswertungen werden aus db_mongo wiederverwendet.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple, TypeVar
+
+from pymongo import ASCENDING, AsyncMongoClient, ReturnDocument, UpdateOne
+from pymongo.asynchronous.client_session import AsyncClientSession
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from myapp.adapters.db_mongo import (
+    BALANCE_CONFLICT_MSG,
+    BALANCE_DRIFT_TOLERANCE,
+    BALANCE_RETRY_ATTEMPTS,
+    CHANGE_PIPELINE,
+    CHANGE_STREAM_OPTIONS,
+    CHANGE_STREAMS,
+    COL_BAL,
+    COL_COUNTERS,
+    COL_GOALS,
+    COL_ROLLUPS,
+    COL_STUDENT_BAL,
+    COL_STUDENTS,
+    COL_TX,
+    ID_BLOCK_SIZE,
+    MAX_SAVING_GOALS,
+    OVERDRAFT_MSG,
+    PLAN_CHECK,
+    SCHEMA_VERSION,
+    TX_ROW_PROJECTION,
+    TX_INDEXES,
+    USE_TRANSACTIONS,
+    Doc,
+    _CLASS,
+    _balance_floor,
+    _balance_id,
+    _bulk_docs,
+    _bulk_failure,
+    _canonical_queries,
+    _change_event,
+    _check_type,
+    _class_key,
+    _class_range,
+    _command_tracer,
+    _clean_name,
+    _daily_series,
+    _goal_out,
+    _health_result,
+    _page_filter,
+    _pool_stats,
+    _plan_result,
+    _report_query_plans,
+    _rollup_deltas,
+    _search_filter,
+    _signed_amount,
+    _split_bulk_rows,
+    _stats_range,
+    _student_balance_out,
+    _student_out,
+    _sums_pipeline,
+    _tx_doc,
+    _tx_row,
+    _tx_to_model,
+    rollup_pipeline,
+    student_balance_pipeline,
+    total_pipeline,
+)
+from myapp.adapters import db_mongo
+from myapp.adapters.mongo_settings import MongoSettings
+from myapp.adapters.search import SEARCH_FIELDS, doc_tokens, parse_query, prefix_terms
+from myapp.models import Balance, Transaction
+from myapp.tenancy import DEFAULT_CLASS, current_class
+
+T = TypeVar("T")
+
+_client: Optional[AsyncMongoClient[Doc]] = None
+_db: Optional[AsyncDatabase[Doc]] = None
+
+# pro Prozess reservierte ID-Blöcke: Sequenzname -> (nächste ID, Blockende exklusiv)
+_id_blocks: Dict[str, Tuple[int, int]] = {}
+_id_lock = asyncio.Lock()
+
+
+def _col(name: str) -> AsyncCollection[Doc]:
+    if _db is None:
+        raise RuntimeError("MongoDB not connected. Call db.connect() first.")
+    return _db[name]
+
+
+async def connect() -> None:
+    global _client, _db
+
+    settings = MongoSettings.from_env()
+    # Pool-Zähler und Einstellungen teilen sich beide Adapter (_health_result liest sie aus db_mongo)
+    db_mongo._settings = settings
+    _client = AsyncMongoClient[Doc](
+        settings.uri, event_listeners=[_pool_stats, _command_tracer], **settings.client_kwargs()
+    )
+    _db = _client[settings.db_name]
+    if settings.min_pool_size > 0:
+        await asyncio.gather(*(_client.admin.command("ping") for _ in range(settings.min_pool_size)))
+
+    await _migrate_to_classes()
+
+    tx = _col(COL_TX)
+    await tx.create_index([("id", ASCENDING)], unique=True)
+    for keys in TX_INDEXES:
+        await tx.create_index(keys)
+    await _col(COL_GOALS).create_index([("id", ASCENDING)], unique=True)
+    await _col(COL_GOALS).create_index([_CLASS, ("id", ASCENDING)])
+    await _col(COL_STUDENTS).create_index([("id", ASCENDING)], unique=True)
+    await _col(COL_STUDENTS).create_index([_CLASS, ("name", ASCENDING)], unique=True)
+    await _col(COL_STUDENTS).create_index([_CLASS, ("id", ASCENDING)])
+
+    await _col(COL_BAL).update_one({"_id": _balance_id(DEFAULT_CLASS)}, {"$setOnInsert": {"current_total": 0.0}}, upsert=True)
+
+    for name in (COL_TX, COL_GOALS, COL_STUDENTS):
+        last = await _col(name).find_one({}, sort=[("id", -1)], projection={"id": 1})
+        max_id = int(last.get("id", 0)) if last else 0
+        await _col(COL_COUNTERS).update_one({"_id": name}, {"$max": {"seq": max_id}}, upsert=True)
+
+    if CHANGE_STREAMS:
+        try:
+            await _db.command("collMod", COL_TX, changeStreamPreAndPostImages={"enabled": True})
+        except PyMongoError as e:
+            db_mongo.logger.info("Change-Stream-Pre-Images nicht verfügbar: %s", e)
+
+    if PLAN_CHECK in ("warn", "fail"):
+        _report_query_plans(await check_query_plans(), fail=PLAN_CHECK == "fail")
+
+
+async def _migrate_to_classes() -> None:
+    """Wie db_mongo._migrate_to_classes."""
+    schema = await _col(COL_COUNTERS).find_one({"_id": "schema"})
+    version = int(schema.get("version", 0)) if schema else 0
+    if version >= SCHEMA_VERSION:
+        return
+    if version < 2:
+        for name in (COL_TX, COL_GOALS, COL_STUDENTS):
+            await _col(name).update_many({"class_id": {"$exists": False}}, {"$set": {"class_id": DEFAULT_CLASS}})
+        if "name_1" in await _col(COL_STUDENTS).index_information():
+            await _col(COL_STUDENTS).drop_index("name_1")
+        await _col(COL_ROLLUPS).delete_many({"_id": {"$not": {"$regex": "/"}}})
+        token = current_class.set(DEFAULT_CLASS)
+        try:
+            await rebuild_daily_rollups()
+        finally:
+            current_class.reset(token)
+        db_mongo.logger.info("Datenmodell auf Klassen umgestellt (Bestand gehört zu %r)", DEFAULT_CLASS)
+    await _col(COL_STUDENT_BAL).delete_many({})
+    for class_id in await list_classes():
+        token = current_class.set(class_id)
+        try:
+            await rebuild_student_balances()
+        finally:
+            current_class.reset(token)
+    await _col(COL_COUNTERS).update_one({"_id": "schema"}, {"$set": {"version": SCHEMA_VERSION}}, upsert=True)
+
+
+async def list_classes() -> List[str]:
+    found: Set[Any] = set()
+    for name in (COL_TX, COL_STUDENTS, COL_GOALS):
+        found.update(await _col(name).distinct("class_id"))
+    return sorted(str(c) for c in found if c)
+
+
+async def disconnect() -> None:
+    global _client, _db
+    if _client is not None:
+        await _client.close()
+    _client = None
+    db_mongo._settings = None
+    _db = None
+    _id_blocks.clear()
+
+
+# -------------------- IDs --------------------
+
+async def _reserve_ids(name: str, count: int) -> range:
+    d = await _col(COL_COUNTERS).find_one_and_update(
+        {"_id": name},
+        {"$inc": {"seq": int(count)}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    end = int(d["seq"]) if d else int(count)
+    return range(end - int(count) + 1, end + 1)
+
+
+async def _next_id(name: str) -> int:
+    if ID_BLOCK_SIZE <= 1:
+        return (await _reserve_ids(name, 1)).start
+
+    async with _id_lock:
+        next_id, end = _id_blocks.get(name, (0, 0))
+        if next_id >= end:
+            block = await _reserve_ids(name, ID_BLOCK_SIZE)
+            next_id, end = block.start, block.stop
+        _id_blocks[name] = (next_id + 1, end)
+        return next_id
+
+
+# -------------------- Kontostand & Rollups --------------------
+
+async def _apply_balance_delta(delta: float, session: Optional[AsyncClientSession] = None) -> None:
+    await _col(COL_BAL).update_one({"_id": _balance_id()}, {"$inc": {"current_total": float(delta)}}, upsert=True, session=session)
+
+
+async def _book_balance(delta: float, floor: float, session: Optional[AsyncClientSession] = None) -> bool:
+    balance_id = _balance_id()
+    for _ in range(2):
+        res = await _col(COL_BAL).update_one(
+            {"_id": balance_id, "current_total": {"$gte": floor}},
+            {"$inc": {"current_total": float(delta)}},
+            session=session,
+        )
+        if res.matched_count == 1:
+            return True
+        # erste Buchung einer Klasse: Kontostand-Dokument anlegen und noch einmal versuchen
+        created = await _col(COL_BAL).update_one(
+            {"_id": balance_id}, {"$setOnInsert": {"current_total": 0.0}}, upsert=True, session=session
+        )
+        if created.upserted_id is None:
+            return False
+    return False
+
+
+async def _run_atomic(fn: Callable[[Optional[AsyncClientSession]], Awaitable[T]]) -> T:
+    if not USE_TRANSACTIONS:
+        return await fn(None)
+    if _client is None:
+        raise RuntimeError("MongoDB not connected. Call db.connect() first.")
+    async with _client.start_session() as session:
+        return await session.with_transaction(fn)
+
+
+async def _apply_rollups(docs: Sequence[Doc], sign: int = 1, session: Optional[AsyncClientSession] = None) -> None:
+    for name, key in ((COL_ROLLUPS, "date"), (COL_STUDENT_BAL, "student_id")):
+        deltas = _rollup_deltas(docs, sign, key=key)
+        if deltas:
+            ops = [UpdateOne({"_id": k}, {"$inc": inc}, upsert=True) for k, inc in deltas.items()]
+            await _col(name).bulk_write(ops, ordered=False, session=session)
+
+
+async def get_balance() -> Balance:
+    d = await _col(COL_BAL).find_one({"_id": _balance_id()})
+    if not d:
+        return Balance(current_total=0.0)
+    return Balance(current_total=float(d.get("current_total", 0.0)))
+
+
+async def reconcile_balance(fix: bool = False) -> Dict[str, Any]:
+    stored = (await get_balance()).current_total
+    computed = 0.0
+    async for x in await _col(COL_TX).aggregate(total_pipeline(current_class.get())):
+        computed = float(x.get("sum", 0.0))
+    drift = stored - computed
+
+    fixed = False
+    if fix and abs(drift) > BALANCE_DRIFT_TOLERANCE:
+        await _apply_balance_delta(-drift)
+        fixed = True
+
+    return {"stored": stored, "computed": computed, "drift": drift, "ok": abs(drift) <= BALANCE_DRIFT_TOLERANCE, "fixed": fixed}
+
+
+async def get_daily_stats(days: int = 30, end: Optional[date] = None) -> List[Dict[str, Any]]:
+    start, end = _stats_range(days, end)
+    docs = await _col(COL_ROLLUPS).find({"_id": _class_range(start=start.isoformat())}).to_list()
+    return _daily_series(docs, (await get_balance()).current_total, start, end)
+
+
+async def rebuild_daily_rollups() -> int:
+    class_id = current_class.get()
+    await _col(COL_ROLLUPS).delete_many({"_id": _class_range(class_id)})
+    await (await _col(COL_TX).aggregate(rollup_pipeline(class_id))).to_list()
+    return int(await _col(COL_ROLLUPS).count_documents({"_id": _class_range(class_id)}))
+
+
+async def check_query_plans() -> List[Dict[str, Any]]:
+    tx = _col(COL_TX)
+    return [_plan_result(name, await tx.find(q).sort("id", ASCENDING).limit(1).explain()) for name, q in _canonical_queries()]
+
+
+# -------------------- Health --------------------
+
+async def health() -> Dict[str, Any]:
+    if _client is None:
+        return _health_result(None, "MongoDB not connected.")
+    started = time.perf_counter()
+    try:
+        await _client.admin.command("ping")
+    except PyMongoError as e:
+        return _health_result(None, str(e))
+    return _health_result(round((time.perf_counter() - started) * 1000, 3))
+
+
+# -------------------- Change Stream --------------------
+
+async def watch_changes(on_open: Callable[[], None]) -> AsyncIterator[Doc]:
+    """Wie db_mongo.watch_changes; beendet wird durch Abbrechen des Tasks."""
+    if _db is None:
+        raise RuntimeError("MongoDB not connected. Call db.connect() first.")
+    async with await _db.watch(CHANGE_PIPELINE, **CHANGE_STREAM_OPTIONS) as stream:
+        on_open()
+        async for change in stream:
+            event = _change_event(change)
+            if event is not None:
+                yield event
+
+
+# -------------------- CRUD: Transactions --------------------
+
+async def get_all_transactions() -> List[Transaction]:
+    docs = await _col(COL_TX).find({"class_id": current_class.get()}).sort("id", ASCENDING).to_list()
+    return [_tx_to_model(d) for d in docs]
+
+
+async def query_transaction_rows(
+    after_id: Optional[int] = None,
+    limit: int = 100,
+    type_: Optional[str] = None,
+    category: Optional[str] = None,
+    student: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    descending: bool = False,
+) -> List[Doc]:
+    q = _page_filter(after_id, descending, type_, category, student, date_from, date_to)
+    cursor = _col(COL_TX).find(q, projection=TX_ROW_PROJECTION).sort("id", -1 if descending else ASCENDING)
+    return [_tx_row(d) for d in await cursor.limit(int(limit)).to_list()]
+
+
+async def search_transaction_rows(q: str, after_id: Optional[int] = None, limit: int = 100, descending: bool = False) -> List[Doc]:
+    f = _search_filter(parse_query(q))
+    if f is None:
+        return []
+    if after_id is not None:
+        f["$and"].append({"id": {"$lt" if descending else "$gt": int(after_id)}})
+    cursor = _col(COL_TX).find(f, projection=TX_ROW_PROJECTION).sort("id", -1 if descending else ASCENDING)
+    return [_tx_row(d) for d in await cursor.limit(int(limit)).to_list()]
+
+
+async def rebuild_search_terms(batch_size: int = 1000) -> int:
+    projection = {"_id": 1, **{f: 1 for f in SEARCH_FIELDS}}
+    ops: List[UpdateOne] = []
+    updated = 0
+    async for d in _col(COL_TX).find({"class_id": current_class.get()}, projection=projection):
+        ops.append(UpdateOne({"_id": d["_id"]}, {"$set": {"terms": prefix_terms(doc_tokens(d.get(f) for f in SEARCH_FIELDS))}}))
+        if len(ops) >= batch_size:
+            await _col(COL_TX).bulk_write(ops, ordered=False)
+            updated += len(ops)
+            ops = []
+    if ops:
+        await _col(COL_TX).bulk_write(ops, ordered=False)
+        updated += len(ops)
+    return updated
+
+
+async def get_transaction_by_id(tx_id: int) -> Optional[Transaction]:
+    d = await _col(COL_TX).find_one({"id": int(tx_id), "class_id": current_class.get()})
+    return _tx_to_model(d) if d else None
+
+
+async def create_transaction(
+    type_: str,
+    amount: float,
+    description: str = "",
+    timestamp: Optional[datetime] = None,
+    category: str = "",
+    student: str = "",
+    date_: Optional[date] = None,
+) -> Transaction:
+    if timestamp is None:
+        timestamp = datetime.now()
+    if date_ is None:
+        date_ = date.today()
+
+    _check_type(type_)
+
+    student_id = (await _student_ids([student])).get(student, 0)
+    doc = _tx_doc(await _next_id(COL_TX), type_, amount, description, timestamp, category, student, date_, student_id)
+    delta = _signed_amount(type_, amount)
+
+    async def write(session: Optional[AsyncClientSession]) -> None:
+        if not await _book_balance(delta, -delta, session):
+            raise ValueError(OVERDRAFT_MSG)
+        try:
+            await _col(COL_TX).insert_one(doc, session=session)
+        except PyMongoError:
+            if session is None:
+                await _apply_balance_delta(-delta)
+            raise
+        await _apply_rollups([doc], session=session)
+
+    await _run_atomic(write)
+    return _tx_to_model(doc)
+
+
+async def create_transactions_bulk(rows: Sequence[Dict[str, Any]]) -> Tuple[List[Transaction], List[Tuple[int, str]]]:
+    for _ in range(BALANCE_RETRY_ATTEMPTS):
+        accepted, errors = _split_bulk_rows(rows, (await get_balance()).current_total)
+        if not accepted:
+            return [], errors
+
+        student_ids = await _student_ids([str(row.get("student", "")) for _, row in accepted])
+        docs = _bulk_docs(await _reserve_ids(COL_TX, len(accepted)), accepted, student_ids)
+
+        async def write(session: Optional[AsyncClientSession]) -> Optional[List[Doc]]:
+            return await _write_bulk(docs, accepted, errors, session)
+
+        created = await _run_atomic(write)
+        if created is not None:
+            return [_tx_to_model(d) for d in created], errors
+
+    return [], sorted(errors + [(i, BALANCE_CONFLICT_MSG) for i, _ in accepted])
+
+
+async def _write_bulk(
+    docs: List[Doc],
+    accepted: Sequence[Tuple[int, Dict[str, Any]]],
+    errors: List[Tuple[int, str]],
+    session: Optional[AsyncClientSession],
+) -> Optional[List[Doc]]:
+    deltas = [_signed_amount(d["type"], d["amount"]) for d in docs]
+    if not await _book_balance(sum(deltas), _balance_floor(deltas), session):
+        return None
+
+    inserted = len(docs)
+    try:
+        await _col(COL_TX).insert_many(docs, ordered=True, session=session)
+    except BulkWriteError as e:
+        if session is not None:
+            raise
+        inserted = _bulk_failure(e, accepted, errors)
+        await _apply_balance_delta(-sum(deltas[inserted:]))
+
+    created = docs[:inserted]
+    if created:
+        await _apply_rollups(created, session=session)
+    return created
+
+
+async def delete_transaction(tx_id: int) -> bool:
+    async def write(session: Optional[AsyncClientSession]) -> bool:
+        deleted = await _col(COL_TX).find_one_and_delete({"id": int(tx_id), "class_id": current_class.get()}, session=session)
+        if not deleted:
+            return False
+        await _apply_balance_delta(-_signed_amount(str(deleted.get("type", "")), float(deleted.get("amount", 0.0))), session)
+        await _apply_rollups([deleted], sign=-1, session=session)
+        return True
+
+    return await _run_atomic(write)
+
+
+# -------------------- Savings Goals --------------------
+
+async def count_savings_goals() -> int:
+    return int(await _col(COL_GOALS).count_documents({"class_id": current_class.get()}))
+
+
+async def get_savings_goals(limit: int = MAX_SAVING_GOALS) -> List[Dict[str, Any]]:
+    docs = await _col(COL_GOALS).find({"class_id": current_class.get()}).sort("id", -1).limit(int(limit)).to_list()
+    return [_goal_out(d) for d in docs]
+
+
+async def create_savings_goal(name: str, amount: float, created_at: Optional[datetime] = None) -> Dict[str, Any]:
+    name = _clean_name(name)
+    if await count_savings_goals() >= MAX_SAVING_GOALS:
+        raise ValueError(f"Maximal {MAX_SAVING_GOALS} Sparziele erlaubt.")
+    if created_at is None:
+        created_at = datetime.now()
+
+    doc: Dict[str, Any] = {"id": await _next_id(COL_GOALS), "name": name, "amount": float(amount or 0.0), "created_at": created_at.isoformat()}
+    await _col(COL_GOALS).insert_one({"class_id": current_class.get(), **doc})
+    return doc
+
+
+async def delete_savings_goal(goal_id: int) -> bool:
+    res = await _col(COL_GOALS).delete_one({"id": int(goal_id), "class_id": current_class.get()})
+    return bool(res.deleted_count)
+
+
+# -------------------- Students --------------------
+
+async def get_students() -> List[Dict[str, Any]]:
+    docs = await _col(COL_STUDENTS).find({"class_id": current_class.get()}).sort("id", ASCENDING).to_list()
+    return [_student_out(d) for d in docs]
+
+
+async def _student_ids(names: Iterable[str]) -> Dict[str, int]:
+    wanted = sorted({n for n in names if n})
+    if not wanted:
+        return {}
+    docs = await _col(COL_STUDENTS).find(
+        {"class_id": current_class.get(), "name": {"$in": wanted}}, {"name": 1, "id": 1}
+    ).to_list()
+    return {str(d["name"]): int(d["id"]) for d in docs}
+
+
+async def _link_student(student: Doc) -> int:
+    res = await _col(COL_TX).update_many(
+        {"class_id": student["class_id"], "student": student["name"], "student_id": {"$in": [0, None]}},
+        {"$set": {"student_id": int(student["id"])}},
+    )
+    return int(res.modified_count)
+
+
+async def create_student(name: str, created_at: Optional[datetime] = None) -> Dict[str, Any]:
+    name = _clean_name(name)
+    if created_at is None:
+        created_at = datetime.now()
+
+    doc: Dict[str, Any] = {"id": await _next_id(COL_STUDENTS), "name": name, "created_at": created_at.isoformat()}
+    class_id = current_class.get()
+    await _col(COL_STUDENTS).insert_one({"class_id": class_id, **doc})
+    if await _link_student({"class_id": class_id, **doc}):
+        pipeline = _sums_pipeline(class_id, "student_id", COL_STUDENT_BAL, {"student_id": doc["id"]})
+        await (await _col(COL_TX).aggregate(pipeline)).to_list()
+    return doc
+
+
+async def delete_student(student_id: int) -> bool:
+    res = await _col(COL_STUDENTS).delete_one({"id": int(student_id), "class_id": current_class.get()})
+    if res.deleted_count:
+        await _col(COL_STUDENT_BAL).delete_one({"_id": _class_key(int(student_id))})
+    return bool(res.deleted_count)
+
+
+# -------------------- Kontostand pro Schüler --------------------
+
+async def get_student_balances() -> List[Dict[str, Any]]:
+    student_docs = await _col(COL_STUDENTS).find({"class_id": current_class.get()}).sort("id", ASCENDING).to_list()
+    keys = [_class_key(int(d.get("id", 0))) for d in student_docs]
+    totals = {d["_id"]: d for d in await _col(COL_STUDENT_BAL).find({"_id": {"$in": keys}}).to_list()}
+    return [_student_balance_out(d, totals.get(key)) for d, key in zip(student_docs, keys)]
+
+
+async def get_student_balance(student_id: int) -> Optional[Dict[str, Any]]:
+    student = await _col(COL_STUDENTS).find_one({"id": int(student_id), "class_id": current_class.get()})
+    if not student:
+        return None
+    return _student_balance_out(student, await _col(COL_STUDENT_BAL).find_one({"_id": _class_key(int(student.get("id", 0)))}))
+
+
+async def rebuild_student_balances() -> int:
+    class_id = current_class.get()
+    async for student in _col(COL_STUDENTS).find({"class_id": class_id}):
+        await _link_student(student)
+    await _col(COL_STUDENT_BAL).delete_many({"_id": _class_range(class_id)})
+    await (await _col(COL_TX).aggregate(student_balance_pipeline(class_id))).to_list()
+    return int(await _col(COL_STUDENT_BAL).count_documents({"_id": _class_range(class_id)}))
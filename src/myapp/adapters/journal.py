@@ -0,0 +1,202 @@
+"""
+Append-only Journal mit Snapshots für die In-Memory-Datenbank (MEMORY_DATA_DIR).
+
+- journal.ndjson: eine Operation pro Zeile ({"seq": n, "op": ..., ...}), fsync gebündelt
+- snapshot.ndjson: Kopfzeile {"seq": n, ...} + eine kompakte Zeile pro Datensatz,
+  wird beim Start per mmap zeilenweise gelesen
+Nach einem Snapshot wird das Journal geleert; beim Start wird nur der Rest nach
+der Snapshot-Sequenz nachgespielt.
+- journal.lock: exklusive Sperre, solange ein Prozess das Verzeichnis nutzt – ein zweiter
+  (z. B. manage neben dem laufenden Backend) würde beim Beenden Snapshot und Journal überschreiben
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: ohne Sperre
+    fcntl = None  # type: ignore[assignment]
+
+JOURNAL_FILE = "journal.ndjson"
+SNAPSHOT_FILE = "snapshot.ndjson"
+LOCK_FILE = "journal.lock"
+
+
+def _dumps(obj: Any) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def _fsync_dir(directory: str) -> None:
+    """Macht Anlegen/Umbenennen von Dateien im Verzeichnis dauerhaft (POSIX; sonst nichts zu tun)."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class Journal:
+    def __init__(self, directory: str, fsync_every: int = 32, fsync_interval: float = 0.05) -> None:
+        self.directory = directory
+        self.fsync_every = max(1, fsync_every)
+        self.fsync_interval = fsync_interval
+
+        self.seq = 0
+        self.ops_since_snapshot = 0
+        self._file: Optional[Any] = None
+        # Ende der letzten vollständigen Zeile, von read_tail ermittelt
+        self._valid_end: Optional[int] = None
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        self._lock = threading.Lock()
+        # fsynct offene Einträge spätestens fsync_interval nach dem ersten, auch ohne weiteres append
+        self._timer: Optional[threading.Timer] = None
+        self._lock_file: Optional[Any] = None
+
+    @property
+    def journal_path(self) -> str:
+        return os.path.join(self.directory, JOURNAL_FILE)
+
+    @property
+    def snapshot_path(self) -> str:
+        return os.path.join(self.directory, SNAPSHOT_FILE)
+
+    # ---------- Sperre ----------
+    def lock(self) -> None:
+        """Exklusive Sperre auf das Verzeichnis; RuntimeError, wenn ein anderer Prozess es nutzt."""
+        os.makedirs(self.directory, exist_ok=True)
+        f = open(os.path.join(self.directory, LOCK_FILE), "a+b")
+        if fcntl is not None:
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                f.close()
+                raise RuntimeError(f"{self.directory} wird bereits von einem anderen Prozess verwendet (journal.lock)")
+        self._lock_file = f
+
+    # ---------- Laden ----------
+    def read_snapshot(self) -> Tuple[Dict[str, Any], Iterator[List[Any]]]:
+        """Kopfzeile und Zeilen des letzten Snapshots (leer, wenn es keinen gibt)."""
+        if not os.path.exists(self.snapshot_path) or os.path.getsize(self.snapshot_path) == 0:
+            return {"seq": 0}, iter(())
+
+        with open(self.snapshot_path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = json.loads(mm.readline())
+        self.seq = int(header.get("seq", 0))
+
+        def rows() -> Iterator[List[Any]]:
+            try:
+                for line in iter(mm.readline, b""):
+                    yield json.loads(line)
+            finally:
+                mm.close()
+
+        return header, rows()
+
+    def read_tail(self) -> Iterator[Dict[str, Any]]:
+        """
+        Journal-Einträge nach dem Snapshot; eine abgeschnittene letzte Zeile (Absturz) wird ignoriert
+        und von open() entfernt, damit neue Einträge nicht an ihr hängen.
+        """
+        self._valid_end = 0
+        if not os.path.exists(self.journal_path):
+            return
+        snapshot_seq = self.seq
+        with open(self.journal_path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                self._valid_end += len(line)
+                seq = int(record.get("seq", 0))
+                if seq <= snapshot_seq:
+                    continue
+                self.seq = seq
+                self.ops_since_snapshot += 1
+                yield record
+
+    # ---------- Schreiben ----------
+    def open(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        self._file = open(self.journal_path, "ab")
+        if self._valid_end is not None and self._file.tell() > self._valid_end:
+            self._file.truncate(self._valid_end)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def append(self, op: str, **data: Any) -> None:
+        with self._lock:
+            if self._file is None:
+                raise RuntimeError("Journal nicht geöffnet.")
+            self.seq += 1
+            self._file.write(_dumps({"seq": self.seq, "op": op, **data}))
+            # flush: übersteht einen Prozessabsturz; fsync (Stromausfall) nur gebündelt
+            self._file.flush()
+            self._pending += 1
+            self.ops_since_snapshot += 1
+            if self._pending >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._sync_locked()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.fsync_interval, self.sync)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _sync_locked(self) -> None:
+        if self._file is not None and self._pending:
+            os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        if self._timer is not None:
+            self._timer.cancel()  # läuft der Timer gerade selbst, ist cancel wirkungslos
+            self._timer = None
+
+    def sync(self) -> None:
+        with self._lock:
+            self._sync_locked()
+
+    def write_snapshot(self, header: Dict[str, Any], rows: Iterable[List[Any]]) -> None:
+        """Schreibt den Snapshot atomar (tmp + rename) und leert danach das Journal."""
+        with self._lock:
+            tmp = self.snapshot_path + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(_dumps({**header, "seq": self.seq}))
+                for row in rows:
+                    f.write(_dumps(row))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.snapshot_path)
+            # erst wenn das Umbenennen dauerhaft ist, darf das Journal geleert werden
+            _fsync_dir(self.directory)
+
+            # stürzt der Prozess hier ab, überspringt read_tail die schon enthaltenen seq
+            if self._file is not None:
+                self._file.close()
+            self._file = open(self.journal_path, "wb")
+            self._pending = 0
+            self.ops_since_snapshot = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._sync_locked()
+            if self._file is not None:
+                self._file.close()
+            self._file = None
+            if self._lock_file is not None:
+                self._lock_file.close()  # gibt die Sperre frei
+            self._lock_file = None
@@ -0,0 +1,192 @@
+"""
+Verbindungseinstellungen für die MongoDB-Adapter (sync und async), aus Umgebungsvariablen.
+
+    MONGO_URI, MONGO_DB
+    MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE, MONGO_MAX_IDLE_TIME_MS, MONGO_WAIT_QUEUE_TIMEOUT_MS
+    MONGO_SERVER_SELECTION_TIMEOUT_MS, MONGO_CONNECT_TIMEOUT_MS, MONGO_SOCKET_TIMEOUT_MS
+    MONGO_COMPRESSORS (z. B. "zstd,snappy,zlib")
+    MONGO_WRITE_CONCERN_W (Zahl oder "majority"), MONGO_WRITE_CONCERN_J, MONGO_WRITE_CONCERN_TIMEOUT_MS
+    MONGO_RETRY_WRITES (Standard an: einzelne Schreibvorgänge werden bei Netzwerkfehlern genau einmal wiederholt)
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Union
+
+from pymongo import monitoring
+
+from myapp.tracing import record_round_trip
+
+
+def _env_int(name: str, default: Optional[int]) -> Optional[int]:
+    raw = os.getenv(name, "").strip()
+    return int(raw) if raw else default
+
+
+def _env_bool(name: str) -> Optional[bool]:
+    raw = os.getenv(name, "").strip().lower()
+    if not raw:
+        return None
+    return raw in {"1", "true", "yes"}
+
+
+@dataclass(frozen=True)
+class MongoSettings:
+    uri: str = "mongodb://mongo:27017"
+    db_name: str = "klassenkassa"
+
+    max_pool_size: int = 100
+    min_pool_size: int = 0
+    max_idle_time_ms: Optional[int] = None
+    wait_queue_timeout_ms: Optional[int] = None
+
+    server_selection_timeout_ms: int = 5000
+    connect_timeout_ms: int = 5000
+    socket_timeout_ms: Optional[int] = None
+
+    compressors: List[str] = field(default_factory=list)
+
+    write_concern_w: Union[int, str] = 1
+    write_concern_j: Optional[bool] = None
+    write_concern_timeout_ms: Optional[int] = None
+    retry_writes: bool = True
+
+    app_name: str = "klassenkassa-backend"
+
+    @classmethod
+    def from_env(cls) -> "MongoSettings":
+        w_raw = os.getenv("MONGO_WRITE_CONCERN_W", "1").strip()
+        return cls(
+            uri=os.getenv("MONGO_URI", cls.uri),
+            db_name=os.getenv("MONGO_DB", cls.db_name),
+            max_pool_size=_env_int("MONGO_MAX_POOL_SIZE", cls.max_pool_size) or cls.max_pool_size,
+            min_pool_size=_env_int("MONGO_MIN_POOL_SIZE", cls.min_pool_size) or 0,
+            max_idle_time_ms=_env_int("MONGO_MAX_IDLE_TIME_MS", None),
+            wait_queue_timeout_ms=_env_int("MONGO_WAIT_QUEUE_TIMEOUT_MS", None),
+            server_selection_timeout_ms=_env_int("MONGO_SERVER_SELECTION_TIMEOUT_MS", cls.server_selection_timeout_ms)
+            or cls.server_selection_timeout_ms,
+            connect_timeout_ms=_env_int("MONGO_CONNECT_TIMEOUT_MS", cls.connect_timeout_ms) or cls.connect_timeout_ms,
+            socket_timeout_ms=_env_int("MONGO_SOCKET_TIMEOUT_MS", None),
+            compressors=[c.strip() for c in os.getenv("MONGO_COMPRESSORS", "").split(",") if c.strip()],
+            write_concern_w=int(w_raw) if w_raw.isdigit() else w_raw,
+            write_concern_j=_env_bool("MONGO_WRITE_CONCERN_J"),
+            write_concern_timeout_ms=_env_int("MONGO_WRITE_CONCERN_TIMEOUT_MS", None),
+            retry_writes=_env_bool("MONGO_RETRY_WRITES") is not False,
+        )
+
+    def client_kwargs(self) -> Dict[str, Any]:
+        """Keyword-Argumente für MongoClient / AsyncMongoClient (nicht gesetzte Werte = pymongo-Default)."""
+        kwargs: Dict[str, Any] = {
+            "maxPoolSize": self.max_pool_size,
+            "minPoolSize": self.min_pool_size,
+            "serverSelectionTimeoutMS": self.server_selection_timeout_ms,
+            "connectTimeoutMS": self.connect_timeout_ms,
+            "appname": self.app_name,
+            "w": self.write_concern_w,
+            "retryWrites": self.retry_writes,
+        }
+        optional = {
+            "maxIdleTimeMS": self.max_idle_time_ms,
+            "waitQueueTimeoutMS": self.wait_queue_timeout_ms,
+            "socketTimeoutMS": self.socket_timeout_ms,
+            "journal": self.write_concern_j,
+            "wTimeoutMS": self.write_concern_timeout_ms,
+        }
+        kwargs.update({k: v for k, v in optional.items() if v is not None})
+        if self.compressors:
+            kwargs["compressors"] = ",".join(self.compressors)
+        return kwargs
+
+    def summary(self) -> Dict[str, Any]:
+        """Einstellungen ohne URI (kann Zugangsdaten enthalten), z. B. für /health/db."""
+        return {
+            "db_name": self.db_name,
+            "max_pool_size": self.max_pool_size,
+            "min_pool_size": self.min_pool_size,
+            "server_selection_timeout_ms": self.server_selection_timeout_ms,
+            "socket_timeout_ms": self.socket_timeout_ms,
+            "compressors": self.compressors,
+            "write_concern_w": self.write_concern_w,
+        }
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """Zählt Ereignisse des Verbindungspools (CMAP) mit, für /health/db."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.created = 0
+        self.closed = 0
+        self.checked_out = 0
+        self.checkout_failed = 0
+        self.cleared = 0
+
+    def _inc(self, name: str, delta: int = 1) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + delta)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "open": self.created - self.closed,
+                "in_use": self.checked_out,
+                "created": self.created,
+                "closed": self.closed,
+                "checkout_failed": self.checkout_failed,
+                "cleared": self.cleared,
+            }
+
+    def pool_created(self, event: monitoring.PoolCreatedEvent) -> None:
+        pass
+
+    def pool_ready(self, event: monitoring.PoolReadyEvent) -> None:
+        pass
+
+    def pool_cleared(self, event: monitoring.PoolClearedEvent) -> None:
+        self._inc("cleared")
+
+    def pool_closed(self, event: monitoring.PoolClosedEvent) -> None:
+        pass
+
+    def connection_created(self, event: monitoring.ConnectionCreatedEvent) -> None:
+        self._inc("created")
+
+    def connection_ready(self, event: monitoring.ConnectionReadyEvent) -> None:
+        pass
+
+    def connection_closed(self, event: monitoring.ConnectionClosedEvent) -> None:
+        self._inc("closed")
+
+    def connection_check_out_started(self, event: monitoring.ConnectionCheckOutStartedEvent) -> None:
+        pass
+
+    def connection_check_out_failed(self, event: monitoring.ConnectionCheckOutFailedEvent) -> None:
+        self._inc("checkout_failed")
+
+    def connection_checked_out(self, event: monitoring.ConnectionCheckedOutEvent) -> None:
+        self._inc("checked_out")
+
+    def connection_checked_in(self, event: monitoring.ConnectionCheckedInEvent) -> None:
+        self._inc("checked_out", -1)
+
+
+class CommandTracer(monitoring.CommandListener):
+    """Zählt Roundtrips und gelieferte Dokumente dem gerade laufenden DBPort-Aufruf zu (myapp.tracing)."""
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        pass
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        reply = event.reply
+        cursor = reply.get("cursor")
+        if isinstance(cursor, dict):
+            documents = len(cursor.get("firstBatch") or cursor.get("nextBatch") or ())
+        else:
+            documents = 1 if reply.get("value") is not None else 0  # findAndModify
+        record_round_trip(documents)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        record_round_trip()
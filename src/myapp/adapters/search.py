@@ -0,0 +1,156 @@
+"""
+Volltextsuche über Transaktionen (GET /transactions/search), gemeinsam für alle Adapter.
+
+Eine Suchanfrage besteht aus Begriffen, die alle zutreffen müssen (mehrere Datumsangaben: eines davon):
+- Wörter: Präfix eines Wortes in Beschreibung, Kategorie, Schüler oder Typ ("aus" findet "Ausflug")
+- Zahlen ("12", "12,50", "12.50€"): Betrag gleich dieser Zahl oder – nur ganze Zahlen – Wortpräfix
+- Datum ("2025-03-01" oder "01.03.2025"): Buchungsdatum
+Wörter kürzer als MIN_PREFIX werden ignoriert.
+
+db_memory hält dafür einen invertierten Index (SearchIndex), db_mongo speichert die Präfixe
+jeder Transaktion im Feld `terms` mit einem Multikey-Index.
+"""
+
+from __future__ import annotations
+
+import heapq
+import re
+from bisect import bisect_left, insort
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+MIN_PREFIX = 2
+MAX_PREFIX = 20
+
+SEARCH_FIELDS = ("description", "category", "student", "type")
+
+_WORD = re.compile(r"\w+")
+_AMOUNT = re.compile(r"^(\d+)(?:[.,](\d{1,2}))?€?$")
+
+
+@dataclass
+class NumberTerm:
+    amount: float
+    word: Optional[str] = None  # bei ganzen Zahlen zusätzlich als Wortpräfix
+
+
+@dataclass
+class SearchQuery:
+    words: List[str] = field(default_factory=list)
+    numbers: List[NumberTerm] = field(default_factory=list)
+    dates: List[date] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.words or self.numbers or self.dates)
+
+
+def tokenize(text: str) -> List[str]:
+    return _WORD.findall((text or "").lower())
+
+
+def _parse_date(token: str) -> Optional[date]:
+    for fmt in ("%Y-%m-%d", "%d.%m.%Y"):
+        try:
+            return datetime.strptime(token, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_query(q: str) -> SearchQuery:
+    query = SearchQuery()
+    for raw in (q or "").lower().split():
+        day = _parse_date(raw)
+        if day is not None:
+            query.dates.append(day)
+            continue
+        m = _AMOUNT.match(raw)
+        if m:
+            whole, cents = m.groups()
+            query.numbers.append(NumberTerm(float(f"{whole}.{cents or 0}"), None if cents else whole))
+            continue
+        query.words.extend(w[:MAX_PREFIX] for w in tokenize(raw) if len(w) >= MIN_PREFIX)
+    return query
+
+
+def doc_tokens(values: Iterable[Any]) -> Set[str]:
+    tokens: Set[str] = set()
+    for value in values:
+        tokens.update(tokenize(str(value or "")))
+    return tokens
+
+
+def prefix_terms(tokens: Iterable[str]) -> List[str]:
+    """Alle Präfixe (MIN_PREFIX..MAX_PREFIX Zeichen) der Wörter – das Feld `terms` im Mongo-Adapter."""
+    terms: Set[str] = set()
+    for token in tokens:
+        for n in range(MIN_PREFIX, min(len(token), MAX_PREFIX) + 1):
+            terms.add(token[:n])
+    return sorted(terms)
+
+
+class SearchIndex:
+    """Invertierter Index für db_memory: Wort -> IDs, Betrag -> IDs, Datum -> IDs."""
+
+    def __init__(self) -> None:
+        self._postings: Dict[str, Set[int]] = {}
+        self._tokens: List[str] = []  # sortiert, für Präfixbereiche per Bisektion
+        self._amounts: Dict[float, Set[int]] = {}
+        self._dates: Dict[date, Set[int]] = {}
+
+    def add(self, tx_id: int, tokens: Iterable[str], amount: float, day: Optional[date]) -> None:
+        for token in tokens:
+            ids = self._postings.get(token)
+            if ids is None:
+                ids = self._postings[token] = set()
+                insort(self._tokens, token)
+            ids.add(tx_id)
+        self._amounts.setdefault(round(amount, 2), set()).add(tx_id)
+        if day is not None:
+            self._dates.setdefault(day, set()).add(tx_id)
+
+    def remove(self, tx_id: int, tokens: Iterable[str], amount: float, day: Optional[date]) -> None:
+        for token in tokens:
+            ids = self._postings.get(token)
+            if ids is not None:
+                ids.discard(tx_id)
+                if not ids:
+                    del self._postings[token]
+                    del self._tokens[bisect_left(self._tokens, token)]
+        self._amounts.get(round(amount, 2), set()).discard(tx_id)
+        if day is not None:
+            self._dates.get(day, set()).discard(tx_id)
+
+    def _prefix(self, prefix: str) -> Set[int]:
+        out: Set[int] = set()
+        i = bisect_left(self._tokens, prefix)
+        while i < len(self._tokens) and self._tokens[i].startswith(prefix):
+            out |= self._postings[self._tokens[i]]
+            i += 1
+        return out
+
+    def search(self, query: SearchQuery, after_id: Optional[int] = None, limit: int = 100, descending: bool = False) -> List[int]:
+        """IDs aller Treffer (UND über die Begriffe), sortiert und ab `after_id` paginiert."""
+        candidates: List[Set[int]] = [self._prefix(w) for w in query.words]
+        for num in query.numbers:
+            ids = set(self._amounts.get(round(num.amount, 2), ()))
+            if num.word and len(num.word) >= MIN_PREFIX:
+                ids |= self._prefix(num.word)
+            candidates.append(ids)
+        if query.dates:
+            candidates.append(set().union(*(self._dates.get(d, set()) for d in query.dates)))
+        if not candidates:
+            return []
+
+        candidates.sort(key=len)
+        hits = set(candidates[0])
+        for ids in candidates[1:]:
+            hits &= ids
+            if not hits:
+                return []
+
+        if after_id is not None:
+            hits = {i for i in hits if (i < after_id if descending else i > after_id)}
+        # nur die nächste Seite sortieren (O(Treffer · log limit))
+        return heapq.nlargest(int(limit), hits) if descending else heapq.nsmallest(int(limit), hits)
@@ -1,28 +1,163 @@
 from __future__ import annotations
 
-from datetime import date as Date, datetime
-from typing import Any, Dict, List, Optional, Protocol, Sequence, Tuple, cast
-
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, Field
+import asyncio
+import csv
+import inspect
+import io
+import json
+import logging
+import math
+import os
+import secrets
+import threading
+import time
+import zlib
+from datetime import date as Date, datetime, timedelta
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Protocol, Sequence, Tuple, cast
+
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+from starlette.concurrency import run_in_threadpool
+
+try:
+    import orjson
+except ImportError:  # orjson ist optional, sonst Standard-json
+    orjson = None  # type: ignore[assignment]
 
 import myapp.adapters as adapters
+from myapp.backend.cache import CacheEntry, ResponseCache, make_etag
+from myapp.backend import metrics
+from myapp.backend.events import ChangeFeed
+from myapp.backend.profiling import ProfilingMiddleware, profiler
+from myapp.tenancy import CLASS_ID_PATTERN, current_class
+from myapp.tracing import DbCall, current_call, request_calls
 
 app = FastAPI(title="Klassenkassa Backend")
 
+# Request- und DBPort-Metriken für GET /metrics (METRICS_ENABLED=0: keine Middleware, keine Messung)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1").lower() in {"1", "true", "yes"}
+if METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+
+# Profile langsamer Requests (PROFILE_SLOW_MS, zur Laufzeit über /admin/profiling); immer eingehängt,
+# ausgeschaltet nur eine Abfrage pro Request
+app.add_middleware(ProfilingMiddleware)
+
+CLASS_PREFIX = "/classes/"
+
+
+class ClassRoutingMiddleware:
+    """
+    /classes/{class_id}/pfad wird wie /pfad geroutet, mit current_class = class_id für alle Adapteraufrufe
+    des Requests; Pfade ohne Präfix gehören zu DEFAULT_CLASS. Als äußerste Middleware eingehängt, damit
+    Metriken und Profile die Route ohne Klasse sehen (eine Zeitreihe je Route, nicht je Klasse).
+    """
+
+    def __init__(self, app: metrics.ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: metrics.Scope, receive: metrics.Receive, send: metrics.Send) -> None:
+        path = scope.get("path", "")
+        if scope["type"] != "http" or not path.startswith(CLASS_PREFIX):
+            await self.app(scope, receive, send)
+            return
+        class_id = path[len(CLASS_PREFIX):].split("/", 1)[0]
+        if not CLASS_ID_PATTERN.match(class_id):
+            await JSONResponse({"detail": "Ungültige Klassen-ID"}, status_code=404)(scope, receive, send)
+            return
+        # root_path um das Präfix verlängern: das Routing sieht /pfad, request.url bleibt die volle URL
+        root_path = scope.get("root_path", "") + CLASS_PREFIX + class_id
+        token = current_class.set(class_id)
+        try:
+            await self.app({**scope, "root_path": root_path}, receive, send)
+        finally:
+            current_class.reset(token)
+
+
+app.add_middleware(ClassRoutingMiddleware)
+
+# Pflicht für /admin/* (Header X-Admin-Token); ohne gesetzten Token sind die Admin-Routen gesperrt
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
 MAX_SAVING_GOALS = 3
 
+TX_PAGE_DEFAULT = 200
+TX_PAGE_MAX = 1000
+
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "500"))
+BULK_MAX_REPORTED_ERRORS = 1000
+
+# Sparziel-Prognose: mittlerer Netto-Zufluss pro Tag über diesen Zeitraum (aus den Tages-Rollups)
+GOAL_TREND_DAYS = int(os.getenv("GOAL_TREND_DAYS", "30"))
+
+# Export liest in Blöcken (Keyset über id), der Speicherbedarf hängt nur von dieser Größe ab
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "2000"))
+
+EXPORT_MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson", "columnar": "application/x-ndjson"}
+
+# Antwort-Cache der Lese-Endpunkte; RESPONSE_CACHE_SIZE=0 schaltet ihn ab (ETag/304 bleibt)
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "30"))
+
+# Cache-Gruppen, die ein Schreibzugriff auf Transaktionen ungültig macht
+# ("dashboard" hängt von allem ab und wird bei jedem Schreibzugriff mit invalidiert)
+TX_GROUPS = ("transactions", "balance", "student_balances", "savings_goals", "dashboard")
+STUDENT_GROUPS = ("students", "student_balances", "dashboard")
+GOAL_GROUPS = ("savings_goals", "dashboard")
+
+# GET /dashboard: Spalten der Tabellen in der Oberfläche
+DASHBOARD_STATS_DAYS = 14
+DASHBOARD_GOAL_FIELDS = ["id", "name", "amount", "percent", "remaining", "projected_date", "saved", "funding_order"]
+DASHBOARD_STUDENT_FIELDS = ["id", "name"]
+DASHBOARD_STATS_FIELDS = ["date", "income", "expense", "balance"]
+
+cache = ResponseCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL)
+
+# Änderungs-Feed (GET /events): so viele Ereignisse bleiben für Wiederverbindungen (Last-Event-ID) erhalten
+CHANGE_FEED_HISTORY = int(os.getenv("CHANGE_FEED_HISTORY", "256"))
+EVENTS_HEARTBEAT = 15.0
+CHANGE_STREAM_RETRY_DELAY = 5.0
+
+feed = ChangeFeed(CHANGE_FEED_HISTORY)
+_feed_stop = threading.Event()
+_feed_task: Optional["asyncio.Task[None]"] = None
+
+logger = logging.getLogger(__name__)
+
 
 class BalanceLike(Protocol):
     current_total: float
 
 
 class DBPort(Protocol):
+    """
+    Schnittstelle der DB-Adapter. Ein Adapter darf die Methoden auch als `async def`
+    anbieten (db_mongo_async); die Routen rufen sie immer über `_call` auf.
+    """
+
     def connect(self) -> None: ...
     def disconnect(self) -> None: ...
 
     def get_all_transactions(self) -> Sequence[Any]: ...
 
+    def query_transaction_rows(
+        self,
+        after_id: Optional[int] = None,
+        limit: int = 100,
+        type_: Optional[str] = None,
+        category: Optional[str] = None,
+        student: Optional[str] = None,
+        date_from: Optional[Date] = None,
+        date_to: Optional[Date] = None,
+        descending: bool = False,
+    ) -> List[Dict[str, Any]]: ...
+
+    def search_transaction_rows(
+        self, q: str, after_id: Optional[int] = None, limit: int = 100, descending: bool = False
+    ) -> List[Dict[str, Any]]: ...
+
     def create_transaction(
         self,
         type_: str,
@@ -34,23 +169,122 @@ class DBPort(Protocol):
         date_: Optional[Date] = None,
     ) -> Any: ...
 
+    def create_transactions_bulk(
+        self, rows: Sequence[Dict[str, Any]]
+    ) -> Tuple[Sequence[Any], List[Tuple[int, str]]]: ...
+
     def delete_transaction(self, tx_id: int) -> bool: ...
     def get_balance(self) -> BalanceLike: ...
+    def reconcile_balance(self, fix: bool = False) -> Dict[str, Any]: ...
+    def health(self) -> Dict[str, Any]: ...
 
     def get_savings_goals(self, limit: int = 3) -> List[Dict[str, Any]]: ...
     def create_savings_goal(self, name: str, amount: float, created_at: datetime) -> Dict[str, Any]: ...
     def delete_savings_goal(self, goal_id: int) -> bool: ...
 
+    def get_daily_stats(self, days: int = 30, end: Optional[Date] = None) -> List[Dict[str, Any]]: ...
+    def rebuild_daily_rollups(self) -> int: ...
+
     def get_students(self) -> List[Dict[str, Any]]: ...
     def create_student(self, name: str, created_at: datetime) -> Dict[str, Any]: ...
     def delete_student(self, student_id: int) -> bool: ...
 
+    def get_student_balances(self) -> List[Dict[str, Any]]: ...
+    def get_student_balance(self, student_id: int) -> Optional[Dict[str, Any]]: ...
+    def rebuild_student_balances(self) -> int: ...
+
 
 # ✅ Fix: module -> Any -> cast(DBPort)
 db_any: Any = adapters.db
 db: DBPort = cast(DBPort, db_any)
 
 
+async def _call(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Async-Adapter direkt awaiten, blockierende (sync) Adapter im Threadpool ausführen."""
+    calls = request_calls.get()
+    if not METRICS_ENABLED and calls is None:
+        return await _invoke(fn, *args, **kwargs)
+
+    call = DbCall(str(getattr(fn, "__module__", "")).rsplit(".", 1)[-1], str(getattr(fn, "__name__", "?")))
+    if calls is not None:
+        calls.append(call)
+    token = current_call.set(call)
+    started = time.perf_counter()
+    try:
+        result = await _invoke(fn, *args, **kwargs)
+        # ohne Roundtrips (memory) zählen die gelieferten Zeilen
+        if not call.round_trips and isinstance(result, list):
+            call.documents = len(result)
+        return result
+    except BaseException:
+        call.error = True
+        raise
+    finally:
+        call.seconds = time.perf_counter() - started
+        current_call.reset(token)
+        if METRICS_ENABLED:
+            metrics.observe_db_call(call)
+
+
+async def _invoke(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    if inspect.iscoroutinefunction(fn):
+        return await fn(*args, **kwargs)
+    return await run_in_threadpool(fn, *args, **kwargs)
+
+
+async def _write(groups: Tuple[str, ...], fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Schreibzugriff über den Port; die betroffenen Cache-Gruppen werden danach (auch bei Fehlern) invalidiert."""
+    try:
+        return await _call(fn, *args, **kwargs)
+    finally:
+        cache.invalidate(*_class_groups(*groups))
+
+
+def _class_groups(*groups: str) -> Tuple[str, ...]:
+    """Cache-Gruppen der Klasse des Requests: Schreibzugriffe einer Klasse leeren nur deren Einträge."""
+    class_id = current_class.get()
+    return tuple(f"{class_id}/{group}" for group in groups)
+
+
+def _json_bytes(data: Any) -> bytes:
+    """JSON wie FastAPI (UTF-8, kompakt); mit orjson ohne den Umweg über jsonable_encoder für dicts/Listen."""
+    if orjson is not None:
+        return orjson.dumps(data, default=jsonable_encoder)
+    return json.dumps(jsonable_encoder(data), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    value = request.headers.get("if-none-match", "")
+    return value.strip() == "*" or etag in (t.strip().removeprefix("W/") for t in value.split(","))
+
+
+async def _cached(request: Request, group: str, produce: Callable[[Dict[str, str]], Awaitable[Any]]) -> Response:
+    """
+    Antwort aus dem Cache oder neu berechnet über `produce` (darf zusätzliche Header setzen).
+    Passt If-None-Match zum ETag, kommt 304 ohne Body – auch ohne erneute Serialisierung.
+    """
+    (group,) = _class_groups(group)
+    key = f"{request.url.path}?{request.query_params}"
+    entry = cache.get(group, key)
+    status = "HIT"
+    if entry is None:
+        status = "MISS"
+        generation = cache.generation(group)
+        extra: Dict[str, str] = {}
+        data = await produce(extra)
+        started = time.perf_counter()
+        body = _json_bytes(data)
+        metrics.serialize_duration.observe((), time.perf_counter() - started)
+        entry = CacheEntry(body, make_etag(body), extra)
+        cache.put(group, key, entry, generation)
+
+    headers = {**entry.headers, "ETag": entry.etag, "Cache-Control": "no-cache", "X-Cache": status}
+    if _etag_matches(request, entry.etag):
+        cache.not_modified += 1
+        return Response(status_code=304, headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
+
+
 class TxIn(BaseModel):
     type: str
     amount: float
@@ -81,6 +315,12 @@ class SavingGoalOut(BaseModel):
     name: str
     amount: float
     created_at: str
+    saved: float = 0.0
+    percent: float = 0.0
+    remaining: float = 0.0
+    projected_date: Optional[str] = None
+    # Rang bei der Verteilung des Kontostands: 1 = ältestes Ziel, wird zuerst gefüllt
+    funding_order: int = 1
 
 
 class StudentIn(BaseModel):
@@ -94,44 +334,216 @@ class StudentOut(BaseModel):
 
 
 @app.on_event("startup")
-def _startup() -> None:
-    db.connect()
+async def _startup() -> None:
+    global _feed_task
+    await _call(db.connect)
+    watch = getattr(db, "watch_changes", None)
+    if watch is not None and getattr(db, "CHANGE_STREAMS", False):
+        _feed_stop.clear()
+        _feed_task = asyncio.create_task(_pump_changes(watch))
 
 
 @app.on_event("shutdown")
-def _shutdown() -> None:
+async def _shutdown() -> None:
+    global _feed_task
+    _feed_stop.set()
+    if _feed_task is not None:
+        _feed_task.cancel()
+        _feed_task = None
     try:
-        db.disconnect()
+        await _call(db.disconnect)
     except Exception:
         pass
 
 
+def _pump_sync(watch: Callable[..., Any], on_open: Callable[[], None]) -> None:
+    for event in watch(on_open, _feed_stop):
+        feed.publish(event)
+
+
+async def _pump_changes(watch: Callable[..., Any]) -> None:
+    """
+    Change Stream des Adapters -> feed, damit Clients auch Änderungen anderer Backend-Prozesse sehen.
+    Kann der Server keine Change Streams, bleibt es bei den Meldungen der Schreib-Endpunkte (_notify).
+    """
+    opened = False
+
+    def on_open() -> None:
+        nonlocal opened
+        opened = True
+        feed.source = "change_stream"
+
+    while not _feed_stop.is_set():
+        try:
+            if inspect.isasyncgenfunction(watch):
+                async for event in watch(on_open):
+                    feed.publish(event)
+            else:
+                await asyncio.to_thread(_pump_sync, watch, on_open)
+        except Exception as e:
+            logger.warning("Change Stream nicht verfügbar: %s", e)
+        if not opened or _feed_stop.is_set():
+            return
+        # Ereignisse bis zum Neuaufbau fehlen: Clients laden neu, bis dahin melden die Endpunkte selbst
+        feed.source = "api"
+        feed.publish({"type": "reset"})
+        opened = False
+        await asyncio.sleep(CHANGE_STREAM_RETRY_DELAY)
+
+
+async def _notify(*events: Dict[str, Any]) -> None:
+    """Änderung an GET /events melden (samt neuem Kontostand) – sofern kein Change Stream das übernimmt."""
+    if feed.source != "api":
+        return
+    balance = await _call(db.get_balance)
+    class_id = current_class.get()
+    for event in events:
+        feed.publish({**event, "class_id": class_id})
+    feed.publish({"type": "balance", "current_total": float(balance.current_total), "class_id": class_id})
+
+
+def _tx_out(t: Any) -> TxOut:
+    t_date = getattr(t, "date", None)
+    return TxOut(
+        id=int(getattr(t, "id")),
+        type=str(getattr(t, "type")),
+        amount=float(getattr(t, "amount")),
+        description=str(getattr(t, "description", "") or ""),
+        timestamp=getattr(t, "timestamp").isoformat(),
+        category=str(getattr(t, "category", "") or ""),
+        student=str(getattr(t, "student", "") or ""),
+        date=t_date.isoformat() if t_date else "",
+    )
+
+
 @app.get("/transactions", response_model=List[TxOut])
-def list_transactions() -> List[TxOut]:
-    txs = db.get_all_transactions()
-    out: List[TxOut] = []
-
-    for t in txs:
-        t_date = getattr(t, "date", None)
-        out.append(
-            TxOut(
-                id=int(getattr(t, "id")),
-                type=str(getattr(t, "type")),
-                amount=float(getattr(t, "amount")),
-                description=str(getattr(t, "description", "") or ""),
-                timestamp=getattr(t, "timestamp").isoformat(),
-                category=str(getattr(t, "category", "") or ""),
-                student=str(getattr(t, "student", "") or ""),
-                date=t_date.isoformat() if t_date else "",
-            )
+async def list_transactions(
+    request: Request,
+    after_id: Optional[int] = None,
+    limit: int = Query(TX_PAGE_DEFAULT, ge=1, le=TX_PAGE_MAX),
+    type_: Optional[str] = Query(None, alias="type"),
+    category: Optional[str] = None,
+    student: Optional[str] = None,
+    date_from: Optional[Date] = None,
+    date_to: Optional[Date] = None,
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+) -> Response:
+    """
+    Eine Seite Transaktionen (Keyset-Pagination über id).
+    Gibt es weitere Treffer, steht die id für den nächsten Aufruf (after_id) im Header X-Next-Cursor.
+    """
+
+    async def produce(headers: Dict[str, str]) -> List[Dict[str, Any]]:
+        # Zeilen kommen schon in der Form von TxOut vom Adapter: kein Modell pro Zeile, direkt nach JSON
+        rows = await _call(
+            db.query_transaction_rows,
+            after_id=after_id,
+            limit=limit + 1,
+            type_=type_,
+            category=category,
+            student=student,
+            date_from=date_from,
+            date_to=date_to,
+            descending=order == "desc",
         )
-    return out
+        if len(rows) > limit:
+            rows = rows[:limit]
+            headers["X-Next-Cursor"] = str(rows[-1]["id"])
+        return cast(List[Dict[str, Any]], rows)
+
+    return await _cached(request, "transactions", produce)
+
+
+@app.get("/transactions/search", response_model=List[TxOut])
+async def search_transactions(
+    request: Request,
+    q: str = Query(..., min_length=1),
+    after_id: Optional[int] = None,
+    limit: int = Query(TX_PAGE_DEFAULT, ge=1, le=TX_PAGE_MAX),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+) -> Response:
+    """
+    Suche über Beschreibung, Kategorie, Schüler und Typ (Wortpräfixe) sowie Betrag und Datum;
+    alle Begriffe müssen zutreffen. Pagination wie GET /transactions (X-Next-Cursor).
+    """
+
+    async def produce(headers: Dict[str, str]) -> List[Dict[str, Any]]:
+        rows = await _call(db.search_transaction_rows, q, after_id=after_id, limit=limit + 1, descending=order == "desc")
+        if len(rows) > limit:
+            rows = rows[:limit]
+            headers["X-Next-Cursor"] = str(rows[-1]["id"])
+        return cast(List[Dict[str, Any]], rows)
+
+    return await _cached(request, "transactions", produce)
+
+
+EXPORT_FIELDS = list(TxOut.model_fields)
+
+
+def _export_chunk(rows: List[Dict[str, Any]], fmt: str) -> bytes:
+    if fmt == "ndjson":
+        return b"".join(_json_bytes(r) + b"\n" for r in rows)
+    if fmt == "columnar":
+        # eine Zeile pro Block mit je einem Array pro Feld (wie eine Row Group)
+        return _json_bytes({f: [r[f] for r in rows] for f in EXPORT_FIELDS}) + b"\n"
+    buf = io.StringIO()
+    csv.writer(buf).writerows([r[f] for f in EXPORT_FIELDS] for r in rows)
+    return buf.getvalue().encode("utf-8")
+
+
+async def _export_stream(fmt: str, compress: bool, filters: Dict[str, Any]) -> AsyncIterator[bytes]:
+    gz = zlib.compressobj(wbits=31) if compress else None  # wbits=31: gzip-Container
+
+    def encode(chunk: bytes) -> bytes:
+        return gz.compress(chunk) if gz is not None else chunk
+
+    if fmt == "csv":
+        yield encode((",".join(EXPORT_FIELDS) + "\r\n").encode("utf-8"))
+
+    after_id: Optional[int] = None
+    while True:
+        rows = await _call(db.query_transaction_rows, after_id=after_id, limit=EXPORT_BATCH_SIZE, **filters)
+        if rows:
+            data = encode(_export_chunk(rows, fmt))
+            if data:
+                yield data
+        if len(rows) < EXPORT_BATCH_SIZE:
+            break
+        after_id = int(rows[-1]["id"])
+
+    if gz is not None:
+        yield gz.flush()
+
+
+@app.get("/transactions/export")
+async def export_transactions(
+    fmt: str = Query("csv", alias="format", pattern="^(csv|ndjson|columnar)$"),
+    gzip: bool = False,
+    type_: Optional[str] = Query(None, alias="type"),
+    category: Optional[str] = None,
+    student: Optional[str] = None,
+    date_from: Optional[Date] = None,
+    date_to: Optional[Date] = None,
+) -> StreamingResponse:
+    """
+    Alle Transaktionen (gefiltert wie GET /transactions) als Datei-Download, aufsteigend nach id.
+    columnar: NDJSON mit einer Zeile pro Block, die je Feld ein Array enthält.
+    """
+    filters = {"type_": type_, "category": category, "student": student, "date_from": date_from, "date_to": date_to}
+    filename = f"transactions.{'ndjson' if fmt == 'columnar' else fmt}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        _export_stream(fmt, gzip, filters),
+        media_type="application/gzip" if gzip else EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 
 @app.post("/transactions", response_model=TxOut)
-def add_transaction(tx: TxIn) -> TxOut:
+async def add_transaction(tx: TxIn) -> TxOut:
     try:
-        created = db.create_transaction(
+        created = await _write(
+            TX_GROUPS,
+            db.create_transaction,
             type_=tx.type,
             amount=tx.amount,
             description=tx.description,
@@ -140,90 +552,411 @@ def add_transaction(tx: TxIn) -> TxOut:
             student=tx.student,
             date_=tx.date,
         )
-
-        created_date = getattr(created, "date", None)
-        return TxOut(
-            id=int(getattr(created, "id")),
-            type=str(getattr(created, "type")),
-            amount=float(getattr(created, "amount")),
-            description=str(getattr(created, "description", "") or ""),
-            timestamp=getattr(created, "timestamp").isoformat(),
-            category=str(getattr(created, "category", "") or ""),
-            student=str(getattr(created, "student", "") or ""),
-            date=created_date.isoformat() if created_date else "",
-        )
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    out = _tx_out(created)
+    await _notify({"type": "tx_created", "tx": out.model_dump()})
+    return out
+
+
+async def _iter_lines(request: Request) -> AsyncIterator[str]:
+    """Liefert den Request-Body zeilenweise, ohne ihn komplett in den Speicher zu laden."""
+    buf = b""
+    async for chunk in request.stream():
+        buf += chunk
+        *lines, buf = buf.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8").rstrip("\r")
+    if buf:
+        yield buf.decode("utf-8").rstrip("\r")
+
+
+def _parse_bulk_row(line: str, header: Optional[List[str]]) -> Dict[str, Any]:
+    if header is None:
+        row = json.loads(line)
+        if not isinstance(row, dict):
+            raise ValueError("Zeile ist kein JSON-Objekt")
+        return cast(Dict[str, Any], row)
+    values = next(csv.reader([line]))
+    # leere CSV-Felder weglassen, damit die Defaults aus TxIn greifen
+    return {k: v for k, v in zip(header, values) if v != ""}
+
+
+@app.post("/transactions/bulk")
+async def bulk_add_transactions(request: Request, chunk_size: int = BULK_CHUNK_SIZE) -> Dict[str, Any]:
+    """
+    Massenimport von Transaktionen als NDJSON (eine TxIn pro Zeile) oder CSV mit Kopfzeile
+    (Content-Type text/csv). Geschrieben wird in Blöcken von chunk_size Zeilen.
+    """
+    is_csv = "csv" in request.headers.get("content-type", "")
+    chunk_size = max(1, chunk_size)
+
+    header: Optional[List[str]] = None
+    chunk: List[Dict[str, Any]] = []
+    chunk_lines: List[int] = []
+    inserted = 0
+    failed = 0
+    errors: List[Dict[str, Any]] = []
+
+    def report(line_no: int, msg: str) -> None:
+        nonlocal failed
+        failed += 1
+        if len(errors) < BULK_MAX_REPORTED_ERRORS:
+            errors.append({"line": line_no, "error": msg})
+
+    async def flush() -> None:
+        nonlocal inserted
+        created, row_errors = await _write(TX_GROUPS, db.create_transactions_bulk, list(chunk))
+        inserted += len(created)
+        for idx, msg in row_errors:
+            report(chunk_lines[idx], msg)
+        chunk.clear()
+        chunk_lines.clear()
+
+    line_no = 0
+    async for line in _iter_lines(request):
+        line_no += 1
+        if line_no == 1:
+            line = line.lstrip("\ufeff")
+        if not line.strip():
+            continue
+        if is_csv and header is None:
+            header = [h.strip() for h in next(csv.reader([line]))]
+            continue
+
+        try:
+            tx = TxIn.model_validate(_parse_bulk_row(line, header))
+        except (ValueError, ValidationError, csv.Error) as e:
+            report(line_no, str(e))
+            continue
+
+        chunk.append({
+            "type_": tx.type,
+            "amount": tx.amount,
+            "description": tx.description,
+            "timestamp": datetime.now(),
+            "category": tx.category,
+            "student": tx.student,
+            "date_": tx.date,
+        })
+        chunk_lines.append(line_no)
+        if len(chunk) >= chunk_size:
+            await flush()
+
+    if chunk:
+        await flush()
+    if inserted:
+        # bei Massenimporten keine Einzelereignisse: Clients laden die Tabelle neu
+        await _notify({"type": "reset"})
+
+    return {"inserted": inserted, "failed": failed, "errors": errors}
 
 
 @app.delete("/transactions/{tx_id}")
-def delete_transaction(tx_id: int) -> Dict[str, bool]:
-    ok = db.delete_transaction(tx_id)
+async def delete_transaction(tx_id: int) -> Dict[str, bool]:
+    ok = await _write(TX_GROUPS, db.delete_transaction, tx_id)
     if not ok:
         raise HTTPException(status_code=404, detail="Transaktion nicht gefunden")
+    await _notify({"type": "tx_deleted", "id": tx_id})
     return {"ok": True}
 
 
 @app.get("/balance")
-def get_balance() -> Dict[str, float]:
-    b = db.get_balance()
-    return {"current_total": float(b.current_total)}
+async def get_balance(request: Request) -> Response:
+    async def produce(headers: Dict[str, str]) -> Dict[str, float]:
+        b = await _call(db.get_balance)
+        return {"current_total": float(b.current_total)}
 
+    return await _cached(request, "balance", produce)
 
-@app.get("/savings-goals", response_model=List[SavingGoalOut])
-def list_savings_goals(limit: int = MAX_SAVING_GOALS) -> List[SavingGoalOut]:
-    goals = db.get_savings_goals(limit=limit)
-    return [
-        SavingGoalOut(id=int(g["id"]), name=str(g["name"]), amount=float(g["amount"]), created_at=str(g["created_at"]))
-        for g in goals
+
+@app.post("/balance/reconcile")
+async def reconcile_balance(fix: bool = False) -> Dict[str, Any]:
+    if fix:
+        result = cast(Dict[str, Any], await _write(("balance", "dashboard"), db.reconcile_balance, fix=True))
+        await _notify()
+        return result
+    return cast(Dict[str, Any], await _call(db.reconcile_balance, fix=False))
+
+
+@app.get("/cache/stats")
+async def cache_stats() -> Dict[str, float]:
+    return cache.stats()
+
+
+def _sse_message(event_id: int, event: Dict[str, Any]) -> bytes:
+    return b"id: %d\nevent: %s\ndata: " % (event_id, str(event["type"]).encode()) + _json_bytes(event) + b"\n\n"
+
+
+async def _event_stream(last_id: Optional[int], class_id: str) -> AsyncIterator[bytes]:
+    yield b"retry: 3000\n\n"
+    async for event_id, event in feed.subscribe(last_id, EVENTS_HEARTBEAT, class_id):
+        # Kommentarzeile hält Proxys und die Verbindung des Clients offen
+        yield b": ping\n\n" if event["type"] == "ping" else _sse_message(event_id, event)
+
+
+@app.get("/events")
+async def events(last_event_id: Optional[int] = Header(None)) -> StreamingResponse:
+    """
+    Server-Sent Events: tx_created (tx wie TxOut), tx_deleted (id), balance (current_total) und
+    reset (Client lädt neu), nur für die Klasse des Pfads. Nach einem Abbruch setzt Last-Event-ID den Stream fort.
+    """
+    return StreamingResponse(
+        _event_stream(last_event_id, current_class.get()),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/events/stats")
+async def events_stats() -> Dict[str, Any]:
+    return feed.stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics() -> PlainTextResponse:
+    """Prometheus-Textformat: HTTP- und DBPort-Metriken, Antwort-Cache und Änderungs-Feed."""
+    extra = [
+        metrics.gauges("response_cache", "Zustand des Antwort-Caches (GET /cache/stats)", cache.stats()),
+        metrics.gauges("change_feed", "Zustand des Änderungs-Feeds (GET /events/stats)", feed.stats()),
     ]
+    return PlainTextResponse(metrics.registry.render(extra), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def _require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin-Routen sind ohne ADMIN_TOKEN gesperrt")
+    if not secrets.compare_digest(x_admin_token or "", ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin-Token fehlt oder ist falsch")
+
+
+class ProfilingIn(BaseModel):
+    threshold_ms: Optional[float] = Field(None, ge=0, description="0 schaltet das Profiling aus")
+    interval_ms: Optional[float] = Field(None, gt=0)
+    keep: Optional[int] = Field(None, ge=1)
+
+
+@app.get("/admin/profiling", dependencies=[Depends(_require_admin)])
+async def profiling_status() -> Dict[str, Any]:
+    return await run_in_threadpool(profiler.status)
+
+
+@app.put("/admin/profiling", dependencies=[Depends(_require_admin)])
+async def profiling_configure(settings: ProfilingIn) -> Dict[str, Any]:
+    """Profiling zur Laufzeit ein-/ausschalten oder Schwelle, Abtastintervall und Aufbewahrung ändern."""
+    if settings.threshold_ms is not None:
+        profiler.threshold_ms = settings.threshold_ms
+    if settings.interval_ms is not None:
+        profiler.sampler.interval_ms = settings.interval_ms
+    if settings.keep is not None:
+        profiler.keep = settings.keep
+    logger.info("Profiling: Schwelle %s ms", profiler.threshold_ms)
+    return await run_in_threadpool(profiler.status)
+
+
+@app.get("/admin/profiling/{name}", dependencies=[Depends(_require_admin)])
+async def profiling_report(name: str) -> FileResponse:
+    path = await run_in_threadpool(profiler.report_path, name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Bericht nicht gefunden")
+    return FileResponse(path, media_type="application/json")
+
+
+@app.get("/health/db")
+async def health_db(response: Response) -> Dict[str, Any]:
+    result = cast(Dict[str, Any], await _call(db.health))
+    if not result.get("ok"):
+        response.status_code = 503
+    return result
+
+
+def _goals_progress(goals: Sequence[Dict[str, Any]], balance: float, daily_net: float, today: Date) -> List[SavingGoalOut]:
+    """
+    Fortschritt der Sparziele. Es gibt nur einen Kontostand je Klasse; er wird der Reihe nach verteilt,
+    ältestes Ziel (kleinste id) zuerst, damit derselbe Euro nicht bei mehreren Zielen als gespart zählt.
+    `goals` muss daher alle Ziele der Klasse enthalten; die Rückgabe folgt ihrer Reihenfolge.
+    Die Prognose rechnet den mittleren Netto-Zufluss pro Tag fort, bis auch die älteren Ziele gedeckt
+    sind; fließt nichts zu, gibt es kein Datum.
+    """
+    out: Dict[int, SavingGoalOut] = {}
+    available = max(balance, 0.0)
+    needed = 0.0  # Summe der Beträge bis einschließlich des aktuellen Ziels
+    for order, goal in enumerate(sorted(goals, key=lambda g: int(g["id"])), start=1):
+        amount = float(goal["amount"])
+        saved = min(available, amount)
+        available -= saved
+        remaining = amount - saved
+        needed += amount
+
+        projected: Optional[Date] = None
+        if remaining <= 0:
+            projected = today
+        elif daily_net > 0:
+            projected = today + timedelta(days=math.ceil((needed - balance) / daily_net))
+
+        out[int(goal["id"])] = SavingGoalOut(
+            id=int(goal["id"]),
+            name=str(goal["name"]),
+            amount=amount,
+            created_at=str(goal["created_at"]),
+            saved=saved,
+            percent=100.0 if amount <= 0 else round(saved / amount * 100, 1),
+            remaining=remaining,
+            projected_date=projected.isoformat() if projected else None,
+            funding_order=order,
+        )
+    return [out[int(g["id"])] for g in goals]
+
+
+def _daily_net(days: Sequence[Dict[str, Any]]) -> float:
+    return sum(float(d["income"]) - float(d["expense"]) for d in days) / max(1, len(days))
+
+
+async def _goals_with_progress(ids: Optional[Sequence[int]] = None) -> List[SavingGoalOut]:
+    """Alle Sparziele (neueste zuerst) oder nur `ids`; verteilt wird immer über alle (höchstens MAX_SAVING_GOALS)."""
+    # Kontostand (ein Dokument) + Rollups der letzten GOAL_TREND_DAYS Tage: unabhängig von der Zahl der Transaktionen
+    goals, balance, days = await asyncio.gather(
+        _call(db.get_savings_goals, limit=MAX_SAVING_GOALS),
+        _call(db.get_balance),
+        _call(db.get_daily_stats, days=GOAL_TREND_DAYS),
+    )
+    progress = _goals_progress(goals, float(balance.current_total), _daily_net(days), Date.today())
+    return progress if ids is None else [p for p in progress if p.id in ids]
+
+
+@app.get("/savings-goals", response_model=List[SavingGoalOut])
+async def list_savings_goals(request: Request, limit: int = MAX_SAVING_GOALS) -> Response:
+    """
+    Sparziele mit Fortschritt (saved, percent, remaining) und voraussichtlichem Erreichen (projected_date).
+    Der Kontostand wird in funding_order auf die Ziele verteilt (ältestes zuerst), nicht jedem ganz angerechnet.
+    """
+
+    async def produce(headers: Dict[str, str]) -> List[SavingGoalOut]:
+        return (await _goals_with_progress())[: max(0, limit)]
+
+    return await _cached(request, "savings_goals", produce)
 
 
 @app.post("/savings-goals", response_model=SavingGoalOut)
-def add_savings_goal(goal: SavingGoalIn) -> SavingGoalOut:
+async def add_savings_goal(goal: SavingGoalIn) -> SavingGoalOut:
     try:
-        created = db.create_savings_goal(name=goal.name, amount=goal.amount, created_at=datetime.now())
-        return SavingGoalOut(
-            id=int(created["id"]),
-            name=str(created["name"]),
-            amount=float(created["amount"]),
-            created_at=str(created["created_at"]),
-        )
+        created = await _write(GOAL_GROUPS, db.create_savings_goal, name=goal.name, amount=goal.amount, created_at=datetime.now())
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    return (await _goals_with_progress([int(created["id"])]))[0]
 
 
 @app.delete("/savings-goals/{goal_id}")
-def delete_savings_goal(goal_id: int) -> Dict[str, bool]:
-    ok = db.delete_savings_goal(goal_id)
+async def delete_savings_goal(goal_id: int) -> Dict[str, bool]:
+    ok = await _write(GOAL_GROUPS, db.delete_savings_goal, goal_id)
     if not ok:
         raise HTTPException(status_code=404, detail="Sparziel nicht gefunden")
     return {"ok": True}
 
 
 @app.get("/students", response_model=List[StudentOut])
-def list_students() -> List[StudentOut]:
-    students = db.get_students()
-    return [StudentOut(id=int(s["id"]), name=str(s["name"]), created_at=str(s["created_at"])) for s in students]
+async def list_students(request: Request) -> Response:
+    async def produce(headers: Dict[str, str]) -> List[StudentOut]:
+        students = await _call(db.get_students)
+        return [StudentOut(id=int(s["id"]), name=str(s["name"]), created_at=str(s["created_at"])) for s in students]
+
+    return await _cached(request, "students", produce)
 
 
 @app.post("/students", response_model=StudentOut)
-def add_student(s: StudentIn) -> StudentOut:
+async def add_student(s: StudentIn) -> StudentOut:
     try:
-        created = db.create_student(name=s.name, created_at=datetime.now())
+        created = await _write(STUDENT_GROUPS, db.create_student, name=s.name, created_at=datetime.now())
         return StudentOut(id=int(created["id"]), name=str(created["name"]), created_at=str(created["created_at"]))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.delete("/students/{student_id}")
-def delete_student(student_id: int) -> Dict[str, bool]:
-    ok = db.delete_student(student_id)
+async def delete_student(student_id: int) -> Dict[str, bool]:
+    ok = await _write(STUDENT_GROUPS, db.delete_student, student_id)
     if not ok:
         raise HTTPException(status_code=404, detail="Schüler nicht gefunden")
     return {"ok": True}
 
 
+@app.get("/students/balances")
+async def list_student_balances(request: Request) -> Response:
+    """Einnahmen, Ausgaben und Saldo je Schüler (aus student_balances, unabhängig von der Zahl der Transaktionen)."""
+
+    async def produce(headers: Dict[str, str]) -> List[Dict[str, Any]]:
+        return cast(List[Dict[str, Any]], await _call(db.get_student_balances))
+
+    return await _cached(request, "student_balances", produce)
+
+
+@app.get("/students/{student_id}/balance")
+async def student_balance(student_id: int, request: Request) -> Response:
+    async def produce(headers: Dict[str, str]) -> Dict[str, Any]:
+        result = await _call(db.get_student_balance, student_id)
+        if result is None:
+            raise HTTPException(status_code=404, detail="Schüler nicht gefunden")
+        return cast(Dict[str, Any], result)
+
+    return await _cached(request, "student_balances", produce)
+
+
 @app.get("/stats/daily")
-def stats_daily(days: int = 30) -> List[Dict[str, Any]]:
-    return []
+async def stats_daily(days: int = Query(30, ge=1, le=3660)) -> List[Dict[str, Any]]:
+    """Pro Tag: date, income, expense, balance (Kontostand am Tagesende), aufsteigend nach Datum."""
+    return cast(List[Dict[str, Any]], await _call(db.get_daily_stats, days=days))
+
+
+def _table(fields: List[str], items: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    # Spaltennamen einmal, Zeilen als Listen: kein Schlüssel pro Zelle im JSON
+    return {"columns": fields, "rows": [[item.get(f) for f in fields] for item in items]}
+
+
+@app.get("/dashboard")
+async def dashboard(
+    request: Request,
+    q: Optional[str] = None,
+    tx_limit: int = Query(TX_PAGE_DEFAULT, ge=1, le=TX_PAGE_MAX),
+    stats_days: int = Query(DASHBOARD_STATS_DAYS, ge=1, le=3660),
+) -> Response:
+    """
+    Alles, was die Oberfläche beim Laden braucht, in einer Antwort: Kontostand, neueste Transaktionen
+    (oder Suchtreffer für q), Sparziele mit Fortschritt, Schüler und Tagesstatistik.
+    Die Adapteraufrufe laufen gleichzeitig; die Tabellen enthalten nur die angezeigten Spalten.
+    """
+
+    async def produce(headers: Dict[str, str]) -> Dict[str, Any]:
+        # Stand des Änderungs-Feeds vor dem Lesen: GET /events mit Last-Event-ID=event_id lässt nichts aus
+        event_id = feed.last_id
+        if q and q.strip():
+            tx_call = _call(db.search_transaction_rows, q, after_id=None, limit=tx_limit + 1, descending=True)
+        else:
+            tx_call = _call(db.query_transaction_rows, limit=tx_limit + 1, descending=True)
+        # eine Statistikabfrage für die Tabelle und den Trend der Sparziele
+        rows, balance, goals, students, days = await asyncio.gather(
+            tx_call,
+            _call(db.get_balance),
+            _call(db.get_savings_goals, limit=MAX_SAVING_GOALS),
+            _call(db.get_students),
+            _call(db.get_daily_stats, days=max(stats_days, GOAL_TREND_DAYS)),
+        )
+        next_cursor = None
+        if len(rows) > tx_limit:
+            rows = rows[:tx_limit]
+            next_cursor = rows[-1]["id"]
+
+        current = float(balance.current_total)
+        daily_net = _daily_net(days[-GOAL_TREND_DAYS:])
+        today = Date.today()
+        progress = [p.model_dump() for p in _goals_progress(goals, current, daily_net, today)]
+        return {
+            "event_id": event_id,
+            "balance": current,
+            "transactions": _table(EXPORT_FIELDS, rows),
+            "next_cursor": next_cursor,
+            "savings_goals": _table(DASHBOARD_GOAL_FIELDS, progress),
+            "students": _table(DASHBOARD_STUDENT_FIELDS, students),
+            "stats": _table(DASHBOARD_STATS_FIELDS, days[-stats_days:]),
+        }
+
+    return await _cached(request, "dashboard", produce)
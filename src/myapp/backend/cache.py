@@ -0,0 +1,109 @@
+"""
+In-Process-Cache für fertig serialisierte Antworten der Lese-Endpunkte (LRU + TTL).
+
+Einträge gehören zu einer Gruppe ("transactions", "balance", ...); Schreibzugriffe
+invalidieren ganze Gruppen. Jede Gruppe hat einen Generationszähler, damit eine
+Antwort, deren Berechnung vor einer Invalidierung begonnen hat, nicht danach noch
+als aktuell im Cache landet.
+Die API führt die Gruppen je Klasse ("4a/transactions"); invalidate berührt nur die Einträge der
+genannten Gruppen, egal wie viele Klassen der Cache sonst hält.
+Der Cache ist pro Prozess: bei mehreren Workern begrenzt die TTL, wie lange ein
+Worker Änderungen eines anderen nicht sieht.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Set, Tuple
+
+
+@dataclass
+class CacheEntry:
+    body: bytes
+    etag: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    expires: float = 0.0
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = 256, ttl: float = 30.0) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[str, str], CacheEntry]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        # Gruppe -> Schlüssel ihrer Einträge
+        self._keys: Dict[str, Set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl > 0
+
+    def generation(self, group: str) -> int:
+        return self._generations.get(group, 0)
+
+    def get(self, group: str, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.get((group, key))
+        if entry is None or entry.expires < time.monotonic():
+            if entry is not None:
+                self._discard((group, key))
+            self.misses += 1
+            return None
+        self._entries.move_to_end((group, key))
+        self.hits += 1
+        return entry
+
+    def put(self, group: str, key: str, entry: CacheEntry, generation: int) -> None:
+        """Speichert nur, wenn die Gruppe seit `generation` nicht invalidiert wurde."""
+        if not self.enabled or self.generation(group) != generation:
+            return
+        entry.expires = time.monotonic() + self.ttl
+        self._entries[(group, key)] = entry
+        self._entries.move_to_end((group, key))
+        self._keys.setdefault(group, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._discard(next(iter(self._entries)))
+
+    def _discard(self, k: Tuple[str, str]) -> None:
+        del self._entries[k]
+        keys = self._keys.get(k[0])
+        if keys is not None:
+            keys.discard(k[1])
+            if not keys:
+                del self._keys[k[0]]
+
+    def invalidate(self, *groups: str) -> None:
+        for group in groups:
+            self._generations[group] = self.generation(group) + 1
+            for key in self._keys.pop(group, ()):
+                del self._entries[(group, key)]
+        self.invalidations += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._generations.clear()
+        self._keys.clear()
+        self.hits = self.misses = self.not_modified = self.invalidations = 0
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "invalidations": self.invalidations,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
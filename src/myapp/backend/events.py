@@ -0,0 +1,105 @@
+"""
+Änderungs-Feed für GET /events (Server-Sent Events): Transaktion angelegt/gelöscht, neuer Kontostand.
+
+Ereignisse bekommen eine fortlaufende id; die letzten `history` Ereignisse werden gehalten, damit ein
+Client nach einem Verbindungsabbruch mit Last-Event-ID dort weitermachen kann. Liegt seine id nicht
+mehr im Verlauf, bekommt er ein "reset" und lädt neu.
+Ereignisse mit class_id gehen nur an Abonnenten dieser Klasse, solche ohne (reset) an alle; der
+Verlauf ist für alle Klassen gemeinsam.
+publish() darf aus jedem Thread aufgerufen werden (Change-Stream-Thread des sync Mongo-Adapters).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+Event = Dict[str, Any]
+# (Event-Loop, Queue, Klasse; None = alle Klassen)
+Subscriber = Tuple[asyncio.AbstractEventLoop, "asyncio.Queue[Tuple[int, Event]]", Optional[str]]
+
+
+def _for_class(event: Event, class_id: Optional[str]) -> bool:
+    return class_id is None or event.get("class_id", class_id) == class_id
+
+
+class ChangeFeed:
+    def __init__(self, history: int = 256, queue_size: int = 1000) -> None:
+        self.queue_size = queue_size
+        self._history: Deque[Tuple[int, Event]] = deque(maxlen=history)
+        self._subscribers: List[Subscriber] = []
+        self._lock = threading.Lock()
+        self._last_id = 0
+        # "api": die Schreib-Endpunkte melden Änderungen; "change_stream": der Adapter (alle Prozesse)
+        self.source = "api"
+        self.published = 0
+        self.dropped = 0
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    @property
+    def last_id(self) -> int:
+        return self._last_id
+
+    def publish(self, event: Event) -> int:
+        with self._lock:
+            self._last_id += 1
+            item = (self._last_id, event)
+            self._history.append(item)
+            subscribers = list(self._subscribers)
+            self.published += 1
+        for loop, queue, class_id in subscribers:
+            if _for_class(event, class_id):
+                loop.call_soon_threadsafe(self._offer, queue, item)
+        return item[0]
+
+    def _offer(self, queue: "asyncio.Queue[Tuple[int, Event]]", item: Tuple[int, Event]) -> None:
+        # ein Client, der nicht mitliest, bekommt statt weiterer Ereignisse ein reset
+        if queue.full():
+            self.dropped += 1
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait((item[0], {"type": "reset"}))
+            return
+        queue.put_nowait(item)
+
+    def _replay(self, last_id: Optional[int], class_id: Optional[str]) -> List[Tuple[int, Event]]:
+        if last_id is None or last_id >= self._last_id:
+            return []
+        if not self._history or self._history[0][0] > last_id + 1:
+            return [(self._last_id, {"type": "reset"})]
+        return [item for item in self._history if item[0] > last_id and _for_class(item[1], class_id)]
+
+    async def subscribe(
+        self, last_id: Optional[int] = None, heartbeat: float = 15.0, class_id: Optional[str] = None
+    ) -> AsyncIterator[Tuple[int, Event]]:
+        """Ereignisse ab `last_id` (nur die von `class_id`); (0, {"type": "ping"}) nach `heartbeat` Sekunden ohne Ereignis."""
+        queue: "asyncio.Queue[Tuple[int, Event]]" = asyncio.Queue(self.queue_size)
+        entry: Subscriber = (asyncio.get_running_loop(), queue, class_id)
+        with self._lock:
+            backlog = self._replay(last_id, class_id)
+            self._subscribers.append(entry)
+        try:
+            for item in backlog:
+                yield item
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield 0, {"type": "ping"}
+        finally:
+            with self._lock:
+                self._subscribers.remove(entry)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "source": self.source,
+            "subscribers": self.subscribers,
+            "last_id": self._last_id,
+            "published": self.published,
+            "dropped": self.dropped,
+        }
@@ -0,0 +1,125 @@
+"""
+Wartungsbefehle für die Klassenkassa.
+
+Aufruf (z. B. im Backend-Container):
+    python -m myapp.backend.manage reconcile [--fix] [--interval SEKUNDEN]
+    python -m myapp.backend.manage check-indexes
+    python -m myapp.backend.manage rebuild-rollups
+    python -m myapp.backend.manage rebuild-student-balances
+    python -m myapp.backend.manage rebuild-search
+
+Die Befehle wirken auf eine Klasse (--class-id, Standard: DEFAULT_CLASS) oder mit --all-classes
+nacheinander auf alle; jede Ausgabezeile trägt dann die class_id.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from myapp.adapters import sync_db as db
+from myapp.tenancy import DEFAULT_CLASS, check_class_id, class_scope, current_class
+
+
+def _print(result: Dict[str, Any]) -> None:
+    print(json.dumps({"class_id": current_class.get(), **result}, ensure_ascii=False), flush=True)
+
+
+def cmd_reconcile(args: argparse.Namespace) -> int:
+    while True:
+        result = db.reconcile_balance(fix=args.fix)
+        _print(result)
+        if not args.interval:
+            # Exit-Code 1, wenn eine nicht korrigierte Abweichung gefunden wurde (für Cronjobs)
+            return 0 if result["ok"] or result["fixed"] else 1
+        time.sleep(args.interval)
+
+
+def cmd_check_indexes(args: argparse.Namespace) -> int:
+    if not hasattr(db, "check_query_plans"):
+        print("Adapter hat keine Query-Pläne (nur MongoDB).")
+        return 0
+    results = db.check_query_plans()
+    for r in results:
+        _print(r)
+    return 1 if any(r["collscan"] for r in results) else 0
+
+
+def cmd_rebuild_rollups(args: argparse.Namespace) -> int:
+    _print({"days": db.rebuild_daily_rollups()})
+    return 0
+
+
+def cmd_rebuild_student_balances(args: argparse.Namespace) -> int:
+    _print({"students": db.rebuild_student_balances()})
+    return 0
+
+
+def cmd_rebuild_search(args: argparse.Namespace) -> int:
+    if hasattr(db, "rebuild_search_terms"):
+        _print({"transactions": db.rebuild_search_terms()})
+    else:
+        _print({"transactions": db.rebuild_search_index()})
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m myapp.backend.manage", description="Klassenkassa Wartung")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_rec = sub.add_parser("reconcile", help="Gespeicherten Kontostand mit Neuberechnung abgleichen")
+    p_rec.add_argument("--fix", action="store_true", help="Abweichung korrigieren")
+    p_rec.add_argument("--interval", type=float, default=0.0, help="periodisch alle N Sekunden prüfen")
+    p_rec.set_defaults(func=cmd_reconcile)
+
+    p_idx = sub.add_parser("check-indexes", help="explain() der Standardabfragen, Exit-Code 1 bei COLLSCAN")
+    p_idx.set_defaults(func=cmd_check_indexes)
+
+    p_roll = sub.add_parser("rebuild-rollups", help="Tagesstatistik (daily_rollups) aus allen Transaktionen neu aufbauen")
+    p_roll.set_defaults(func=cmd_rebuild_rollups)
+
+    p_stud = sub.add_parser("rebuild-student-balances", help="Summen pro Schüler (student_balances) aus allen Transaktionen neu aufbauen")
+    p_stud.set_defaults(func=cmd_rebuild_student_balances)
+
+    p_search = sub.add_parser("rebuild-search", help="Suchbegriffe (terms) aller Transaktionen neu berechnen")
+    p_search.set_defaults(func=cmd_rebuild_search)
+
+    for p in (p_rec, p_idx, p_roll, p_stud, p_search):
+        scope = p.add_mutually_exclusive_group()
+        scope.add_argument("--class-id", type=check_class_id, default=DEFAULT_CLASS, help=f"Klasse (Standard: {DEFAULT_CLASS})")
+        scope.add_argument("--all-classes", action="store_true", help="für jede Klasse mit Daten ausführen")
+
+    return parser
+
+
+def _run_per_class(func: Callable[[argparse.Namespace], int], args: argparse.Namespace) -> int:
+    """Exit-Code: der höchste über alle Klassen."""
+    class_ids = db.list_classes() if args.all_classes else [args.class_id]
+    code = 0
+    for class_id in class_ids:
+        with class_scope(class_id):
+            code = max(code, int(func(args)))
+    return code
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.all_classes and getattr(args, "interval", 0):
+        parser.error("--interval geht nur mit einer Klasse")
+    try:
+        db.connect()
+    except RuntimeError as e:
+        # z. B. In-Memory-DB mit MEMORY_DATA_DIR, während das Backend läuft: beim Beenden würde
+        # manage Snapshot und Journal überschreiben und Buchungen des Backends verlieren
+        raise SystemExit(f"Keine Verbindung zur Datenbank: {e}")
+    try:
+        return _run_per_class(args.func, args)
+    finally:
+        db.disconnect()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,198 @@
+"""
+Metriken im Prometheus-Textformat für GET /metrics, ohne zusätzliche Abhängigkeit.
+
+- HTTP: Dauer und Antwortgröße je Route (Pfad-Vorlage, z. B. /transactions/{tx_id}) als Histogramm,
+  Requests je Status, laufende Requests (MetricsMiddleware, reine ASGI-Middleware)
+- DBPort: Dauer, Fehler, Datenbank-Roundtrips und Dokumente je Adapterfunktion (api._call, myapp.tracing)
+- Serialisierung der gecachten Antworten (api._json_bytes)
+
+Beobachtet wird auf der Event-Loop des Backends; ein Histogramm kostet pro Wert eine Bisektion
+über die Bucket-Grenzen und zwei Additionen.
+"""
+
+from __future__ import annotations
+
+import time
+from bisect import bisect_left
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, MutableMapping, Sequence, Tuple
+
+from myapp.tracing import DbCall
+
+Labels = Tuple[str, ...]
+Scope = MutableMapping[str, Any]
+Message = MutableMapping[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+ASGIApp = Callable[[Scope, Receive, Send], Awaitable[None]]
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, labels: Labels = ()) -> float:
+        return self._values.get(labels, 0.0)
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in sorted(self._values.items()):
+            yield f"{self.name}{_label_text(self.labels, labels)} {_number(value)}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, labels: Labels, value: float) -> None:
+        self._values[labels] = value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # je Labelkombination: Anzahl pro Bucket (nicht kumuliert, letzter = +Inf), Summe, Anzahl
+        self._series: Dict[Labels, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, labels: Labels, value: float) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0, 0.0])
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1][0] += value
+        series[1][1] += 1
+
+    def count(self, labels: Labels) -> int:
+        series = self._series.get(labels)
+        return int(series[1][1]) if series else 0
+
+    def samples(self) -> Iterable[str]:
+        names = self.labels + ("le",)
+        for labels, (counts, (total, n)) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, c in zip(self.buckets + (float("inf"),), counts):
+                cumulative += c
+                yield f"{self.name}_bucket{_label_text(names, labels + (_number(bound),))} {cumulative}"
+            yield f"{self.name}_sum{_label_text(self.labels, labels)} {_number(total)}"
+            yield f"{self.name}_count{_label_text(self.labels, labels)} {int(n)}"
+
+
+Metric = Any  # Counter | Gauge | Histogram
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Any:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self, extra: Iterable[Metric] = ()) -> str:
+        lines: List[str] = []
+        for metric in [*self._metrics, *extra]:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.register(Counter("http_requests_total", "HTTP-Requests nach Route und Status", ("method", "route", "status")))
+http_duration = registry.register(Histogram("http_request_duration_seconds", "Dauer der HTTP-Requests", ("method", "route")))
+http_size = registry.register(
+    Histogram("http_response_size_bytes", "Größe der Antworten", ("method", "route"), buckets=SIZE_BUCKETS)
+)
+http_in_flight = registry.register(Gauge("http_requests_in_flight", "gerade laufende HTTP-Requests"))
+db_duration = registry.register(Histogram("db_call_duration_seconds", "Dauer der DBPort-Aufrufe", ("adapter", "operation")))
+db_errors = registry.register(Counter("db_call_errors_total", "DBPort-Aufrufe mit Ausnahme", ("adapter", "operation")))
+db_round_trips = registry.register(Counter("db_call_round_trips_total", "Datenbank-Roundtrips der DBPort-Aufrufe", ("adapter", "operation")))
+db_documents = registry.register(
+    Counter("db_call_documents_total", "gelieferte Dokumente (Mongo: laut Treiber, memory: Zeilen)", ("adapter", "operation"))
+)
+serialize_duration = registry.register(Histogram("response_serialize_seconds", "JSON-Serialisierung der Lese-Endpunkte"))
+
+
+def observe_db_call(call: DbCall) -> None:
+    labels = (call.adapter, call.operation)
+    db_duration.observe(labels, call.seconds)
+    if call.error:
+        db_errors.inc(labels)
+    if call.round_trips:
+        db_round_trips.inc(labels, call.round_trips)
+    if call.documents:
+        db_documents.inc(labels, call.documents)
+
+
+class MetricsMiddleware:
+    """Misst jeden HTTP-Request bis zum letzten Byte (bei Streams also die ganze Übertragung)."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = int(message["status"])
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        started = time.perf_counter()
+        http_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_in_flight.inc(amount=-1)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            labels = (str(scope["method"]), route)
+            http_duration.observe(labels, time.perf_counter() - started)
+            http_size.observe(labels, size)
+            http_requests.inc(labels + (str(status),))
+
+
+def gauges(name: str, help_text: str, values: Dict[str, Any], label: str = "name") -> Gauge:
+    """Momentaufnahme eines Statistik-dicts (Cache, Feed, ...) als Gauge mit einem Label je Schlüssel."""
+    gauge = Gauge(name, help_text, (label,))
+    for key, value in values.items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            gauge.set((key,), float(value))
+    return gauge
@@ -0,0 +1,244 @@
+"""
+Profile langsamer Requests (opt-in): PROFILE_SLOW_MS > 0 oder PUT /admin/profiling schaltet ein.
+
+Während ein Request läuft, nimmt ein Hintergrund-Thread alle PROFILE_INTERVAL_MS die Call-Stacks
+aller Threads auf (Event-Loop und Threadpool, in dem die sync Adapter laufen; wartende Threads
+werden übersprungen). Dauert der Request länger als die Schwelle, landet ein Bericht als JSON in
+PROFILE_DIR: Route, Parameter, Status, Dauer, alle DBPort-Aufrufe des Requests (myapp.tracing)
+und die Stacks im "folded"-Format (flamegraph.pl / speedscope). Es bleiben die neuesten
+PROFILE_KEEP Berichte.
+Die Stacks sind prozessweit: liefen andere Requests gleichzeitig, steht deren Zahl im Bericht;
+die DB-Aufrufe sind dagegen genau diesem Request zugeordnet.
+Ausgeschaltet kostet die Middleware pro Request eine Attributabfrage; Event-Streams (GET /events)
+werden nie beobachtet, sonst tastete der Sampler ab, solange ein Frontend verbunden ist.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import asdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+from urllib.parse import parse_qsl
+
+from myapp.backend.metrics import ASGIApp, Message, Receive, Scope, Send
+from myapp.tenancy import current_class
+from myapp.tracing import DbCall, request_calls
+
+MAX_STACK_DEPTH = 128
+MAX_STACKS_IN_REPORT = 500
+
+# Innerstes Frame in diesen Modulen: Thread wartet (Selector der Event-Loop, Queue/Lock des Threadpools)
+_IDLE_FILES = ("selectors.py", "threading.py", "queue.py")
+_REPORT_NAME = re.compile(r"^[\w.-]+\.json$")
+# absichtlich langlebig (Server-Sent Events): weder abtasten noch berichten
+STREAMING_PATHS = frozenset({"/events"})
+
+
+class _Watch:
+    """Gesammelte Stacks für einen laufenden Request."""
+
+    def __init__(self) -> None:
+        self.stacks: Dict[str, int] = {}
+        self.samples = 0
+        self.max_concurrent = 1
+
+
+class StackSampler:
+    def __init__(self, interval_ms: float = 5.0) -> None:
+        self.interval_ms = interval_ms
+        self._lock = threading.Lock()
+        self._watches: Set[_Watch] = set()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self) -> _Watch:
+        w = _Watch()
+        with self._lock:
+            self._watches.add(w)
+            for other in self._watches:
+                other.max_concurrent = max(other.max_concurrent, len(self._watches))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+                self._thread.start()
+        return w
+
+    def unwatch(self, w: _Watch) -> None:
+        with self._lock:
+            self._watches.discard(w)
+
+    def _run(self) -> None:
+        # läuft nur, solange beobachtete Requests offen sind
+        while True:
+            with self._lock:
+                watches = list(self._watches)
+                if not watches:
+                    self._thread = None
+                    return
+            stacks = sample_stacks(skip=threading.get_ident())
+            for w in watches:
+                w.samples += 1
+                for stack in stacks:
+                    w.stacks[stack] = w.stacks.get(stack, 0) + 1
+            time.sleep(self.interval_ms / 1000)
+
+
+def sample_stacks(skip: Optional[int] = None) -> List[str]:
+    """Ein Stack je beschäftigtem Thread, Wurzel zuerst, Frames mit ';' getrennt."""
+    names = {t.ident: t.name for t in threading.enumerate()}
+    out: List[str] = []
+    for ident, frame in sys._current_frames().items():
+        if ident == skip or os.path.basename(frame.f_code.co_filename) in _IDLE_FILES:
+            continue
+        frames: List[str] = []
+        f: Any = frame
+        while f is not None and len(frames) < MAX_STACK_DEPTH:
+            frames.append(f"{os.path.basename(f.f_code.co_filename)}:{f.f_code.co_name}")
+            f = f.f_back
+        frames.append(names.get(ident, str(ident)))
+        out.append(";".join(reversed(frames)))
+    return out
+
+
+class Profiler:
+    def __init__(self, threshold_ms: float, directory: str, keep: int, interval_ms: float) -> None:
+        self.threshold_ms = threshold_ms
+        self.directory = directory
+        self.keep = keep
+        self.sampler = StackSampler(interval_ms)
+        self.written = 0
+
+    @classmethod
+    def from_env(cls) -> "Profiler":
+        return cls(
+            threshold_ms=float(os.getenv("PROFILE_SLOW_MS", "0") or 0),
+            directory=os.getenv("PROFILE_DIR", "") or os.path.join(tempfile.gettempdir(), "klassenkassa-profiles"),
+            keep=max(1, int(os.getenv("PROFILE_KEEP", "50"))),
+            interval_ms=float(os.getenv("PROFILE_INTERVAL_MS", "5")),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_ms > 0
+
+    def reports(self) -> List[str]:
+        """Dateinamen der Berichte, neueste zuerst."""
+        try:
+            names = [n for n in os.listdir(self.directory) if _REPORT_NAME.match(n)]
+        except FileNotFoundError:
+            return []
+        return sorted(names, key=lambda n: os.path.getmtime(os.path.join(self.directory, n)), reverse=True)
+
+    def report_path(self, name: str) -> Optional[str]:
+        if not _REPORT_NAME.match(name) or name not in self.reports():
+            return None
+        return os.path.join(self.directory, name)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "threshold_ms": self.threshold_ms,
+            "interval_ms": self.sampler.interval_ms,
+            "directory": self.directory,
+            "keep": self.keep,
+            "written": self.written,
+            "reports": self.reports()[:20],
+        }
+
+    def write(self, report: Dict[str, Any]) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        route = re.sub(r"[^\w]+", "_", str(report["route"])).strip("_") or "root"
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        path = os.path.join(self.directory, f"{stamp}-{report['method'].lower()}-{route}-{int(report['duration_ms'])}ms.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+        self.written += 1
+        # rotieren: nur die neuesten `keep` Berichte behalten
+        for old in self.reports()[self.keep:]:
+            try:
+                os.remove(os.path.join(self.directory, old))
+            except FileNotFoundError:
+                pass
+        return path
+
+
+def build_report(scope: Scope, status: int, duration_ms: float, threshold_ms: float, calls: List[DbCall], w: _Watch, interval_ms: float) -> Dict[str, Any]:
+    route = getattr(scope.get("route"), "path", None) or scope.get("path", "")
+    stacks = sorted(w.stacks.items(), key=lambda kv: kv[1], reverse=True)[:MAX_STACKS_IN_REPORT]
+    return {
+        "time": datetime.now().isoformat(timespec="milliseconds"),
+        "method": scope["method"],
+        "path": scope.get("path", ""),
+        "route": route,
+        "class_id": current_class.get(),
+        "path_params": {k: str(v) for k, v in (scope.get("path_params") or {}).items()},
+        "query": dict(parse_qsl(scope.get("query_string", b"").decode("latin-1"))),
+        "status": status,
+        "duration_ms": round(duration_ms, 2),
+        "threshold_ms": threshold_ms,
+        "concurrent_requests": w.max_concurrent,
+        "db_total_ms": round(sum(c.seconds for c in calls) * 1000, 2),
+        "db_calls": [{**asdict(c), "seconds": round(c.seconds, 6)} for c in calls],
+        "samples": w.samples,
+        "interval_ms": interval_ms,
+        # "Thread;datei:funktion;... Anzahl" – direkt für flamegraph.pl / speedscope
+        "folded": [f"{stack} {count}" for stack, count in stacks],
+    }
+
+
+profiler = Profiler.from_env()
+
+
+def _is_stream(scope: Scope) -> bool:
+    # Pfad ohne root_path, damit auch /classes/{class_id}/events passt
+    path = scope.get("path", "")
+    root_path = scope.get("root_path", "")
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+    if path.rstrip("/") in STREAMING_PATHS:
+        return True
+    accept = dict(scope.get("headers") or []).get(b"accept", b"")
+    return b"text/event-stream" in accept
+
+
+class ProfilingMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not profiler.enabled or _is_stream(scope):
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        streaming = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, streaming
+            if message["type"] == "http.response.start":
+                status = int(message["status"])
+                headers = dict(message.get("headers") or [])
+                streaming = headers.get(b"content-type", b"").startswith(b"text/event-stream")
+            await send(message)
+
+        calls: List[DbCall] = []
+        token = request_calls.set(calls)
+        w = profiler.sampler.watch()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            profiler.sampler.unwatch(w)
+            request_calls.reset(token)
+            threshold = profiler.threshold_ms
+            # sonstige Streams, die erst an der Antwort erkennbar sind
+            if threshold > 0 and duration_ms >= threshold and not streaming:
+                report = build_report(scope, status, duration_ms, threshold, calls, w, profiler.sampler.interval_ms)
+                await asyncio.to_thread(profiler.write, report)
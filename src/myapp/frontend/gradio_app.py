@@ -1,27 +1,84 @@
 from __future__ import annotations
 
+import json
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date as dt_date, datetime as dt
-from typing import Any, Dict, List, Optional, Tuple, Union, cast
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union, cast
+from urllib.parse import urlencode
 
 import gradio as gr
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 BACKEND_URL = os.getenv("BACKEND_URL", "http://backend:8000")
 
+# gemeinsame Keep-Alive-Verbindungen zum Backend
+HTTP_TIMEOUT = float(os.getenv("FRONTEND_HTTP_TIMEOUT", "5"))
+HTTP_RETRIES = int(os.getenv("FRONTEND_HTTP_RETRIES", "3"))
+HTTP_POOL_SIZE = int(os.getenv("FRONTEND_HTTP_POOL_SIZE", "10"))
+
+# Transaktionen und Kontostand live über GET /events nachführen statt nur per "Aktualisieren"
+LIVE_UPDATES = os.getenv("FRONTEND_LIVE_UPDATES", "1").lower() in {"1", "true", "yes"}
+# ohne Daten (auch ohne Heartbeat des Backends) so lange gilt die Event-Verbindung als tot
+EVENTS_READ_TIMEOUT = 60.0
+# gleichzeitig offene Live-Seiten; jede belegt solange einen Thread von Gradio (Standard ~40), darüber
+# wird die Seite nur geladen. Klicks der anderen Nutzer brauchen die übrigen Threads.
+LIVE_SESSIONS = int(os.getenv("FRONTEND_LIVE_SESSIONS", "20"))
+TX_TABLE_LIMIT = 200
+
 TX_HEADERS: List[str] = ["id", "typ", "betrag", "beschreibung", "zeitstempel", "kategorie", "schüler", "datum"]
+STATS_HEADERS: List[str] = ["datum", "einnahmen", "ausgaben", "kontostand"]
+STATS_DAYS = 14
 
 JsonDict = Dict[str, Any]
 JsonList = List[JsonDict]
+PageValues = Tuple[List[List[Any]], str, List[List[str]], List[List[str]], List[List[str]]]
+
+# Sitzung -> aktiver Filter; solange gefiltert wird, patcht live_updates die Transaktionstabelle nicht
+_active_filters: Dict[str, str] = {}
+_live_slots = threading.BoundedSemaphore(LIVE_SESSIONS)
 
+PING: JsonDict = {"type": "ping"}
+
+
+def _make_session() -> requests.Session:
+    # Lesezugriffe werden bei Verbindungsfehlern und 502/503/504 mit Backoff wiederholt;
+    # POST/DELETE nur, wenn die Verbindung gar nicht zustande kam (urllib3-Standard)
+    retry = Retry(
+        total=HTTP_RETRIES,
+        backoff_factor=0.2,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({"GET"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
 
-def _safe_get_json(url: str, default: Any) -> Any:
+
+_session = _make_session()
+_executor = ThreadPoolExecutor(max_workers=HTTP_POOL_SIZE, thread_name_prefix="backend-http")
+
+
+def _get_json(path: str) -> Any:
     try:
-        r = requests.get(url, timeout=5)
+        r = _session.get(f"{BACKEND_URL}{path}", timeout=HTTP_TIMEOUT)
         r.raise_for_status()
         return r.json()
-    except Exception:
-        return default
+    except requests.RequestException as e:
+        raise gr.Error(f"Backend nicht erreichbar ({path}): {e}")
+
+
+def _get_many(paths: Dict[str, str]) -> Dict[str, Any]:
+    """Lädt mehrere Endpunkte gleichzeitig – die Wartezeit ist die des langsamsten Aufrufs."""
+    futures = {key: _executor.submit(_get_json, path) for key, path in paths.items()}
+    return {key: f.result() for key, f in futures.items()}
 
 
 def _normalize_tx(t: JsonDict) -> JsonDict:
@@ -41,23 +98,27 @@ def _tx_rows(txs: JsonList) -> List[List[Any]]:
     return [[_normalize_tx(t).get(h) for h in TX_HEADERS] for t in txs]
 
 
-def refresh_all(filter_text: str = "") -> Tuple[List[List[Any]], str]:
-    txs = cast(JsonList, _safe_get_json(f"{BACKEND_URL}/transactions", default=[]))
-    bal = cast(JsonDict, _safe_get_json(f"{BACKEND_URL}/balance", default={"current_total": 0}))
+def _tx_path(filter_text: str) -> str:
+    # neueste zuerst, die Tabelle zeigt ohnehin max. 200 Zeilen; gefiltert wird im Backend (Suchindex)
+    ft = (filter_text or "").strip()
+    if ft:
+        return f"/transactions/search?{urlencode({'q': ft, 'limit': TX_TABLE_LIMIT, 'order': 'desc'})}"
+    return f"/transactions?limit={TX_TABLE_LIMIT}&order=desc"
 
-    if filter_text:
-        ft = filter_text.strip().lower()
 
-        def match(t: JsonDict) -> bool:
-            n = _normalize_tx(t)
-            blob = " ".join(str(n.get(k, "")) for k in TX_HEADERS).lower()
-            return ft in blob
+def _balance_text(bal: JsonDict) -> str:
+    return f'{float(bal.get("current_total", 0)):.2f} €'
 
-        txs = [t for t in txs if match(t)]
 
-    rows = _tx_rows(txs)
-    balance_str = f'{float(bal.get("current_total", 0)):.2f} €'
-    return rows, balance_str
+def _set_filter(request: Optional[gr.Request], filter_text: str) -> None:
+    if request is not None and request.session_hash:
+        _active_filters[request.session_hash] = (filter_text or "").strip()
+
+
+def refresh_all(filter_text: str = "", request: Optional[gr.Request] = None) -> Tuple[List[List[Any]], str]:
+    _set_filter(request, filter_text)
+    data = _get_many({"txs": _tx_path(filter_text), "balance": "/balance"})
+    return _tx_rows(cast(JsonList, data["txs"])), _balance_text(cast(JsonDict, data["balance"]))
 
 
 def _normalize_date_str(s: str) -> str:
@@ -78,6 +139,7 @@ def add_transaction(
     student: str,
     desc: str,
     tx_date_str: str,
+    request: Optional[gr.Request] = None,
 ) -> Tuple[List[List[Any]], str]:
     payload: JsonDict = {
         "type": t_type,
@@ -88,13 +150,15 @@ def add_transaction(
         "date": _normalize_date_str(tx_date_str),
     }
     try:
-        requests.post(f"{BACKEND_URL}/transactions", json=payload, timeout=10).raise_for_status()
+        _session.post(f"{BACKEND_URL}/transactions", json=payload, timeout=10).raise_for_status()
     except Exception as e:
         raise gr.Error(f"Transaktion konnte nicht gespeichert werden: {e}")
-    return refresh_all("")
+    return refresh_all("", request)
 
 
-def delete_selected_transaction(tx_table_data: List[List[Any]], selected_tx_idx: Optional[int]) -> Tuple[List[List[Any]], str, None]:
+def delete_selected_transaction(
+    tx_table_data: List[List[Any]], selected_tx_idx: Optional[int], request: Optional[gr.Request] = None
+) -> Tuple[List[List[Any]], str, None]:
     if selected_tx_idx is None:
         raise gr.Error("Bitte zuerst eine Transaktion anklicken.")
     if selected_tx_idx < 0 or selected_tx_idx >= len(tx_table_data):
@@ -105,22 +169,46 @@ def delete_selected_transaction(tx_table_data: List[List[Any]], selected_tx_idx:
         raise gr.Error("Ungültige ID.")
 
     try:
-        requests.delete(f"{BACKEND_URL}/transactions/{tx_id}", timeout=10).raise_for_status()
+        _session.delete(f"{BACKEND_URL}/transactions/{tx_id}", timeout=10).raise_for_status()
     except Exception as e:
         raise gr.Error(f"Löschen fehlgeschlagen: {e}")
 
-    rows, bal = refresh_all("")
+    rows, bal = refresh_all("", request)
     return rows, bal, None
 
 
-def refresh_savings_with_ids() -> List[List[str]]:
-    goals = cast(JsonList, _safe_get_json(f"{BACKEND_URL}/savings-goals?limit=3", default=[]))
-    rows: List[List[str]] = [[str(g["id"]), str(g["name"]), f'{float(g["amount"]):.2f} €'] for g in goals]
+def _stats_rows(days: JsonList) -> List[List[str]]:
+    # neuester Tag oben
+    return [
+        [str(d["date"]), f'{float(d["income"]):.2f} €', f'{float(d["expense"]):.2f} €', f'{float(d["balance"]):.2f} €']
+        for d in reversed(days)
+    ]
+
+
+def refresh_stats() -> List[List[str]]:
+    return _stats_rows(cast(JsonList, _get_json(f"/stats/daily?days={STATS_DAYS}")))
+
+
+def _goal_rows(goals: JsonList) -> List[List[str]]:
+    rows: List[List[str]] = [[str(g["id"]), str(g["name"]), f'{float(g["amount"]):.2f} €', _goal_progress_text(g)] for g in goals]
     while len(rows) < 3:
-        rows.append(["", "", ""])
+        rows.append(["", "", "", ""])
     return rows
 
 
+def refresh_savings_with_ids() -> List[List[str]]:
+    return _goal_rows(cast(JsonList, _get_json("/savings-goals?limit=3")))
+
+
+def _goal_progress_text(goal: Dict[str, Any]) -> str:
+    text = f'{float(goal.get("percent", 0.0)):.0f} %'
+    if float(goal.get("remaining", 0.0)) <= 0:
+        return text + " – erreicht"
+    if goal.get("projected_date"):
+        return text + f' – voraussichtlich {goal["projected_date"]}'
+    return text
+
+
 def add_saving_goal(name: str, amount: Union[int, float, None]) -> List[List[str]]:
     name = (name or "").strip()
     if not name:
@@ -128,7 +216,7 @@ def add_saving_goal(name: str, amount: Union[int, float, None]) -> List[List[str
 
     payload: JsonDict = {"name": name, "amount": float(amount or 0)}
     try:
-        r = requests.post(f"{BACKEND_URL}/savings-goals", json=payload, timeout=10)
+        r = _session.post(f"{BACKEND_URL}/savings-goals", json=payload, timeout=10)
         if r.status_code >= 400:
             detail = r.json().get("detail", "Unbekannter Fehler")
             raise RuntimeError(detail)
@@ -149,24 +237,142 @@ def delete_selected_saving_goal(table_data: List[List[Any]], selected_goal_idx:
         raise gr.Error("Diese Zeile kann nicht gelöscht werden.")
 
     try:
-        requests.delete(f"{BACKEND_URL}/savings-goals/{goal_id}", timeout=10).raise_for_status()
+        _session.delete(f"{BACKEND_URL}/savings-goals/{goal_id}", timeout=10).raise_for_status()
     except Exception as e:
         raise gr.Error(f"Sparziel konnte nicht gelöscht werden: {e}")
 
     return refresh_savings_with_ids(), None
 
 
-def refresh_students() -> List[List[str]]:
-    students = cast(JsonList, _safe_get_json(f"{BACKEND_URL}/students", default=[]))
+def _student_rows(students: JsonList) -> List[List[str]]:
     return [[str(s["id"]), str(s["name"])] for s in students]
 
 
+def refresh_students() -> List[List[str]]:
+    return _student_rows(cast(JsonList, _get_json("/students")))
+
+
+def _records(table: JsonDict) -> JsonList:
+    # GET /dashboard liefert Tabellen als {"columns": [...], "rows": [[...], ...]}
+    columns = cast(List[str], table["columns"])
+    return [dict(zip(columns, row)) for row in table["rows"]]
+
+
+def _fetch_dashboard(filter_text: str) -> JsonDict:
+    params: JsonDict = {"tx_limit": TX_TABLE_LIMIT, "stats_days": STATS_DAYS}
+    ft = (filter_text or "").strip()
+    if ft:
+        params["q"] = ft
+    return cast(JsonDict, _get_json(f"/dashboard?{urlencode(params)}"))
+
+
+def _page_values(data: JsonDict) -> PageValues:
+    return (
+        _tx_rows(_records(data["transactions"])),
+        _balance_text({"current_total": data["balance"]}),
+        _goal_rows(_records(data["savings_goals"])),
+        _student_rows(_records(data["students"])),
+        _stats_rows(_records(data["stats"])),
+    )
+
+
+def load_page(filter_text: str = "") -> PageValues:
+    """Alle Tabellen beim Seitenaufruf mit einem Aufruf von GET /dashboard."""
+    return _page_values(_fetch_dashboard(filter_text))
+
+
+def _events(last_id: int) -> Iterator[Tuple[int, JsonDict]]:
+    """
+    Ereignisse aus GET /events (Server-Sent Events) ab last_id, bis die Verbindung abbricht.
+    Heartbeats des Backends (Kommentarzeilen) kommen als (0, PING) durch, damit der Aufrufer
+    auch in ruhigen Phasen regelmäßig die Kontrolle zurückbekommt.
+    """
+    headers = {"Accept": "text/event-stream", "Last-Event-ID": str(last_id)}
+    with _session.get(f"{BACKEND_URL}/events", headers=headers, stream=True, timeout=(HTTP_TIMEOUT, EVENTS_READ_TIMEOUT)) as r:
+        r.raise_for_status()
+        event_id, data = 0, ""
+        for line in r.iter_lines(decode_unicode=True):
+            if line.startswith(":"):
+                yield 0, PING
+            elif line.startswith("id:"):
+                event_id = int(line[3:].strip())
+            elif line.startswith("data:"):
+                data += line[5:].strip()
+            elif not line and data:
+                yield event_id, cast(JsonDict, json.loads(data))
+                data = ""
+
+
+def _apply_event(txs: JsonList, event: JsonDict) -> bool:
+    """Patcht die Transaktionsliste (neueste zuerst); idempotent, da Ereignisse doppelt kommen können."""
+    if event["type"] == "tx_created":
+        tx = cast(JsonDict, event["tx"])
+        if any(t["id"] == tx["id"] for t in txs):
+            return False
+        txs.insert(0, tx)
+        del txs[TX_TABLE_LIMIT:]
+        return True
+    if event["type"] == "tx_deleted":
+        before = len(txs)
+        txs[:] = [t for t in txs if t["id"] != event["id"]]
+        return len(txs) != before
+    return False
+
+
+def live_updates(filter_text: str = "", request: Optional[gr.Request] = None) -> Iterator[Tuple[Any, ...]]:
+    """
+    Seitenaufruf mit Live-Aktualisierung: zuerst alle Tabellen (GET /dashboard), danach werden
+    Transaktionen und Kontostand aus GET /events gepatcht statt neu geladen. Während ein Filter
+    aktiv ist, bleibt die Transaktionstabelle stehen, der Kontostand läuft weiter.
+    Gradio bemerkt einen geschlossenen Tab erst beim nächsten yield; deshalb wird auch bei jedem
+    Heartbeat und jedem Verbindungsfehler (ohne Änderung) geliefert, sonst hinge der Thread bis
+    zum nächsten echten Ereignis und der Sitzungseintrag bliebe stehen.
+    """
+    data = _fetch_dashboard(filter_text)
+    if not _live_slots.acquire(blocking=False):
+        yield _page_values(data)  # alle Live-Plätze belegt: nur laden, "Aktualisieren" geht weiterhin
+        return
+
+    session = request.session_hash if request is not None and request.session_hash else ""
+    _set_filter(request, filter_text)
+    txs = _records(data["transactions"])
+    last_id = int(data.get("event_id") or 0)
+    skip = gr.skip()
+    failures = 0
+    try:
+        yield _page_values(data)
+        while True:
+            try:
+                for event_id, event in _events(last_id):
+                    failures = 0
+                    last_id = event_id or last_id
+                    filtered = bool(_active_filters.get(session))
+                    if event is PING:
+                        yield skip, skip, skip, skip, skip
+                    elif event["type"] == "balance":
+                        yield skip, _balance_text(event), skip, skip, skip
+                    elif event["type"] == "reset":
+                        data = _fetch_dashboard("")
+                        txs = _records(data["transactions"])
+                        values = _page_values(data)
+                        yield (skip if filtered else values[0],) + values[1:]
+                    elif _apply_event(txs, event) and not filtered:
+                        yield _tx_rows(txs), skip, skip, skip, skip
+            except (requests.RequestException, gr.Error):
+                failures += 1
+            time.sleep(min(30, 2**failures))
+            yield skip, skip, skip, skip, skip
+    finally:
+        _active_filters.pop(session, None)
+        _live_slots.release()
+
+
 def add_student(name: str) -> List[List[str]]:
     name = (name or "").strip()
     if not name:
         return refresh_students()
     try:
-        r = requests.post(f"{BACKEND_URL}/students", json={"name": name}, timeout=10)
+        r = _session.post(f"{BACKEND_URL}/students", json={"name": name}, timeout=10)
         if r.status_code >= 400:
             detail = r.json().get("detail", "Unbekannter Fehler")
             raise RuntimeError(detail)
@@ -206,13 +412,12 @@ with gr.Blocks(title="Klassenkassa – Verwaltungsoberfläche") as demo:
             gr.Markdown("## Sparziele (max. 3)")
 
             savings_table = gr.Dataframe(
-                headers=["", "Sparziel", "Betrag"],
-                value=refresh_savings_with_ids(),
+                headers=["", "Sparziel", "Betrag", "Fortschritt"],
                 interactive=False,
                 row_count=3,
                 row_limits=(3, 3),
-                column_count=3,
-                column_limits=(3, 3),
+                column_count=4,
+                column_limits=(4, 4),
             )
 
             savings_table.select(on_goal_select, inputs=None, outputs=selected_goal_idx)
@@ -233,8 +438,13 @@ with gr.Blocks(title="Klassenkassa – Verwaltungsoberfläche") as demo:
             )
 
         with gr.Column(scale=3):
-            gr.Markdown("## Statistik")
-            gr.Textbox(label="Diagramm / Information", value="Hier erscheint später ein Diagramm.", interactive=False)
+            gr.Markdown(f"## Statistik (letzte {STATS_DAYS} Tage)")
+            stats_table = gr.Dataframe(
+                headers=STATS_HEADERS,
+                interactive=False,
+                row_count=STATS_DAYS,
+                column_count=len(STATS_HEADERS),
+            )
 
     with gr.Row():
         with gr.Column(scale=2):
@@ -245,7 +455,6 @@ with gr.Blocks(title="Klassenkassa – Verwaltungsoberfläche") as demo:
             gr.Markdown("### Schülerliste")
             students_table = gr.Dataframe(
                 headers=["ID", "Name"],
-                value=refresh_students(),
                 interactive=False,
                 row_count=10,
                 row_limits=(1, 50),
@@ -292,6 +501,7 @@ with gr.Blocks(title="Klassenkassa – Verwaltungsoberfläche") as demo:
         btn_delete_tx = gr.Button("🗑️ Transaktion löschen", variant="stop")
 
     btn_refresh.click(refresh_all, inputs=[tx_filter], outputs=[tx_table, balance_big])
+    btn_refresh.click(refresh_stats, outputs=[stats_table])
     btn_apply_filter.click(refresh_all, inputs=[tx_filter], outputs=[tx_table, balance_big])
     btn_add_tx.click(
         add_transaction,
@@ -304,9 +514,14 @@ with gr.Blocks(title="Klassenkassa – Verwaltungsoberfläche") as demo:
         outputs=[tx_table, balance_big, selected_tx_idx],
     )
 
-    demo.load(refresh_all, inputs=[tx_filter], outputs=[tx_table, balance_big])
-    demo.load(refresh_savings_with_ids, outputs=[savings_table])
-    demo.load(refresh_students, outputs=[students_table])
+    # live_updates läuft, solange die Seite offen ist: LIVE_SESSIONS Streams plus Luft für Seiten, die
+    # darüber hinaus nur geladen werden; bleibt unter Gradios Threadpool, damit Klicks nicht warten
+    demo.load(
+        live_updates if LIVE_UPDATES else load_page,
+        inputs=[tx_filter],
+        outputs=[tx_table, balance_big, savings_table, students_table, stats_table],
+        concurrency_limit=LIVE_SESSIONS + 5,
+    )
 
 if __name__ == "__main__":
     demo.launch(server_name="0.0.0.0", server_port=7860)
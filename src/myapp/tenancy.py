@@ -0,0 +1,37 @@
+"""
+Zu welcher Klasse ein Aufruf gehört: ein Backend-Prozess führt die Kassen vieler Klassen.
+
+api setzt `current_class` je Request aus dem Pfad (/classes/{class_id}/...); ohne Präfix gilt
+DEFAULT_CLASS, damit bestehende Clients und Bestandsdaten unverändert weiterlaufen. Die Adapter
+lesen die Klasse hier, statt dass jede DBPort-Methode einen weiteren Parameter bekommt; wie bei
+myapp.tracing tragen contextvars sie auch in den Threadpool. Skripte (manage) nutzen class_scope.
+"""
+
+from __future__ import annotations
+
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+DEFAULT_CLASS = "default"
+
+# auch Teil von Schlüsseln (Mongo-_id "klasse/datum"), daher ohne "/" und Leerzeichen
+CLASS_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+current_class: ContextVar[str] = ContextVar("current_class", default=DEFAULT_CLASS)
+
+
+def check_class_id(class_id: str) -> str:
+    if not CLASS_ID_PATTERN.match(class_id):
+        raise ValueError("Klassen-ID: 1-64 Zeichen aus Buchstaben, Ziffern, '-' und '_'")
+    return class_id
+
+
+@contextmanager
+def class_scope(class_id: str) -> Iterator[str]:
+    token = current_class.set(check_class_id(class_id))
+    try:
+        yield class_id
+    finally:
+        current_class.reset(token)
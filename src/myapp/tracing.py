@@ -0,0 +1,35 @@
+"""
+Welche DBPort-Aufrufe ein Request macht und was sie kosten (Dauer, Datenbank-Roundtrips, Dokumente).
+
+api._call legt je Aufruf einen DbCall in `current_call` ab; der Mongo-Adapter zählt darin über einen
+CommandListener Roundtrips und gelieferte Dokumente mit. contextvars tragen den Aufruf auch in den
+Threadpool (run_in_threadpool kopiert den Kontext), parallele Aufrufe (asyncio.gather) sehen je ihren eigenen.
+Ist `request_calls` gesetzt (Profiling langsamer Requests), hängt api._call jeden DbCall dort an.
+"""
+
+from __future__ import annotations
+
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import List, Optional
+
+
+@dataclass
+class DbCall:
+    adapter: str
+    operation: str
+    seconds: float = 0.0
+    round_trips: int = 0
+    documents: int = 0
+    error: bool = False
+
+
+current_call: ContextVar[Optional[DbCall]] = ContextVar("current_db_call", default=None)
+request_calls: ContextVar[Optional[List[DbCall]]] = ContextVar("request_db_calls", default=None)
+
+
+def record_round_trip(documents: int = 0) -> None:
+    call = current_call.get()
+    if call is not None:
+        call.round_trips += 1
+        call.documents += documents
@@ -1,4 +1,116 @@
+import threading
+import time
+
+import gradio as gr
+import pytest
+import requests
+
+from myapp.frontend import gradio_app
 from myapp.frontend.gradio_app import demo
 
 def test_gradio_app_exists():
     assert demo is not None
+
+
+def test_refresh_all_fetches_concurrently(monkeypatch):
+    def fake_get_json(path):
+        time.sleep(0.2)
+        return {"current_total": 12.5} if path == "/balance" else []
+
+    monkeypatch.setattr(gradio_app, "_get_json", fake_get_json)
+    t0 = time.perf_counter()
+    rows, balance = gradio_app.refresh_all("")
+    elapsed = time.perf_counter() - t0
+
+    assert (rows, balance) == ([], "12.50 €")
+    assert elapsed < 0.35  # zwei Aufrufe à 0.2 s, nicht nacheinander
+
+
+def test_load_page_uses_dashboard(monkeypatch):
+    calls = []
+
+    def fake_get_json(path):
+        calls.append(path)
+        return {
+            "balance": 12.5,
+            "transactions": {"columns": ["id", "type", "amount"], "rows": [[3, "ausgabe", 2.0]]},
+            "savings_goals": {"columns": ["id", "name", "amount", "percent", "remaining", "projected_date"], "rows": []},
+            "students": {"columns": ["id", "name"], "rows": [[1, "Anna"]]},
+            "stats": {"columns": ["date", "income", "expense", "balance"], "rows": [["2025-01-01", 1, 0, 1]]},
+        }
+
+    monkeypatch.setattr(gradio_app, "_get_json", fake_get_json)
+    txs, balance, goals, students, stats = gradio_app.load_page("")
+
+    assert len(calls) == 1 and calls[0].startswith("/dashboard?")
+    assert txs[0][:3] == [3, "ausgabe", 2.0]
+    assert balance == "12.50 €"
+    assert students == [["1", "Anna"]]
+    assert len(goals) == 3
+    assert stats == [["2025-01-01", "1.00 €", "0.00 €", "1.00 €"]]
+
+
+def test_get_json_raises_instead_of_silent_default(monkeypatch):
+    def fail(*args, **kwargs):
+        raise requests.ConnectionError("refused")
+
+    monkeypatch.setattr(gradio_app._session, "get", fail)
+    with pytest.raises(gr.Error):
+        gradio_app.refresh_students()
+
+
+def test_apply_event_patches_rows_idempotently():
+    txs = [{"id": 2}, {"id": 1}]
+    assert gradio_app._apply_event(txs, {"type": "tx_created", "tx": {"id": 3}})
+    assert not gradio_app._apply_event(txs, {"type": "tx_created", "tx": {"id": 3}})
+    assert gradio_app._apply_event(txs, {"type": "tx_deleted", "id": 1})
+    assert not gradio_app._apply_event(txs, {"type": "tx_deleted", "id": 1})
+    assert [t["id"] for t in txs] == [3, 2]
+
+
+class _FakeStream:
+    def __init__(self, lines):
+        self.lines = lines
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_lines(self, decode_unicode=True):
+        return iter(self.lines)
+
+
+def test_live_updates_yields_on_heartbeat_and_cleans_up(monkeypatch):
+    dashboard = {
+        "balance": 0.0,
+        "event_id": 0,
+        "transactions": {"columns": ["id"], "rows": []},
+        "savings_goals": {"columns": ["id"], "rows": []},
+        "students": {"columns": ["id"], "rows": []},
+        "stats": {"columns": ["date"], "rows": []},
+    }
+    monkeypatch.setattr(gradio_app, "_get_json", lambda path: dashboard)
+    monkeypatch.setattr(gradio_app._session, "get", lambda *a, **kw: _FakeStream([": ping", ""]))
+    monkeypatch.setattr(gradio_app, "_live_slots", threading.BoundedSemaphore(1))
+
+    class Req:
+        session_hash = "abc"
+
+    gen = gradio_app.live_updates("", Req())
+    next(gen)  # Seite
+    assert gradio_app._active_filters == {"abc": ""}
+    assert next(gen) == (gr.skip(),) * 5  # Heartbeat: nichts ändern, aber Kontrolle zurück an Gradio
+    # zweite Seite bei belegtem Live-Platz: nur laden, dann Ende
+    other = gradio_app.live_updates("", None)
+    next(other)
+    with pytest.raises(StopIteration):
+        next(other)
+
+    gen.close()  # Tab geschlossen
+    assert gradio_app._active_filters == {}
+    assert gradio_app._live_slots.acquire(blocking=False)
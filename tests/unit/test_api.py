@@ -0,0 +1,269 @@
+import gzip
+import json
+from datetime import date, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from myapp.adapters import db_memory
+from myapp.backend import api
+
+
+@pytest.fixture
+def client(monkeypatch):
+    db_memory._reset_storage()
+    db_memory.connect(seed=False)
+    monkeypatch.setattr(api, "db", db_memory)
+    api.cache.clear()
+    return TestClient(api.app)
+
+
+def test_bulk_import_ndjson_reports_row_errors(client):
+    body = "\n".join([
+        '{"type": "einzahlung", "amount": 10, "student": "Anna"}',
+        '{"type": "einzahlung", "amount": "abc"}',
+        '{"type": "ausgabe", "amount": 4, "date": "2025-01-02"}',
+        '{"type": "spende", "amount": 1}',
+    ])
+    r = client.post("/transactions/bulk?chunk_size=2", content=body, headers={"Content-Type": "application/x-ndjson"})
+    assert r.status_code == 200
+    data = r.json()
+    assert data["inserted"] == 2
+    assert [e["line"] for e in data["errors"]] == [2, 4]
+    assert client.get("/balance").json()["current_total"] == 6.0
+
+
+def test_bulk_import_csv(client):
+    body = "type,amount,description,date\neinzahlung,5,Startgeld,2025-01-01\neinzahlung,2.5,,\n"
+    r = client.post("/transactions/bulk", content=body, headers={"Content-Type": "text/csv"})
+    assert r.json() == {"inserted": 2, "failed": 0, "errors": []}
+    assert client.get("/balance").json()["current_total"] == 7.5
+
+
+def test_list_transactions_keyset_pagination_and_filters(client):
+    for i in range(5):
+        client.post("/transactions", json={"type": "einzahlung", "amount": 1, "student": "Anna" if i % 2 else "Ben"})
+
+    r = client.get("/transactions?limit=2")
+    assert [t["id"] for t in r.json()] == [1, 2]
+    assert r.headers["X-Next-Cursor"] == "2"
+
+    r = client.get("/transactions?limit=2&after_id=4")
+    assert [t["id"] for t in r.json()] == [5]
+    assert "X-Next-Cursor" not in r.headers
+
+    r = client.get("/transactions?student=Ben&order=desc")
+    assert [t["id"] for t in r.json()] == [5, 3, 1]
+
+
+def test_health_db_memory(client):
+    res = client.get("/health/db")
+    assert res.status_code == 200
+    assert res.json()["adapter"] == "memory"
+    assert res.json()["ok"] is True
+
+
+def test_read_cache_etag_and_invalidation(client):
+    first = client.get("/balance")
+    assert first.headers["X-Cache"] == "MISS"
+    etag = first.headers["ETag"]
+
+    again = client.get("/balance", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["X-Cache"] == "HIT"
+
+    client.post("/transactions", json={"type": "einzahlung", "amount": 12})
+    changed = client.get("/balance", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json() == {"current_total": 12.0}
+
+    stats = client.get("/cache/stats").json()
+    assert (stats["hits"], stats["misses"], stats["not_modified"]) == (1, 2, 1)
+
+
+def test_export_streams_filtered_batches(client, monkeypatch):
+    monkeypatch.setattr(api, "EXPORT_BATCH_SIZE", 2)
+    for i in range(5):
+        client.post("/transactions", json={"type": "einzahlung", "amount": i + 1, "student": "Anna" if i % 2 else "Ben"})
+
+    res = client.get("/transactions/export", params={"format": "csv", "gzip": "true", "student": "Ben"})
+    assert res.headers["content-type"] == "application/gzip"
+    lines = gzip.decompress(res.content).decode("utf-8").splitlines()
+    assert lines[0].startswith("id,type,amount")
+    assert [line.split(",")[0] for line in lines[1:]] == ["1", "3", "5"]
+
+    blocks = [json.loads(line) for line in client.get("/transactions/export?format=columnar").text.splitlines()]
+    assert [b["id"] for b in blocks] == [[1, 2], [3, 4], [5]]
+
+
+def test_student_balance_endpoints(client):
+    anna = client.post("/students", json={"name": "Anna"}).json()
+    assert client.get(f"/students/{anna['id']}/balance").json()["balance"] == 0.0
+
+    client.post("/transactions", json={"type": "einzahlung", "amount": 8, "student": "Anna"})
+    assert client.get(f"/students/{anna['id']}/balance").json()["balance"] == 8.0
+    assert client.get("/students/balances").json()[0]["count"] == 1
+    assert client.get("/students/999/balance").status_code == 404
+
+
+def test_savings_goal_progress_and_projection(client):
+    today = date.today()
+    for n in range(10):
+        client.post("/transactions", json={"type": "einzahlung", "amount": 3, "date": (today - timedelta(days=n)).isoformat()})
+
+    goal = client.post("/savings-goals", json={"name": "Ausflug", "amount": 60}).json()
+    assert goal["saved"] == 30.0
+    assert goal["percent"] == 50.0
+
+    # 30 € in den letzten 30 Tagen -> 1 € pro Tag -> noch 30 Tage
+    listed = client.get("/savings-goals").json()[0]
+    assert listed["projected_date"] == (today + timedelta(days=30)).isoformat()
+
+    client.post("/transactions", json={"type": "einzahlung", "amount": 40})
+    assert client.get("/savings-goals").json()[0]["remaining"] == 0.0
+
+
+def test_goals_share_the_balance_oldest_first(client):
+    today = date.today()
+    for n in range(10):
+        client.post("/transactions", json={"type": "einzahlung", "amount": 3, "date": (today - timedelta(days=n)).isoformat()})
+    client.post("/savings-goals", json={"name": "Kopien", "amount": 20})
+    newer = client.post("/savings-goals", json={"name": "Ausflug", "amount": 60}).json()
+
+    # 30 € Kontostand: 20 € decken das ältere Ziel, nur der Rest zählt für das neuere
+    assert (newer["saved"], newer["funding_order"]) == (10.0, 2)
+    goals = client.get("/savings-goals").json()
+    assert [(g["name"], g["saved"], g["percent"]) for g in goals] == [("Ausflug", 10.0, 16.7), ("Kopien", 20.0, 100.0)]
+    # 1 € pro Tag, es fehlen 20 + 60 - 30 = 50 €
+    assert goals[0]["projected_date"] == (today + timedelta(days=50)).isoformat()
+    assert sum(g["saved"] for g in goals) == 30.0
+
+
+def test_search_endpoint_paginates(client):
+    for i, student in enumerate(["Anna", "Annika", "Ben"]):
+        client.post("/transactions", json={"type": "einzahlung", "amount": 5 + i, "student": student, "category": "Ausflug"})
+
+    res = client.get("/transactions/search", params={"q": "ann ausfl", "limit": 1})
+    assert [t["student"] for t in res.json()] == ["Annika"]
+    nxt = client.get("/transactions/search", params={"q": "ann ausfl", "after_id": res.headers["X-Next-Cursor"]})
+    assert [t["student"] for t in nxt.json()] == ["Anna"]
+
+    assert [t["id"] for t in client.get("/transactions/search", params={"q": "7"}).json()] == [3]
+
+
+def test_dashboard_compact_payload_and_invalidation(client):
+    today = date.today().isoformat()
+    client.post("/transactions", json={"type": "einzahlung", "amount": 30, "category": "Ausflug", "date": today})
+    client.post("/transactions", json={"type": "ausgabe", "amount": 5, "category": "Material", "date": today})
+    client.post("/students", json={"name": "Anna"})
+    client.post("/savings-goals", json={"name": "Wandertag", "amount": 50})
+
+    r = client.get("/dashboard?tx_limit=1&stats_days=3")
+    data = r.json()
+    assert data["balance"] == 25.0
+    assert data["transactions"]["columns"][:3] == ["id", "type", "amount"]
+    assert data["transactions"]["rows"][0][2] == 5.0  # neueste zuerst
+    assert data["next_cursor"] == data["transactions"]["rows"][0][0]
+    assert data["students"] == {"columns": ["id", "name"], "rows": [[1, "Anna"]]}
+    assert data["savings_goals"]["rows"][0][1:5] == ["Wandertag", 50.0, 50.0, 25.0]
+    assert len(data["stats"]["rows"]) == 3 and data["stats"]["rows"][-1][0] == today
+
+    assert client.get("/dashboard?q=ausflug").json()["transactions"]["rows"][0][5] == "Ausflug"
+    assert client.get("/dashboard?tx_limit=1&stats_days=3").headers["X-Cache"] == "HIT"
+    client.post("/students", json={"name": "Ben"})
+    r = client.get("/dashboard?tx_limit=1&stats_days=3")
+    assert r.headers["X-Cache"] == "MISS"
+    assert len(r.json()["students"]["rows"]) == 2
+
+
+def test_writes_publish_change_events(client):
+    start = api.feed.last_id
+    tx = client.post("/transactions", json={"type": "einzahlung", "amount": 8}).json()
+    client.delete(f"/transactions/{tx['id']}")
+    events = [e for i, e in api.feed._history if i > start]
+    assert [e["type"] for e in events] == ["tx_created", "balance", "tx_deleted", "balance"]
+    assert events[0]["tx"]["amount"] == 8.0 and events[1]["current_total"] == 8.0
+    assert events[3]["current_total"] == 0.0
+    assert api._sse_message(5, events[2]) == b'id: 5\nevent: tx_deleted\ndata: {"type":"tx_deleted","id":%d,"class_id":"default"}\n\n' % tx["id"]
+
+
+def test_metrics_endpoint_reports_routes_and_db_calls(client):
+    client.post("/transactions", json={"type": "einzahlung", "amount": 3})
+    client.get("/transactions/999999")
+    client.get("/transactions?limit=5")
+
+    text = client.get("/metrics").text
+    assert 'http_requests_total{method="POST",route="/transactions",status="200"}' in text
+    assert 'http_request_duration_seconds_count{method="GET",route="/transactions"}' in text
+    assert 'db_call_duration_seconds_count{adapter="db_memory",operation="create_transaction"}' in text
+    assert 'db_call_documents_total{adapter="db_memory",operation="query_transaction_rows"}' in text
+    assert 'response_cache{name="misses"}' in text
+
+
+def test_db_call_trace_follows_into_threadpool(client, monkeypatch):
+    from myapp.tracing import record_round_trip
+
+    def fake_rows(**kwargs):
+        record_round_trip(documents=2)  # so meldet der Mongo-CommandListener
+        return [{"id": 1}, {"id": 2}]
+
+    fake_rows.__module__ = "myapp.adapters.db_fake"
+    monkeypatch.setattr(db_memory, "query_transaction_rows", fake_rows)
+    client.get("/transactions")
+    assert 'db_call_round_trips_total{adapter="db_fake",operation="fake_rows"} 1' in client.get("/metrics").text
+
+
+def test_slow_request_profile_with_db_breakdown(client, monkeypatch, tmp_path):
+    import time
+
+    from myapp.backend.profiling import profiler
+
+    def slow_rows(**kwargs):
+        time.sleep(0.05)
+        return [{"id": 1}]
+
+    monkeypatch.setattr(db_memory, "query_transaction_rows", slow_rows)
+    monkeypatch.setattr(profiler, "directory", str(tmp_path))
+    monkeypatch.setattr(profiler, "threshold_ms", 0.0)
+    monkeypatch.setattr(profiler.sampler, "interval_ms", profiler.sampler.interval_ms)
+
+    assert client.get("/admin/profiling").status_code == 403  # kein ADMIN_TOKEN: gesperrt
+    monkeypatch.setattr(api, "ADMIN_TOKEN", "geheim")
+    assert client.put("/admin/profiling", json={"threshold_ms": 20}).status_code == 403
+    status = client.put("/admin/profiling", json={"threshold_ms": 20, "interval_ms": 1}, headers={"X-Admin-Token": "geheim"}).json()
+    assert status["enabled"] and status["threshold_ms"] == 20
+
+    client.get("/transactions?limit=5&q=ausflug")
+    client.get("/health/db")  # schnell: kein Bericht
+    (name,) = client.get("/admin/profiling", headers={"X-Admin-Token": "geheim"}).json()["reports"]
+    report = client.get(f"/admin/profiling/{name}", headers={"X-Admin-Token": "geheim"}).json()
+    assert report["route"] == "/transactions"
+    assert report["query"] == {"limit": "5", "q": "ausflug"}
+    assert [c["operation"] for c in report["db_calls"]] == ["slow_rows"]
+    assert report["db_total_ms"] >= 50
+    assert any("slow_rows" in line for line in report["folded"])
+    assert client.get("/admin/profiling/../../etc/passwd", headers={"X-Admin-Token": "geheim"}).status_code == 404
+
+
+def test_classes_are_isolated(client):
+    client.post("/classes/4a/transactions", json={"type": "einzahlung", "amount": 10, "student": "Anna"})
+    client.post("/classes/4a/students", json={"name": "Anna"})
+    assert client.get("/classes/4b/balance").json()["current_total"] == 0.0
+    r = client.post("/classes/4b/transactions", json={"type": "einzahlung", "amount": 3})
+    assert r.status_code == 200
+    # gleicher Name in einer anderen Klasse ist erlaubt
+    assert client.post("/classes/4b/students", json={"name": "Anna"}).status_code == 200
+
+    assert client.get("/classes/4a/balance").json()["current_total"] == 10.0
+    assert [t["amount"] for t in client.get("/classes/4b/transactions").json()] == [3.0]
+    assert client.get("/balance").json()["current_total"] == 0.0
+    # eine Transaktion einer anderen Klasse lässt sich nicht löschen
+    assert client.delete(f"/classes/4a/transactions/{r.json()['id']}").status_code == 404
+
+    # Schreiben in 4b lässt den Cache von 4a stehen
+    assert client.get("/classes/4a/dashboard").headers["X-Cache"] == "MISS"
+    client.post("/classes/4b/transactions", json={"type": "einzahlung", "amount": 1})
+    assert client.get("/classes/4a/dashboard").headers["X-Cache"] == "HIT"
+
+    assert client.get("/classes/4%20a/balance").status_code == 404
+    assert 'route="/transactions"' in client.get("/metrics").text
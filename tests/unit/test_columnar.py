@@ -0,0 +1,68 @@
+from datetime import date, datetime
+
+from myapp.adapters import columnar
+from myapp.adapters.db_memory import ListLedger, Transaction
+
+
+def _fill(ledger):
+    now = datetime(2025, 1, 1, 12, 0)
+    for i in range(1, 21):
+        ledger.append(Transaction(
+            id=i,
+            type="einzahlung" if i % 3 else "ausgabe",
+            amount=float(i),
+            description=f"tx {i}",
+            timestamp=now,
+            category="Ausflug" if i % 2 else "Material",
+            student="Anna" if i % 4 else "Ben",
+            date=date(2025, 1, 1 + i % 5),
+        ))
+    for i in (2, 7, 11):
+        ledger.remove(i)
+    return ledger
+
+
+def _ids(txs):
+    return [t.id for t in txs]
+
+
+def test_columnar_ledger_matches_list_ledger(monkeypatch):
+    monkeypatch.setattr(columnar, "QUERY_CHUNK", 3)  # mehrere Blöcke je Abfrage
+    for np in (columnar.np, None):
+        monkeypatch.setattr(columnar, "np", np)
+        col, lst = _fill(columnar.ColumnarLedger()), _fill(ListLedger())
+
+        assert col.total() == lst.total()
+        assert col.daily_totals() == lst.daily_totals()
+        assert _ids(col) == _ids(lst)
+        for kwargs in (
+            {"limit": 5, "after_id": 3},
+            {"category": "Ausflug", "student": "Anna"},
+            {"type_": "ausgabe", "descending": True, "after_id": 18},
+            {"date_from": date(2025, 1, 2), "date_to": date(2025, 1, 3)},
+            {"student": "Niemand"},
+        ):
+            assert _ids(col.query(**kwargs)) == _ids(lst.query(**kwargs))
+        assert col.get(5) == lst.get(5)
+
+
+def test_timestamps_keep_microseconds():
+    ledger = columnar.ColumnarLedger()
+    ts = datetime(2025, 3, 1, 12, 30, 45, 123457)
+    ledger.append(Transaction(id=1, type="einzahlung", amount=1.0, description="", timestamp=ts))
+    assert ledger.get(1).timestamp == ts
+
+
+def test_first_page_reads_only_the_first_chunk(monkeypatch):
+    if columnar.np is None:
+        return
+    ledger = columnar.ColumnarLedger()
+    now = datetime(2025, 1, 1)
+    for i in range(1, 10_001):
+        ledger.append(Transaction(id=i, type="einzahlung", amount=1.0, description="", timestamp=now, category="Ausflug"))
+
+    scanned = []
+    mask = ledger._mask
+    monkeypatch.setattr(ledger, "_mask", lambda start, stop, *args: scanned.append(stop - start) or mask(start, stop, *args))
+    assert _ids(ledger.query(limit=50, category="Ausflug", descending=True)) == list(range(10_000, 9_950, -1))
+    assert scanned == [columnar.QUERY_CHUNK]
@@ -0,0 +1,274 @@
+import os
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+
+import pytest
+
+from myapp.adapters import db_memory
+from myapp.adapters.journal import Journal
+
+
+def _fresh() -> None:
+    db_memory._reset_storage()
+    db_memory.connect(seed=False)
+
+
+def test_reconcile_balance_without_drift():
+    _fresh()
+    db_memory.create_transaction("einzahlung", 30.0)
+    db_memory.create_transaction("ausgabe", 10.0)
+
+    result = db_memory.reconcile_balance()
+    assert result["stored"] == 20.0
+    assert result["computed"] == 20.0
+    assert result["ok"] is True
+
+
+def test_reconcile_balance_detects_and_fixes_drift():
+    _fresh()
+    db_memory.create_transaction("einzahlung", 30.0)
+    db_memory.get_balance().current_total = 25.0
+
+    result = db_memory.reconcile_balance(fix=True)
+    assert result["drift"] == -5.0
+    assert result["fixed"] is True
+    assert db_memory.get_balance().current_total == 30.0
+
+
+def test_daily_stats_from_rollups():
+    _fresh()
+    today = date.today()
+    db_memory.create_transaction("einzahlung", 50.0, date_=today - timedelta(days=1))
+    db_memory.create_transaction("ausgabe", 20.0, date_=today)
+    future = db_memory.create_transaction("einzahlung", 5.0, date_=today + timedelta(days=2))
+
+    stats = db_memory.get_daily_stats(days=3)
+    assert [s["date"] for s in stats] == [(today - timedelta(days=n)).isoformat() for n in (2, 1, 0)]
+    assert [s["balance"] for s in stats] == [0.0, 50.0, 30.0]
+    assert stats[-1]["expense"] == 20.0
+
+    db_memory.delete_transaction(future.id)
+    assert db_memory.get_daily_stats(days=1)[0]["balance"] == 30.0
+
+
+def test_journal_and_snapshot_survive_restart(tmp_path, monkeypatch):
+    db_memory._reset_storage()
+    monkeypatch.setattr(db_memory, "MEMORY_DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(db_memory, "MEMORY_SNAPSHOT_EVERY", 3)
+
+    db_memory.connect()
+    for amount in (10.0, 20.0, 30.0, 40.0):
+        db_memory.create_transaction("einzahlung", amount, student="Anna", date_=date(2025, 3, 1))
+    db_memory.delete_transaction(2)
+
+    # Absturz simulieren: Speicher verwerfen ohne Snapshot beim Herunterfahren
+    db_memory._reset_storage()
+    db_memory.connect()
+
+    assert [t.id for t in db_memory.get_all_transactions()] == [1, 3, 4]
+    assert db_memory.get_balance().current_total == 80.0
+    assert db_memory.create_transaction("ausgabe", 5.0).id == 5
+
+    db_memory.disconnect()
+    db_memory.connect()
+    assert db_memory.get_balance().current_total == 75.0
+    db_memory._reset_storage()
+
+
+def test_torn_journal_line_does_not_swallow_later_writes(tmp_path, monkeypatch):
+    db_memory._reset_storage()
+    monkeypatch.setattr(db_memory, "MEMORY_DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(db_memory, "MEMORY_SNAPSHOT_EVERY", 1000)
+
+    db_memory.connect()
+    db_memory.create_transaction("einzahlung", 10.0)
+    db_memory.create_transaction("einzahlung", 20.0)
+    db_memory._reset_storage()
+    # Absturz mitten im Schreiben: halbe letzte Zeile
+    with open(tmp_path / "journal.ndjson", "ab") as f:
+        f.write(b'{"seq":3,"op":"tx_cre')
+
+    db_memory.connect()
+    assert [t.id for t in db_memory.get_all_transactions()] == [1, 2]
+    db_memory.create_transaction("einzahlung", 30.0)
+    db_memory.create_transaction("einzahlung", 40.0)
+
+    for _ in range(2):
+        db_memory._reset_storage()
+        db_memory.connect()
+        assert [t.id for t in db_memory.get_all_transactions()] == [1, 2, 3, 4]
+        assert db_memory.get_balance().current_total == 100.0
+    db_memory._reset_storage()
+
+
+def test_student_balances_follow_writes():
+    _fresh()
+    anna = db_memory.create_student("Anna")
+    db_memory.create_student("Ben")
+    db_memory.create_transaction("einzahlung", 15.0, student="Anna")
+    spent = db_memory.create_transaction("ausgabe", 4.0, student="Anna")
+    db_memory.create_transaction("einzahlung", 7.0)
+
+    balances = {b["name"]: b for b in db_memory.get_student_balances()}
+    assert balances["Anna"]["balance"] == 11.0
+    assert balances["Ben"]["count"] == 0
+
+    db_memory.delete_transaction(spent.id)
+    assert db_memory.get_student_balance(anna["id"])["balance"] == 15.0
+    assert db_memory.rebuild_student_balances() == 1
+    assert db_memory.get_student_balance(anna["id"])["balance"] == 15.0
+
+
+def test_student_balances_follow_student_id(tmp_path, monkeypatch):
+    monkeypatch.setattr(db_memory, "MEMORY_DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(db_memory, "MEMORY_SNAPSHOT_EVERY", 3)
+    for engine in ("list", "columnar"):
+        monkeypatch.setattr(db_memory, "MEMORY_ENGINE", engine)
+        for f in tmp_path.iterdir():
+            f.unlink()
+        db_memory._reset_storage()
+        db_memory.connect()
+        # vor dem Anlegen gebucht -> zählt ab dem Anlegen für den Schüler
+        db_memory.create_transaction("einzahlung", 10.0, student="Anna")
+        old = db_memory.create_student("Anna")
+        db_memory.create_transaction("einzahlung", 5.0, student="Anna")
+        assert db_memory.get_student_balance(old["id"])["balance"] == 15.0
+
+        # gleicher Name, neuer Schüler: die Buchungen des gelöschten zählen nicht mit
+        db_memory.delete_student(old["id"])
+        new = db_memory.create_student("Anna")
+        db_memory.create_transaction("einzahlung", 2.0, student="Anna")
+        assert db_memory.get_student_balance(new["id"])["balance"] == 2.0
+
+        db_memory._reset_storage()
+        db_memory.connect()
+        assert db_memory.get_student_balances() == [
+            {"student_id": new["id"], "name": "Anna", "income": 2.0, "expense": 0.0, "balance": 2.0, "count": 1}
+        ]
+    db_memory._reset_storage()
+
+
+def test_classes_survive_restart_separately(tmp_path, monkeypatch):
+    from myapp.tenancy import class_scope
+
+    db_memory._reset_storage()
+    monkeypatch.setattr(db_memory, "MEMORY_DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(db_memory, "MEMORY_SNAPSHOT_EVERY", 2)
+
+    db_memory.connect()
+    for class_id, amount in (("4a", 10.0), ("4b", 3.0), ("4a", 5.0)):
+        with class_scope(class_id):
+            db_memory.create_transaction("einzahlung", amount, student="Anna")
+            db_memory.create_student(f"Anna {amount}")
+
+    db_memory._reset_storage()
+    db_memory.connect()
+    assert db_memory.list_classes() == ["4a", "4b"]
+    with class_scope("4a"):
+        assert db_memory.get_balance().current_total == 15.0
+        assert [s["balance"] for s in db_memory.get_student_balances()] == [0.0, 0.0]
+        assert [r["amount"] for r in db_memory.search_transaction_rows("anna")] == [10.0, 5.0]
+    with class_scope("4b"):
+        assert [t.amount for t in db_memory.get_all_transactions()] == [3.0]
+    assert db_memory.get_balance().current_total == 0.0
+    db_memory._reset_storage()
+
+
+def test_concurrent_writes_and_reads_keep_ledger_consistent(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    monkeypatch.setattr(db_memory, "MEMORY_ENGINE", "columnar")
+    _fresh()
+
+    def write(i):
+        return db_memory.create_transaction("einzahlung", 1.0, category="Ausflug" if i % 2 else "Material").id
+
+    def read(_):
+        db_memory.reconcile_balance()
+        db_memory.query_transaction_rows(category="Ausflug", limit=50)
+        db_memory.rebuild_daily_rollups()
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        readers = [pool.submit(read, i) for i in range(200)]
+        ids = list(pool.map(write, range(1000)))
+        for r in readers:
+            r.result()
+
+    assert sorted(ids) == list(range(1, 1001))
+    assert [t.id for t in db_memory.get_all_transactions()] == list(range(1, 1001))
+    assert db_memory.reconcile_balance()["computed"] == 1000.0
+    db_memory._reset_storage()
+
+
+def test_bulk_rejects_overdraft_rows_and_defaults_date():
+    _fresh()
+    created, errors = db_memory.create_transactions_bulk([
+        {"type_": "einzahlung", "amount": 10.0},
+        {"type_": "ausgabe", "amount": 15.0},
+        {"type_": "ausgabe", "amount": 10.0},
+    ])
+    assert [t.amount for t in created] == [10.0, 10.0]
+    assert errors == [(1, db_memory.OVERDRAFT_MSG)]
+    assert all(t.date == date.today() for t in created)
+    assert db_memory.get_balance().current_total == 0.0
+
+
+def test_reads_do_not_create_classes():
+    from myapp.tenancy import class_scope
+
+    _fresh()
+    with class_scope("unbekannt"):
+        assert db_memory.get_all_transactions() == []
+        assert db_memory.get_balance().current_total == 0.0
+        assert db_memory.get_student_balances() == []
+        db_memory.create_transactions_bulk([{"type_": "ausgabe", "amount": 1.0}])
+        assert db_memory.delete_transaction(1) is False
+    assert db_memory.list_classes() == []
+
+    with class_scope("4a"):
+        db_memory.create_student("Anna")
+    assert db_memory.list_classes() == ["4a"]
+
+
+def test_create_transaction_rejects_overdraft():
+    _fresh()
+    db_memory.create_transaction("einzahlung", 5.0)
+    with pytest.raises(ValueError, match="ins Minus"):
+        db_memory.create_transaction("ausgabe", 5.5)
+    assert db_memory.create_transaction("ausgabe", 5.0).id == 2
+    assert db_memory.get_balance().current_total == 0.0
+
+
+def test_journal_fsyncs_pending_writes_when_idle(tmp_path, monkeypatch):
+    synced = []
+    real_fsync = os.fsync
+    monkeypatch.setattr(os, "fsync", lambda fd: synced.append(fd) or real_fsync(fd))
+
+    journal = Journal(str(tmp_path), fsync_every=1000, fsync_interval=0.05)
+    journal.open()
+    journal._last_sync = time.monotonic()
+    journal.append("tx_delete", id=1)
+    assert synced == []
+    time.sleep(0.2)  # kein weiteres append: der Timer muss trotzdem fsyncen
+    assert len(synced) == 1
+    journal.close()
+
+
+def test_data_dir_is_locked_while_in_use(tmp_path, monkeypatch):
+    monkeypatch.setattr(db_memory, "MEMORY_DATA_DIR", str(tmp_path))
+    db_memory._reset_storage()
+    db_memory.connect()
+    db_memory.create_transaction("einzahlung", 10.0)
+
+    env = {**os.environ, "USE_MONGO": "0", "MEMORY_DATA_DIR": str(tmp_path), "PYTHONPATH": os.pathsep.join(sys.path)}
+    r = subprocess.run([sys.executable, "-m", "myapp.backend.manage", "rebuild-rollups"], env=env, capture_output=True, text=True)
+    assert r.returncode == 1 and "journal.lock" in r.stderr
+
+    db_memory._reset_storage()  # gibt die Sperre frei
+    r = subprocess.run([sys.executable, "-m", "myapp.backend.manage", "rebuild-rollups"], env=env, capture_output=True, text=True)
+    assert r.returncode == 0, r.stderr
+    db_memory.connect()
+    assert db_memory.get_balance().current_total == 10.0
+    db_memory._reset_storage()
@@ -0,0 +1,43 @@
+from myapp.adapters.db_mongo import (
+    _balance_class, _balance_floor, _balance_id, _change_event, _class_range, _rollup_deltas, _tx_filter,
+)
+from myapp.tenancy import class_scope
+
+
+def test_balance_floor_is_lowest_point_of_running_total():
+    # +5, -8, +1: der Kontostand sinkt zwischendurch um 3 -> mindestens 3 nötig
+    assert _balance_floor([5.0, -8.0, 1.0]) == 3.0
+    # nur Einzahlungen dürfen auch bei leicht negativem Stand gebucht werden (wie die Einzelprüfung)
+    assert _balance_floor([2.0]) == -2.0
+
+
+def test_change_event_maps_inserts_deletes_and_balance():
+    insert = {"ns": {"coll": "transactions"}, "operationType": "insert", "fullDocument": {"class_id": "4a", "id": 4, "type": "ausgabe", "amount": 2, "terms": ["x"]}}
+    assert _change_event(insert)["tx"]["id"] == 4 and _change_event(insert)["class_id"] == "4a"
+    delete = {"ns": {"coll": "transactions"}, "operationType": "delete", "fullDocumentBeforeChange": {"id": 4}}
+    assert _change_event(delete) == {"type": "tx_deleted", "id": 4, "class_id": "default"}
+    # ohne Pre-Image sind id und Klasse unbekannt
+    assert _change_event({**delete, "fullDocumentBeforeChange": None}) == {"type": "reset"}
+    update = {"ns": {"coll": "balance"}, "operationType": "update", "fullDocument": {"_id": "balance/4a", "current_total": 7}}
+    assert _change_event(update) == {"type": "balance", "current_total": 7.0, "class_id": "4a"}
+    assert _change_event({"ns": {"coll": "transactions"}, "operationType": "update"}) is None
+
+
+def test_class_keys_and_filters():
+    assert _balance_id("default") == "balance" and _balance_class("balance") == "default"
+    assert _balance_class(_balance_id("4a")) == "4a" and _balance_class("schema") is None
+    # der Bereich einer Klasse enthält keine Schlüssel einer Klasse mit gleichem Anfang
+    rng = _class_range("4a")
+    assert rng["$gte"] <= "4a/2025-01-01" < rng["$lt"] and not (rng["$gte"] <= "4ab/2025-01-01" < rng["$lt"])
+    with class_scope("4b"):
+        assert _tx_filter(student="Anna") == {"class_id": "4b", "student": "Anna"}
+
+
+def test_student_balances_are_keyed_by_student_id():
+    docs = [
+        {"class_id": "4a", "type": "einzahlung", "amount": 5.0, "student": "Anna", "student_id": 3},
+        {"class_id": "4a", "type": "ausgabe", "amount": 2.0, "student": "Anna", "student_id": 3},
+        # gleicher Name, aber beim Buchen gab es keinen Schüler "Anna"
+        {"class_id": "4a", "type": "einzahlung", "amount": 9.0, "student": "Anna", "student_id": 0},
+    ]
+    assert _rollup_deltas(docs, key="student_id") == {"4a/3": {"income": 5.0, "expense": 2.0, "count": 2}}
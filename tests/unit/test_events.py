@@ -0,0 +1,56 @@
+import asyncio
+
+from myapp.backend.events import ChangeFeed
+
+
+async def _take(stream, n):
+    return [await stream.__anext__() for _ in range(n)]
+
+
+def test_subscriber_receives_published_events_and_heartbeat():
+    async def run():
+        feed = ChangeFeed()
+        stream = feed.subscribe(heartbeat=0.05)
+        first = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)
+        feed.publish({"type": "tx_deleted", "id": 3})
+        got = [await first] + await _take(stream, 1)
+        await stream.aclose()
+        return got, feed.subscribers
+
+    got, subscribers = asyncio.run(run())
+    assert got == [(1, {"type": "tx_deleted", "id": 3}), (0, {"type": "ping"})]
+    assert subscribers == 0
+
+
+def test_replay_after_last_event_id_or_reset_when_too_old():
+    async def run():
+        feed = ChangeFeed(history=2)
+        for i in range(3):
+            feed.publish({"type": "balance", "current_total": float(i)})
+        replay = feed.subscribe(last_id=1)
+        recent = await _take(replay, 2)
+        await replay.aclose()
+        stale = feed.subscribe(last_id=0)
+        reset = await _take(stale, 1)
+        await stale.aclose()
+        return recent, reset
+
+    recent, reset = asyncio.run(run())
+    assert [i for i, _ in recent] == [2, 3]
+    assert reset == [(3, {"type": "reset"})]
+
+
+def test_subscribers_only_see_their_class():
+    feed = ChangeFeed(history=10)
+
+    async def run():
+        stream = feed.subscribe(last_id=0, heartbeat=5, class_id="4a")
+        feed.publish({"type": "balance", "class_id": "4b"})
+        feed.publish({"type": "balance", "class_id": "4a"})
+        feed.publish({"type": "reset"})
+        events = await _take(stream, 2)
+        await stream.aclose()
+        return events
+
+    assert asyncio.run(run()) == [(2, {"type": "balance", "class_id": "4a"}), (3, {"type": "reset"})]
@@ -0,0 +1,18 @@
+from myapp.backend.metrics import Counter, Histogram, Registry
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    h = registry.register(Histogram("latency_seconds", "Dauer", ("route",), buckets=(0.1, 1.0)))
+    c = registry.register(Counter("requests_total", "Requests", ("route",)))
+    for value in (0.05, 0.5, 3.0):
+        h.observe(("/a",), value)
+    c.inc(('/b"x',))
+
+    text = registry.render()
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{route="/a",le="1"} 2' in text
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{route="/a"} 3' in text
+    assert 'requests_total{route="/b\\"x"} 1' in text
+    assert "# TYPE latency_seconds histogram" in text
@@ -0,0 +1,17 @@
+from myapp.adapters.mongo_settings import MongoSettings
+
+
+def test_settings_from_env(monkeypatch):
+    monkeypatch.setenv("MONGO_MAX_POOL_SIZE", "20")
+    monkeypatch.setenv("MONGO_MIN_POOL_SIZE", "4")
+    monkeypatch.setenv("MONGO_COMPRESSORS", "zstd, zlib")
+    monkeypatch.setenv("MONGO_WRITE_CONCERN_W", "majority")
+    monkeypatch.setenv("MONGO_WRITE_CONCERN_TIMEOUT_MS", "2500")
+
+    kwargs = MongoSettings.from_env().client_kwargs()
+    assert kwargs["maxPoolSize"] == 20
+    assert kwargs["minPoolSize"] == 4
+    assert kwargs["compressors"] == "zstd,zlib"
+    assert kwargs["w"] == "majority"
+    assert kwargs["wTimeoutMS"] == 2500
+    assert "socketTimeoutMS" not in kwargs
@@ -0,0 +1,55 @@
+import asyncio
+import os
+import threading
+import time
+
+from myapp.backend import profiling
+from myapp.backend.profiling import Profiler, ProfilingMiddleware, sample_stacks
+
+
+def test_sample_stacks_skips_waiting_threads():
+    stop = threading.Event()
+
+    running = [True]
+
+    def busy_worker():
+        # kein stop.is_set() in der Schleife: ein Frame in threading.py gilt als wartend
+        while running[0]:
+            sum(range(1000))
+
+    threading.Thread(target=stop.wait, name="idle", daemon=True).start()
+    busy = threading.Thread(target=busy_worker, name="busy", daemon=True)
+    busy.start()
+    try:
+        time.sleep(0.01)
+        stacks = sample_stacks()
+    finally:
+        running[0] = False
+        stop.set()
+        busy.join()
+    assert any(s.startswith("busy;") and s.endswith("test_profiling.py:busy_worker") for s in stacks)
+    assert not any(s.startswith("idle;") for s in stacks)
+
+
+def test_reports_rotate(tmp_path):
+    profiler = Profiler(threshold_ms=1, directory=str(tmp_path), keep=2, interval_ms=5)
+    for i in range(4):
+        profiler.write({"method": "GET", "route": "/transactions/{tx_id}", "duration_ms": 100 + i})
+        time.sleep(0.01)
+    names = profiler.reports()
+    assert len(names) == 2 and sorted(os.listdir(tmp_path)) == sorted(names)
+    assert names[0].endswith("-get-transactions_tx_id-103ms.json")
+    assert profiler.report_path("../x.json") is None
+
+
+def test_event_streams_are_not_sampled(monkeypatch):
+    monkeypatch.setattr(profiling, "profiler", Profiler(threshold_ms=1, directory="", keep=1, interval_ms=5))
+    watching = []
+
+    async def app(scope, receive, send):
+        watching.append(len(profiling.profiler.sampler._watches))
+
+    middleware = ProfilingMiddleware(app)
+    for path, root_path in (("/events", ""), ("/classes/4a/events", "/classes/4a"), ("/transactions", "")):
+        asyncio.run(middleware({"type": "http", "method": "GET", "path": path, "root_path": root_path, "headers": []}, None, None))
+    assert watching == [0, 0, 1]
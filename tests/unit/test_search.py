@@ -0,0 +1,29 @@
+from datetime import date
+
+from myapp.adapters.search import SearchIndex, parse_query, prefix_terms
+
+
+def test_parse_query_recognizes_amounts_and_dates():
+    q = parse_query("Aus 12,50 01.03.2025 7 x")
+    assert q.words == ["aus"]
+    assert [(n.amount, n.word) for n in q.numbers] == [(12.5, None), (7.0, "7")]
+    assert q.dates == [date(2025, 3, 1)]
+
+
+def test_prefix_terms_skip_single_characters():
+    assert prefix_terms({"anna"}) == ["an", "ann", "anna"]
+
+
+def test_index_prefix_search_and_removal():
+    index = SearchIndex()
+    index.add(1, {"ausflug", "anna"}, 12.5, date(2025, 3, 1))
+    index.add(2, {"ausgabe", "kreide"}, 3.0, date(2025, 3, 2))
+    index.add(3, {"ausflug", "ben"}, 12.5, date(2025, 3, 2))
+
+    assert index.search(parse_query("aus")) == [1, 2, 3]
+    assert index.search(parse_query("ausf 12.50"), descending=True) == [3, 1]
+    assert index.search(parse_query("aus 2025-03-02"), after_id=2) == [3]
+
+    index.remove(3, {"ausflug", "ben"}, 12.5, date(2025, 3, 2))
+    assert index.search(parse_query("ausflug")) == [1]
+    assert index.search(parse_query("be")) == []